@@ -0,0 +1,32 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""gunicorn hooks, read from the working directory.
+
+They manage the metrics the workers write to PROMETHEUS_MULTIPROC_DIR (see
+openclinic.metrics).
+"""
+
+import glob
+import os
+
+
+def on_starting(server):
+    # the metrics of the previous run
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, "*.db")):
+            os.unlink(path)
+
+
+def child_exit(server, worker):
+    # the gauges of a dead worker are not added up anymore
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
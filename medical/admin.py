@@ -18,9 +18,10 @@ __license__ = "GPLv3"
 
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from .models import History, Patient, Problem, Staff, Test
+from .models import History, Job, Patient, Problem, SlowQuery, Staff, Test
 
 admin.site.register(History)
 admin.site.register(Patient)
@@ -63,3 +64,76 @@ class StaffAdmin(UserAdmin):
     list_display = ("first_name", "last_name", "email", "is_staff")
     search_fields = ("email", "first_name", "last_name")
     ordering = ("username",)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("name", "queue", "status", "attempts", "run_at", "created")
+    list_filter = ("status", "queue", "name")
+    search_fields = ("name",)
+    ordering = ("run_at",)
+    readonly_fields = (
+        "name",
+        "args",
+        "queue",
+        "status",
+        "attempts",
+        "locked_by",
+        "locked_at",
+        "last_error",
+        "created",
+    )
+    actions = ("retry",)
+
+    @admin.action(description=_("Retry selected jobs"))
+    def retry(self, request, queryset):
+        retried = queryset.exclude(status=Job.RUNNING).update(
+            status=Job.QUEUED, run_at=timezone.now(), attempts=0
+        )
+        self.message_user(request, _("%d jobs queued.") % retried)
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    """Fingerprints of the slow queries, the worst first."""
+
+    list_display = (
+        "__str__",
+        "view",
+        "calls",
+        "total_ms",
+        "mean_ms",
+        "max_ms",
+        "last_seen",
+    )
+    list_filter = ("view",)
+    search_fields = ("sql", "view")
+    ordering = ("-total_time",)
+    readonly_fields = (
+        "fingerprint",
+        "sql",
+        "view",
+        "calls",
+        "total_ms",
+        "mean_ms",
+        "max_ms",
+        "plan",
+        "first_seen",
+        "last_seen",
+    )
+    exclude = ("total_time", "max_time")
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description=_("total (ms)"), ordering="total_time")
+    def total_ms(self, obj):
+        return round(obj.total_time * 1000)
+
+    @admin.display(description=_("mean (ms)"))
+    def mean_ms(self, obj):
+        return round(obj.mean_time * 1000)
+
+    @admin.display(description=_("max (ms)"), ordering="max_time")
+    def max_ms(self, obj):
+        return round(obj.max_time * 1000)
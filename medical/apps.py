@@ -0,0 +1,55 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+from django.apps import AppConfig
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Runs settings.DATABASE_SQLITE_PRAGMAS on each new SQLite connection."""
+    if connection.vendor != "sqlite":
+        return
+
+    with connection.cursor() as cursor:
+        for name, value in settings.DATABASE_SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def ensure_search_indexes(sender, using, plan=None, **kwargs):
+    """
+    SQLite remakes a table when altering it, dropping its triggers:
+    recreate them (and reindex) after any migration touching medical.
+    """
+    from .search import (
+        install_patient_name_index,
+        install_problem_index,
+        rebuild_patient_name_index,
+        rebuild_problem_index,
+    )
+
+    applied = [migration for migration, backwards in plan or [] if not backwards]
+    if not any(migration.app_label == sender.label for migration in applied):
+        return
+
+    connection = connections[using]
+    if install_problem_index(connection):
+        rebuild_problem_index(connection)
+    if install_patient_name_index(connection):
+        rebuild_patient_name_index(connection)
+
+
+class MedicalConfig(AppConfig):
+    name = "medical"
+
+    def ready(self):
+        from . import reports  # connects the report signals
+
+        post_migrate.connect(ensure_search_indexes, sender=self)
+        connection_created.connect(configure_sqlite, dispatch_uid="configure_sqlite")
@@ -0,0 +1,140 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""ZIP archives of the test documents, streamed while they are written.
+
+``zipfile`` writes the archive to a buffer that is emptied after every
+chunk of every document, so memory does not depend on the size of the
+archive: there is no temporary file and the response starts at once. As the
+output is not seekable, sizes and checksums follow each document (data
+descriptors) and ZIP64 is used for documents over 2 GiB.
+
+Documents in a compressed format (PDF, JPEG, DOCX...) are stored as they
+are: deflating them again costs CPU and saves nothing.
+"""
+
+import logging
+import os
+import posixpath
+import zipfile
+
+from django.utils import timezone
+from django.utils.text import slugify
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+COMPRESSED_TYPES = {
+    "application/gzip",
+    "application/pdf",
+    "application/x-7z-compressed",
+    "application/x-bzip2",
+    "application/x-rar-compressed",
+    "application/x-xz",
+    "application/zip",
+    "image/gif",
+    "image/jpeg",
+    "image/png",
+    "image/webp",
+}
+
+# containers in ZIP format: DOCX, XLSX, ODT...
+COMPRESSED_PREFIXES = (
+    "application/vnd.openxmlformats-officedocument.",
+    "application/vnd.oasis.opendocument.",
+    "audio/",
+    "video/",
+)
+
+
+def is_compressed(content_type):
+    return bool(content_type) and (
+        content_type in COMPRESSED_TYPES or content_type.startswith(COMPRESSED_PREFIXES)
+    )
+
+
+class _Buffer:
+    """Write-only file object for zipfile, emptied by pop()."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def zip_stream(members, chunk_size=CHUNK_SIZE):
+    """
+    Yields the chunks of a ZIP archive of members: (name in the archive,
+    path, date_time tuple, compress) tuples. Missing files are skipped.
+    """
+    buffer = _Buffer()
+    with zipfile.ZipFile(buffer, "w", allowZip64=True) as archive:
+        for name, path, date_time, compress in members:
+            try:
+                source = open(path, "rb")  # noqa: SIM115
+            except FileNotFoundError:
+                logger.warning("%s is missing from the archive", path)
+                continue
+
+            with source:
+                info = zipfile.ZipInfo(name, date_time)
+                info.compress_type = (
+                    zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+                )
+                info.external_attr = 0o644 << 16
+                info.file_size = os.fstat(source.fileno()).st_size
+                with archive.open(info, "w") as target:
+                    while chunk := source.read(chunk_size):
+                        target.write(chunk)
+                        if data := buffer.pop():
+                            yield data
+            if data := buffer.pop():
+                yield data
+
+    yield buffer.pop()  # central directory
+
+
+def _unique(name, names):
+    root, extension = posixpath.splitext(name)
+    number = 2
+    while name in names:
+        name = f"{root} ({number}){extension}"
+        number += 1
+    names.add(name)
+
+    return name
+
+
+def document_members(tests):
+    """
+    Returns the archive members of tests (with their problem), in a folder
+    per problem.
+    """
+    names = set()
+    for test in tests:
+        problem = test.problem
+        folder = f"{problem.order_number:02d}-{slugify(problem.wording)[:50]}"
+        yield (
+            _unique(f"{folder}/{test.filename()}", names),
+            test.document.path,
+            # the ZIP format starts in 1980
+            max(
+                timezone.localtime(test.created).timetuple()[:6], (1980, 1, 1, 0, 0, 0)
+            ),
+            not is_compressed(test.document_type),
+        )
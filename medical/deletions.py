@@ -0,0 +1,150 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Deletion of the test documents, out of the request.
+
+Deleting a patient deletes its tests by cascade: the ``pre_delete``
+receiver of every test only collects its document (``collect``), and the
+first ``post_delete`` (``flush``) releases the blobs and writes the whole
+batch to ``FileDeletion``, inside the transaction of the delete. Replacing
+the document of a test releases the previous one the same way. The queue
+is durable: a rolled back delete queues nothing, a committed one can not
+lose its files.
+
+The queue is then processed out of the request (see medical.jobs): by the
+job workers, or after commit by a local pool of ``MEDICAL_DELETION_WORKERS``
+threads (0: in the request). Failed deletions are retried later with an
+exponential delay, by the next deletion or by the ``process_file_deletions``
+command.
+"""
+
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, models
+from django.utils import timezone
+
+from . import jobs
+from .jobs import retry_delay
+from .storage import document_storage, is_blob
+from .thumbnails import delete_thumbnail
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+def _pending(using):
+    """Returns the (origin, names) collected on the connection."""
+    connection = connections[using]
+    if not hasattr(connection, "pending_file_deletions"):
+        connection.pending_file_deletions = (None, [])
+
+    return connection.pending_file_deletions
+
+
+def collect(name, using, origin):
+    """Collects a document of a test being deleted by origin.delete()."""
+    current, names = _pending(using)
+    if current is not origin:
+        # the first test of this delete (a failed delete leaves its names)
+        names = []
+        connections[using].pending_file_deletions = (origin, names)
+    names.append(name)
+
+
+def flush(using, origin):
+    """
+    Releases the blobs and queues the documents collected for origin, once
+    its tests are deleted.
+    """
+    current, names = _pending(using)
+    if current is not origin or not names:
+        return
+
+    connections[using].pending_file_deletions = (None, [])
+    release(names, using)
+
+
+def release(names, using):
+    """
+    Releases the blobs of documents no longer used by their tests and
+    queues them for deletion, in the transaction of the caller.
+    """
+    from .models import DocumentBlob, FileDeletion
+
+    references = Counter(name for name in names if is_blob(name))
+    by_count = {}
+    for name, count in references.items():
+        by_count.setdefault(count, []).append(name)
+    for count, blobs in by_count.items():
+        DocumentBlob.objects.using(using).filter(
+            name__in=blobs, references__gte=count
+        ).update(references=models.F("references") - count)
+
+    FileDeletion.objects.using(using).bulk_create(
+        [FileDeletion(name=name) for name in dict.fromkeys(names)],
+        batch_size=BATCH_SIZE,
+    )
+    jobs.defer(process, using, workers=settings.MEDICAL_DELETION_WORKERS, using=using)
+
+
+def delete_document(name, using):
+    """
+    Deletes a document and its preview, unless it is used again: a blob
+    uploaded again, a test restored...
+    """
+    from .models import DocumentBlob, Test
+
+    if is_blob(name):
+        DocumentBlob.purge(name, using)
+    elif not Test._base_manager.using(using).filter(document=name).exists():
+        document_storage().delete(name)
+        delete_thumbnail(name)
+
+
+@jobs.task
+def process(using=DEFAULT_DB_ALIAS, batch_size=BATCH_SIZE):
+    """
+    Deletes the queued documents that are due. Returns the number of
+    (deleted, failed) documents.
+    """
+    from .models import FileDeletion
+
+    queue = FileDeletion.objects.using(using)
+    deleted = failed = 0
+    while True:
+        now = timezone.now()
+        batch = list(queue.filter(next_attempt__lte=now).order_by("pk")[:batch_size])
+        if not batch:
+            break
+
+        done, retried = [], []
+        for deletion in batch:
+            try:
+                delete_document(deletion.name, using)
+            except Exception as e:
+                deletion.attempts += 1
+                deletion.next_attempt = now + retry_delay(deletion.attempts)
+                deletion.error = f"{type(e).__name__}: {e}"
+                retried.append(deletion)
+                logger.warning(
+                    "Deletion of %s failed (attempt %d): %s",
+                    deletion.name,
+                    deletion.attempts,
+                    e,
+                )
+            else:
+                done.append(deletion.pk)
+
+        queue.filter(pk__in=done).delete()
+        queue.bulk_update(retried, ["attempts", "next_attempt", "error"])
+        deleted += len(done)
+        failed += len(retried)
+
+    return deleted, failed
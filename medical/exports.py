@@ -0,0 +1,87 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Bulk export of medical records as CSV or NDJSON.
+
+Rows are read with ``values_list().iterator(chunk_size)`` (a server-side
+cursor on PostgreSQL, ``fetchmany`` on SQLite) and yielded as text, one
+chunk at a time, so memory use does not depend on the number of rows.
+"""
+
+import csv
+import io
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import History, Patient, Problem, Test
+from .search import SEARCH_NAME_FIELDS
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# internal columns, derived from others
+_EXCLUDED_FIELDS = set(SEARCH_NAME_FIELDS)
+
+EXPORT_MODELS = {
+    "patients": Patient,
+    "histories": History,
+    "problems": Problem,
+    "tests": Test,
+}
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def export_fields(model):
+    """Returns the exported columns (attnames, so foreign keys are ids)."""
+    return [
+        field.attname
+        for field in model._meta.concrete_fields
+        if field.name not in _EXCLUDED_FIELDS
+    ]
+
+
+def export_rows(name, export_format, chunk_size=DEFAULT_CHUNK_SIZE, using=None):
+    """
+    Yields the export of EXPORT_MODELS[name] in export_format as text
+    chunks of up to chunk_size rows, ordered by primary key.
+    """
+    model = EXPORT_MODELS[name]
+    fields = export_fields(model)
+    rows = (
+        model._base_manager.using(using)
+        .order_by("pk")
+        .values_list(*fields)
+        .iterator(chunk_size=chunk_size)
+    )
+
+    buffer = io.StringIO()
+    if export_format == "csv":
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        write = writer.writerow
+    else:
+        encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+        def write(row):
+            buffer.write(encoder.encode(dict(zip(fields, row, strict=True))))
+            buffer.write("\n")
+
+    pending = 0
+    for row in rows:
+        write(row)
+        pending += 1
+        if pending == chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    if buffer.tell():
+        yield buffer.getvalue()
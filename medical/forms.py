@@ -16,14 +16,18 @@
 __author__ = "Jose Antonio Chavarría"
 __license__ = "GPLv3"
 
+import os
+import re
+
 from ajax_select.fields import AutoCompleteSelectMultipleField
 from crispy_forms.bootstrap import FormActions
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Fieldset, Layout, Submit
 from django import forms
+from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 
-from .models import History, Patient, Problem, Staff, Test
+from .models import History, Patient, Problem, Staff, Test, TestUpload
 
 
 class BaseSearchForm(forms.Form):
@@ -165,10 +169,19 @@ class ProblemForm(FormCssMixin, forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields["order_number"].widget.attrs["readonly"] = True
+        # assigned by the server: posted values are ignored
+        self.fields["order_number"].disabled = True
+        self.fields["order_number"].required = False
         if self.instance:
             self.fields["closed"].initial = self.instance.closing_date
 
+    def clean_order_number(self):
+        if self.instance._state.adding:
+            # the initial value is only a preview: Problem.save allocates it
+            return None
+
+        return self.instance.order_number
+
     class Meta:
         model = Problem
         fields = (
@@ -256,3 +269,68 @@ class TestForm(forms.ModelForm):
         widgets = {
             "problem": forms.HiddenInput(),
         }
+        help_texts = {
+            "document_type": _("Detected from the document when left empty."),
+        }
+
+
+class TestUploadForm(forms.ModelForm):
+    class Meta:
+        model = TestUpload
+        fields = ("filename", "document_type", "size")
+
+    def clean_filename(self):
+        filename = os.path.basename(self.cleaned_data["filename"].replace("\\", "/"))
+        if not filename:
+            raise forms.ValidationError(_("Invalid file name."))
+
+        return filename
+
+    def clean_size(self):
+        size = self.cleaned_data["size"]
+        if not 0 < size <= settings.MEDICAL_UPLOAD_MAX_SIZE:
+            raise forms.ValidationError(
+                _("The document size must be between 1 and %(max)s bytes.")
+                % {"max": settings.MEDICAL_UPLOAD_MAX_SIZE}
+            )
+
+        return size
+
+
+class ReportBatchForm(forms.Form):
+    patients = forms.CharField(
+        label=_("Patients"),
+        widget=forms.Textarea,
+        help_text=_("Patient identifiers, separated by commas, spaces or lines."),
+    )
+
+    def clean_patients(self):
+        try:
+            patients = list(
+                dict.fromkeys(
+                    int(patient_id)
+                    for patient_id in re.split(
+                        r"[\s,;]+", self.cleaned_data["patients"]
+                    )
+                    if patient_id
+                )
+            )
+        except ValueError:
+            raise forms.ValidationError(_("Invalid patient identifier."))
+
+        if not 0 < len(patients) <= settings.MEDICAL_REPORT_BATCH_MAX_SIZE:
+            raise forms.ValidationError(
+                _("Between 1 and %(max)s patients.")
+                % {"max": settings.MEDICAL_REPORT_BATCH_MAX_SIZE}
+            )
+
+        unknown = set(patients).difference(
+            Patient.objects.filter(pk__in=patients).values_list("pk", flat=True)
+        )
+        if unknown:
+            raise forms.ValidationError(
+                _("Unknown patients: %(ids)s")
+                % {"ids": ", ".join(map(str, sorted(unknown)))}
+            )
+
+        return patients
@@ -0,0 +1,167 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Bulk import of patients from CSV or NDJSON.
+
+Rows are read one at a time, validated with the rules of the Patient model
+(field validation plus ``Patient.clean``) and written with ``bulk_create``,
+one transaction per chunk of rows, so memory use only depends on the chunk
+size. ``doctor_assigned`` holds the collegiate number of a doctor, resolved
+from a map loaded once.
+"""
+
+import csv
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Patient, Staff
+from .search import SEARCH_NAME_FIELDS
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# export_patients columns that are not imported (assigned on import)
+IGNORED_COLUMNS = {
+    "id",
+    "created",
+    "modified",
+    *SEARCH_NAME_FIELDS,
+    "record_version",
+    "record_modified",
+    "doctor_assigned_id",
+}
+
+IMPORT_FIELDS = {
+    field.name: field
+    for field in Patient._meta.concrete_fields
+    if field.editable and not field.primary_key and field.name != "doctor_assigned"
+}
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def read_rows(stream, import_format):
+    """Yields (line number, row dict) from a CSV or NDJSON text stream."""
+    if import_format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            row = {"_raw": line.rstrip("\n"), "_error": str(e)}
+        yield line_number, row
+
+
+def get_doctor_map(using=None):
+    """Returns {collegiate number: staff id} of every doctor."""
+    return dict(
+        Staff.doctors.using(using)
+        .exclude(collegiate_number__isnull=True)
+        .exclude(collegiate_number="")
+        .values_list("collegiate_number", "pk")
+    )
+
+
+def build_patient(row, doctors):
+    """
+    Returns an unsaved, validated Patient from a row, or raises
+    ValidationError.
+    """
+    if not isinstance(row, dict):
+        raise ValidationError("Not an object")
+    if "_error" in row:
+        raise ValidationError(row["_error"])
+
+    unknown = set(row) - set(IMPORT_FIELDS) - IGNORED_COLUMNS - {"doctor_assigned"}
+    if unknown:
+        # csv.DictReader keeps the fields beyond the header under None
+        names = sorted(str(column) for column in unknown if column is not None)
+        if None in unknown:
+            names.append("(unnamed)")
+        raise ValidationError(f"Unknown columns: {', '.join(names)}")
+
+    values = {}
+    for name, field in IMPORT_FIELDS.items():
+        value = row.get(name)
+        if isinstance(value, str):
+            value = value.strip()
+        if value in (None, "") and field.null:
+            value = None
+        elif value is None:
+            value = ""
+        values[name] = value
+
+    collegiate_number = str(row.get("doctor_assigned") or "").strip()
+    if collegiate_number:
+        if collegiate_number not in doctors:
+            raise ValidationError(
+                {"doctor_assigned": f"Unknown collegiate number {collegiate_number}"}
+            )
+        values["doctor_assigned_id"] = doctors[collegiate_number]
+
+    patient = Patient(**values)
+    try:
+        patient.full_clean(
+            exclude=["doctor_assigned"],
+            validate_unique=False,
+            validate_constraints=False,
+        )
+        patient.set_search_names()
+    except (TypeError, ValueError) as e:
+        # values of the wrong type (e.g. a number as date in NDJSON)
+        raise ValidationError(str(e)) from e
+
+    return patient
+
+
+def import_patients(
+    rows,
+    reject,
+    using=None,
+    batch_size=DEFAULT_BATCH_SIZE,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+):
+    """
+    Imports (line number, row) pairs, calling reject(line number, row,
+    errors) for every invalid row. Each chunk of chunk_size valid rows is
+    written in its own transaction, in INSERTs of batch_size rows.
+
+    Returns (imported, rejected).
+    """
+    doctors = get_doctor_map(using)
+    imported = rejected = 0
+    chunk = []
+
+    def flush():
+        with transaction.atomic(using=using):
+            Patient.objects.using(using).bulk_create(chunk, batch_size=batch_size)
+        chunk.clear()
+
+    for line_number, row in rows:
+        try:
+            chunk.append(build_patient(row, doctors))
+        except ValidationError as e:
+            reject(line_number, row, e.messages)
+            rejected += 1
+            continue
+
+        imported += 1
+        if len(chunk) == chunk_size:
+            flush()
+
+    if chunk:
+        flush()
+
+    return imported, rejected
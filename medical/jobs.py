@@ -0,0 +1,306 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Job queue in the database, with no outside broker.
+
+Slow work (previews, file deletions, report batches) is run out of the
+request with ``defer()``. With ``MEDICAL_JOB_QUEUE``, it is queued as a
+``Job`` row in the transaction of the request (the job exists if and only
+if the request committed) and run by ``run_workers`` processes; otherwise
+it runs after commit in a local pool of threads of the web process.
+
+Workers claim jobs with ``SELECT ... FOR UPDATE SKIP LOCKED`` where the
+database has it (PostgreSQL), so they never wait for each other. Elsewhere
+(SQLite, which serializes writes anyway) a conditional UPDATE lets a single
+worker claim each job. A failed job is retried after an exponential delay,
+up to ``max_attempts``; the jobs of a worker that died are queued again
+after ``MEDICAL_JOB_TIMEOUT`` seconds.
+
+Only functions registered with ``@task`` are run, with JSON arguments.
+"""
+
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext, suppress
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    DatabaseError,
+    close_old_connections,
+    connections,
+    models,
+    transaction,
+)
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE = "default"
+
+# seconds before the first retry, doubled after each failure
+RETRY_DELAY = 60
+MAX_RETRY_DELAY = 24 * 60 * 60
+
+# seconds between the searches of stale jobs
+REQUEUE_INTERVAL = 60
+
+TASKS = {}
+
+_executors = {}
+
+
+def task_name(func):
+    return f"{func.__module__}.{func.__name__}"
+
+
+def task(func):
+    """Registers a function that jobs can run."""
+    TASKS[task_name(func)] = func
+    return func
+
+
+def get_task(name):
+    if name not in TASKS:
+        # registered when its module is imported
+        with suppress(ImportError):
+            import_module(name.rpartition(".")[0])
+
+    return TASKS.get(name)
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY))
+
+
+def enqueue(func, *args, queue=DEFAULT_QUEUE, run_at=None, using=None):
+    """Queues a call of a task, in the current transaction."""
+    from .models import Job
+
+    name = task_name(func)
+    if name not in TASKS:
+        raise ValueError(f"{name} is not a task")
+
+    return Job.objects.using(using or DEFAULT_DB_ALIAS).create(
+        name=name,
+        args=list(args),
+        queue=queue,
+        run_at=run_at or timezone.now(),
+        max_attempts=settings.MEDICAL_JOB_MAX_ATTEMPTS,
+    )
+
+
+def defer(func, *args, workers=0, using=None):
+    """
+    Runs func(*args) out of the request: as a job with MEDICAL_JOB_QUEUE,
+    else after commit in a local pool of workers threads (0: in the
+    request).
+    """
+    if settings.MEDICAL_JOB_QUEUE:
+        enqueue(func, *args, using=using)
+        return
+
+    def submit():
+        if not workers:
+            func(*args)
+            return
+
+        name = task_name(func)
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix=func.__module__.rpartition(".")[2],
+            )
+        _executors[name].submit(_run_in_thread, func, args)
+
+    transaction.on_commit(submit, using=using)
+
+
+def _run_in_thread(func, args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception("%s%r failed", task_name(func), args)
+    finally:
+        close_old_connections()
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"[:50]
+
+
+def claim(worker, queues=(DEFAULT_QUEUE,), limit=1, using=DEFAULT_DB_ALIAS):
+    """Claims up to limit due jobs for worker. Returns them."""
+    from .models import Job
+
+    now = timezone.now()
+    jobs = Job.objects.using(using)
+    due = (
+        jobs.filter(status=Job.QUEUED, queue__in=queues, run_at__lte=now)
+        .order_by("run_at", "pk")
+        .values_list("pk", flat=True)
+    )
+    token = f"{worker}/{uuid.uuid4().hex[:12]}"
+    skip_locked = connections[using].features.has_select_for_update_skip_locked
+    # SQLite: no transaction, a read lock could not be upgraded to write
+    with transaction.atomic(using=using) if skip_locked else nullcontext():
+        if skip_locked:
+            # the rows stay locked until commit, other workers skip them
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due[:limit])
+        if not ids:
+            return []
+
+        # without row locks, the status tells the winner
+        jobs.filter(pk__in=ids, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            locked_by=token,
+            locked_at=now,
+            attempts=models.F("attempts") + 1,
+        )
+
+    return list(jobs.filter(locked_by=token, status=Job.RUNNING))
+
+
+def run_job(job, using=DEFAULT_DB_ALIAS):
+    """Runs a claimed job. Returns True when it succeeded."""
+    from .models import Job
+
+    claimed = Job.objects.using(using).filter(pk=job.pk, locked_by=job.locked_by)
+    func = get_task(job.name)
+    try:
+        if func is None:
+            raise LookupError(f"Unknown task: {job.name}")
+        func(*job.args)
+    except Exception:
+        logger.exception("Job %s (%s) failed", job.pk, job)
+        retry = func is not None and job.attempts < job.max_attempts
+        job.status = Job.QUEUED if retry else Job.FAILED
+        if retry:
+            job.run_at = timezone.now() + retry_delay(job.attempts)
+        job.last_error = traceback.format_exc()
+        claimed.update(
+            status=job.status,
+            run_at=job.run_at,
+            last_error=job.last_error,
+            locked_by="",
+            locked_at=None,
+        )
+        return False
+
+    claimed.delete()
+    return True
+
+
+def requeue_stale(using=DEFAULT_DB_ALIAS):
+    """Queues again the jobs of workers that stopped while running them."""
+    from .models import Job
+
+    stale = Job.objects.using(using).filter(
+        status=Job.RUNNING,
+        locked_at__lt=timezone.now() - timedelta(seconds=settings.MEDICAL_JOB_TIMEOUT),
+    )
+    failed = stale.filter(attempts__gte=models.F("max_attempts")).update(
+        status=Job.FAILED, locked_by="", locked_at=None
+    )
+    queued = stale.update(status=Job.QUEUED, locked_by="", locked_at=None)
+
+    return queued + failed
+
+
+def work(stop, queues=(DEFAULT_QUEUE,), poll_interval=1.0, burst=False, using=None):
+    """
+    Runs jobs until stop (a threading.Event) is set, or until no job is
+    due with burst. Returns the number of jobs run.
+    """
+    using = using or DEFAULT_DB_ALIAS
+    worker = worker_id()
+    count = 0
+    while not stop.is_set():
+        close_old_connections()
+        try:
+            jobs = claim(worker, queues, using=using)
+        except DatabaseError:
+            # the database is busy or restarting, for instance
+            logger.exception("Jobs not claimed")
+            stop.wait(poll_interval)
+            continue
+        if not jobs:
+            if burst:
+                break
+            stop.wait(poll_interval)
+            continue
+
+        for job in jobs:
+            try:
+                run_job(job, using)
+            except DatabaseError:
+                # not finished: left running until requeue_stale() queues it
+                logger.exception("Job %s (%s) not finished", job.pk, job)
+                continue
+            count += 1
+
+    return count
+
+
+def run_workers(threads=1, stop=None, using=None, **kwargs):
+    """
+    Runs work(**kwargs) in threads, queuing again the stale jobs every
+    minute. Returns the number of jobs run.
+    """
+    using = using or DEFAULT_DB_ALIAS
+    stop = stop or threading.Event()
+    counts = []
+
+    def target():
+        try:
+            counts.append(work(stop, using=using, **kwargs))
+        finally:
+            connections.close_all()
+
+    workers = [
+        threading.Thread(target=target, name=f"jobs-{number}")
+        for number in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+
+    last_requeue = 0
+    while any(worker.is_alive() for worker in workers) and not stop.is_set():
+        if time.monotonic() - last_requeue >= REQUEUE_INTERVAL:
+            try:
+                requeue_stale(using)
+            except DatabaseError:
+                # tried again later
+                logger.exception("Stale jobs not queued again")
+            last_requeue = time.monotonic()
+        stop.wait(1)
+    for worker in workers:
+        worker.join()
+
+    return sum(counts)
+
+
+def run_process(threads, **kwargs):
+    """Entry point of a spawned worker process (see run_workers)."""
+    import django
+
+    django.setup()
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *args: stop.set())
+
+    run_workers(threads, stop, **kwargs)
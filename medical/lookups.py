@@ -17,7 +17,6 @@ __author__ = "Jose Antonio Chavarría"
 __license__ = "GPLv3"
 
 from ajax_select import LookupChannel, register
-from django.db.models import Q
 from django.urls import reverse
 from django.utils.html import escape
 
@@ -37,11 +36,7 @@ class PatientLookup(LookupChannel):
         )
 
     def get_query(self, q, request):
-        return self.model.objects.filter(
-            Q(first_name__icontains=q)
-            | Q(last_name__icontains=q)
-            | Q(last_name_optional__icontains=q)
-        )
+        return self.model.objects.search_by_name(q)
 
     def get_objects(self, ids):
         return self.model.objects.filter(pk__in=ids).order_by("first_name")
@@ -60,11 +55,7 @@ class ProblemLookup(LookupChannel):
         )
 
     def get_query(self, q, request):
-        return self.model.objects.filter(
-            Q(wording__icontains=q)
-            | Q(subjetive__icontains=q)
-            | Q(objetive__icontains=q)
-        )
+        return self.model.objects.search(q, fields=("wording", "subjetive", "objetive"))
 
     def get_objects(self, ids):
         return self.model.objects.filter(pk__in=ids).order_by("wording")
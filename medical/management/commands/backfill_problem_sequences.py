@@ -0,0 +1,39 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from medical.models import Problem, ProblemSequence
+from medical.models.problem import backfill_problem_sequences
+
+
+class Command(BaseCommand):
+    help = (
+        "Renumbers duplicated problem order numbers and resets the per patient "
+        "order number counters."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help='Database to backfill. Defaults to the "default" database.',
+        )
+
+    def handle(self, *args, **options):
+        database = options["database"]
+
+        with transaction.atomic(using=database):
+            renumbered = backfill_problem_sequences(Problem, ProblemSequence, database)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{renumbered} problems renumbered, "
+                f"{ProblemSequence.objects.using(database).count()} counters reset."
+            )
+        )
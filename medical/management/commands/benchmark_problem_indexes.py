@@ -0,0 +1,139 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from medical.models import History, Patient, Problem, Staff
+from medical.views import HistoryList, PatientMedicalReport, ProblemList
+
+VIEWS = (
+    ("problem_list", ProblemList),
+    ("patient_history", HistoryList),
+    ("patient_medical_report", PatientMedicalReport),
+)
+
+PARTIAL_INDEXES = {
+    '"closing_date" IS NULL': "problem_opened_idx",
+    '"closing_date" IS NOT NULL': "problem_closed_idx",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the opened/closed problem lists and the medical report over "
+        "generated data (rolled back afterwards) and checks that their "
+        "problem queries read the partial indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--patients", type=int, default=200, help="Patients to generate."
+        )
+        parser.add_argument(
+            "--problems",
+            type=int,
+            default=50,
+            help="Problems per patient (half of them closed).",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=20, help="Requests timed per view."
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ("sqlite", "postgresql"):
+            raise CommandError(f"Query plans are not supported on {connection.vendor}")
+
+        failures = []
+        with transaction.atomic():
+            patient, user = self._seed(options["patients"], options["problems"])
+            # the report is cached: measure the queries, not the cache
+            with override_settings(MEDICAL_REPORT_CACHE_TIMEOUT=0):
+                for name, view in VIEWS:
+                    failures += self._benchmark(
+                        name, view, patient, user, options["repeat"]
+                    )
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(
+                "Problem queries not using their partial index:\n" + "\n".join(failures)
+            )
+        self.stdout.write(self.style.SUCCESS("All problem lists use partial indexes."))
+
+    def _seed(self, patients, problems):
+        created = Patient.objects.bulk_create(
+            Patient(first_name=f"Patient {i}", last_name="Benchmark")
+            for i in range(patients)
+        )
+        History.objects.bulk_create(History(patient=patient) for patient in created)
+        Problem.objects.bulk_create(
+            (
+                Problem(
+                    patient=patient,
+                    order_number=number,
+                    wording=f"Problem {number}",
+                    closing_date="2020-01-01" if number % 2 else None,
+                )
+                for patient in created
+                for number in range(1, problems + 1)
+            ),
+            batch_size=1000,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE problem")
+        user = Staff.objects.create_user(username="benchmark_problem_indexes")
+
+        return created[0], user
+
+    def _benchmark(self, name, view, patient, user, repeat):
+        request = RequestFactory().get(reverse(name, args=(patient.pk,)))
+        request.user = user
+        view = view.as_view()
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                view(request, pk=patient.pk).render()
+            timings.append(time.perf_counter() - start)
+
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(
+                f"{name}: {statistics.median(timings) * 1000:.2f} ms median, "
+                f"{len(queries)} queries"
+            )
+        )
+
+        failures = []
+        for query in queries:
+            sql = query["sql"]
+            index = next(
+                (index for clause, index in PARTIAL_INDEXES.items() if clause in sql),
+                None,
+            )
+            if not sql.startswith("SELECT") or index is None:
+                continue
+            plan = self._explain(sql)
+            self.stdout.write(f"  {sql[:100]}...\n    {plan}")
+            if index not in plan:
+                failures.append(f"{name}: {sql}")
+
+        return failures
+
+    @staticmethod
+    def _explain(sql):
+        prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql)
+            return " | ".join(str(row[-1]) for row in cursor.fetchall())
@@ -0,0 +1,132 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# a test row, roughly
+BODY = "x" * 300
+
+
+def _write(path, pragmas, begin, transactions, barrier, results):
+    """
+    Runs transactions reading then writing, like a form saved by a web
+    worker. Puts (commits, errors, start, end) in results.
+    """
+    # Python's default busy timeout, replaced by the busy_timeout pragma
+    connection = sqlite3.connect(path, timeout=5, isolation_level=None)
+    for name, value in pragmas.items():
+        connection.execute(f"PRAGMA {name} = {value}")
+    worker = os.getpid()
+
+    barrier.wait()
+    start = time.monotonic()
+    commits = errors = 0
+    for _ in range(transactions):
+        try:
+            connection.execute(begin)
+            connection.execute(
+                "SELECT COUNT(*) FROM entry WHERE worker = ?", (worker,)
+            ).fetchone()
+            connection.execute(
+                "INSERT INTO entry (worker, body) VALUES (?, ?)", (worker, BODY)
+            )
+            connection.execute("COMMIT")
+            commits += 1
+        except sqlite3.OperationalError:
+            # database is locked
+            errors += 1
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+    end = time.monotonic()
+    connection.close()
+
+    results.put((commits, errors, start, end))
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the write throughput of several processes writing at once "
+        "to a temporary SQLite database, with the default SQLite settings "
+        "and with the production profile (DATABASE_SQLITE_PRAGMAS, BEGIN "
+        "IMMEDIATE)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=4, help="Processes writing at once."
+        )
+        parser.add_argument(
+            "--transactions",
+            type=int,
+            default=500,
+            help="Transactions per process.",
+        )
+        parser.add_argument(
+            "--directory",
+            help="Directory of the database (on the disk of openclinic.db, "
+            "fsync costs depend on it). Defaults to the temporary directory.",
+        )
+
+    def handle(self, *args, **options):
+        profiles = (
+            ("default", {}, "BEGIN"),
+            ("tuned", settings.DATABASE_SQLITE_PRAGMAS, "BEGIN IMMEDIATE"),
+        )
+        for name, pragmas, begin in profiles:
+            with tempfile.TemporaryDirectory(dir=options["directory"]) as directory:
+                commits, errors, elapsed = self._run(
+                    os.path.join(directory, "benchmark.db"),
+                    pragmas,
+                    begin,
+                    options["workers"],
+                    options["transactions"],
+                )
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(
+                    f"{name}: {commits / elapsed:.0f} commits/s, "
+                    f"{errors} database is locked errors "
+                    f"({options['workers']} workers, {elapsed:.2f} s)"
+                )
+            )
+
+    @staticmethod
+    def _run(path, pragmas, begin, workers, transactions):
+        connection = sqlite3.connect(path)
+        connection.execute(
+            "CREATE TABLE entry (id INTEGER PRIMARY KEY, worker INTEGER, body TEXT)"
+        )
+        connection.execute("CREATE INDEX entry_worker ON entry (worker)")
+        connection.close()
+
+        context = multiprocessing.get_context("spawn")
+        barrier = context.Barrier(workers)
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=_write,
+                args=(path, pragmas, begin, transactions, barrier, results),
+            )
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        counts = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+        commits = sum(count[0] for count in counts)
+        errors = sum(count[1] for count in counts)
+        elapsed = max(count[3] for count in counts) - min(count[2] for count in counts)
+
+        return commits, errors, elapsed
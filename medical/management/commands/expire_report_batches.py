@@ -0,0 +1,35 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from medical.report_batches import expire_report_batches
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes the report batches finished MEDICAL_REPORT_BATCH_RETENTION "
+        "seconds ago and their PDF files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help='Database of the batches. Defaults to the "default" database.',
+        )
+
+    def handle(self, *args, **options):
+        batches, directories = expire_report_batches(options["database"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{batches} report batches expired, "
+                f"{directories} orphan spool directories deleted."
+            )
+        )
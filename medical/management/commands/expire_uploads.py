@@ -0,0 +1,34 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from medical.uploads import expire_uploads
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes the chunked uploads not touched for MEDICAL_UPLOAD_EXPIRY "
+        "seconds and their partial files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help='Database of the uploads. Defaults to the "default" database.',
+        )
+
+    def handle(self, *args, **options):
+        uploads, files = expire_uploads(options["database"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{uploads} uploads expired, {files} orphan partial files deleted."
+            )
+        )
@@ -0,0 +1,83 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from medical.exports import (
+    DEFAULT_CHUNK_SIZE,
+    EXPORT_FORMATS,
+    EXPORT_MODELS,
+    export_rows,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Exports patients, histories, problems and test metadata as CSV or "
+        "NDJSON, streaming rows with constant memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "models",
+            nargs="*",
+            metavar="model",
+            help=f"What to export ({', '.join(EXPORT_MODELS)}). Defaults to all.",
+        )
+        parser.add_argument(
+            "--format", choices=list(EXPORT_FORMATS), default="csv", dest="format"
+        )
+        parser.add_argument(
+            "--output",
+            help=(
+                "File to write (directory when exporting several models, one "
+                "<model>.<format> file each). Defaults to standard output for "
+                "a single model."
+            ),
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Rows fetched from the database (and written) at a time.",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help='Database to export. Defaults to the "default" database.',
+        )
+
+    def handle(self, *args, **options):
+        models = options["models"] or list(EXPORT_MODELS)
+        unknown = set(models) - set(EXPORT_MODELS)
+        if unknown:
+            raise CommandError(f"Unknown models: {', '.join(sorted(unknown))}")
+        output = options["output"]
+        if len(models) > 1 and not (output and os.path.isdir(output)):
+            raise CommandError("--output must be a directory to export several models")
+
+        for name in models:
+            chunks = export_rows(
+                name,
+                options["format"],
+                chunk_size=options["chunk_size"],
+                using=options["database"],
+            )
+            if output is None:
+                for chunk in chunks:
+                    self.stdout.write(chunk, ending="")
+                continue
+
+            path = output
+            if os.path.isdir(output):
+                path = os.path.join(output, f"{name}.{options['format']}")
+            with open(path, "w", encoding="utf-8", newline="") as export:
+                export.writelines(chunks)
+            self.stderr.write(f"{name} exported to {path}")
@@ -0,0 +1,126 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+import csv
+import json
+import sys
+import time
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from medical.imports import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_CHUNK_SIZE,
+    IMPORT_FORMATS,
+    import_patients,
+    read_rows,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports patients from a CSV or NDJSON file, validating every row. "
+        "Invalid rows are written to a rejects file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help='File to import ("-" for standard input).')
+        parser.add_argument(
+            "--format",
+            choices=IMPORT_FORMATS,
+            dest="format",
+            help="Input format. Defaults to the file extension.",
+        )
+        parser.add_argument(
+            "--rejects",
+            help="File receiving the invalid rows. Defaults to <path>.rejects.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Patients per INSERT.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Patients per transaction.",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help='Database to import into. Defaults to the "default" database.',
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        import_format = options["format"] or path.rpartition(".")[2].lower()
+        if import_format not in IMPORT_FORMATS:
+            raise CommandError("Unknown input format: use --format")
+        rejects_path = options["rejects"] or (
+            "rejects" if path == "-" else f"{path}.rejects"
+        )
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            source = (
+                sys.stdin
+                if path == "-"
+                else stack.enter_context(open(path, encoding="utf-8", newline=""))
+            )
+            rejects = stack.enter_context(
+                open(rejects_path, "w", encoding="utf-8", newline="")
+            )
+            imported, rejected = import_patients(
+                read_rows(source, import_format),
+                self._rejects_writer(rejects, import_format),
+                using=options["database"],
+                batch_size=options["batch_size"],
+                chunk_size=options["chunk_size"],
+            )
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{imported} patients imported, {rejected} rejected "
+                f"({(imported + rejected) / max(elapsed, 1e-9):.0f} rows/s)."
+            )
+        )
+        if rejected:
+            self.stdout.write(f"Rejected rows written to {rejects_path}")
+
+    @staticmethod
+    def _rejects_writer(rejects, import_format):
+        if import_format == "ndjson":
+
+            def reject(line_number, row, errors):
+                rejects.write(
+                    json.dumps(
+                        {"line": line_number, "errors": errors, "row": row},
+                        ensure_ascii=False,
+                        default=str,
+                    )
+                    + "\n"
+                )
+
+            return reject
+
+        writer = None
+
+        def reject(line_number, row, errors):
+            nonlocal writer
+            if writer is None:
+                writer = csv.DictWriter(
+                    rejects, ["line", "errors", *row], extrasaction="ignore"
+                )
+                writer.writeheader()
+            writer.writerow({**row, "line": line_number, "errors": "; ".join(errors)})
+
+        return reject
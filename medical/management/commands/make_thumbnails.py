@@ -0,0 +1,37 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+from django.core.management.base import BaseCommand
+
+from medical.models import Test
+from medical.thumbnails import can_preview, make_thumbnail
+
+
+class Command(BaseCommand):
+    help = (
+        "Makes the missing previews of the test documents (uploaded before "
+        "previews existed, or while a converter was missing)."
+    )
+
+    def handle(self, *args, **options):
+        documents = (
+            Test.objects.filter(has_thumbnail=False)
+            .order_by()
+            .values_list("document", "document_type")
+            .distinct()
+        )
+        made = failed = 0
+        for name, content_type in documents.iterator():
+            if not can_preview(content_type):
+                continue
+            try:
+                made += make_thumbnail(name, content_type)
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"{name}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"{made} previews made, {failed} failed."))
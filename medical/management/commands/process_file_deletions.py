@@ -0,0 +1,39 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from medical.deletions import process
+from medical.models import FileDeletion
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes the queued documents of deleted tests that are due (failed "
+        "deletions, or left by a stopped process)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help='Database of the queue. Defaults to the "default" database.',
+        )
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        deleted, failed = process(using)
+        for deletion in FileDeletion.objects.using(using).filter(attempts__gt=0):
+            self.stderr.write(
+                f"{deletion.name}: {deletion.error} ({deletion.attempts} attempts, "
+                f"next at {deletion.next_attempt:%Y-%m-%d %H:%M})"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{deleted} documents deleted, {failed} failed.")
+        )
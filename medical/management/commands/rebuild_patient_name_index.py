@@ -0,0 +1,68 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from medical.models import Patient
+from medical.search import (
+    PATIENT_NAME_FIELDS,
+    SEARCH_NAME_FIELDS,
+    rebuild_patient_name_index,
+)
+
+
+class Command(BaseCommand):
+    help = "Recomputes the normalized patient names and rebuilds their trigram index."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help='Database to rebuild. Defaults to the "default" database.',
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Number of patients updated per query.",
+        )
+
+    def handle(self, *args, **options):
+        database = options["database"]
+        batch_size = options["batch_size"]
+
+        updated = 0
+        batch = []
+        patients = Patient.objects.using(database).only(
+            "id", *SEARCH_NAME_FIELDS, *PATIENT_NAME_FIELDS
+        )
+        for patient in patients.iterator(chunk_size=batch_size):
+            stored = [getattr(patient, field) for field in SEARCH_NAME_FIELDS]
+            patient.set_search_names()
+            if stored != [getattr(patient, field) for field in SEARCH_NAME_FIELDS]:
+                batch.append(patient)
+            if len(batch) == batch_size:
+                updated += self._update(database, batch)
+                batch = []
+        updated += self._update(database, batch)
+
+        connection = connections[database]
+        rebuild_patient_name_index(connection)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{updated} patient names updated, "
+                f"name search index rebuilt ({connection.vendor})."
+            )
+        )
+
+    @staticmethod
+    def _update(database, patients):
+        with transaction.atomic(using=database):
+            Patient.objects.using(database).bulk_update(patients, SEARCH_NAME_FIELDS)
+
+        return len(patients)
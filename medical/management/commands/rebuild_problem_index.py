@@ -0,0 +1,29 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from medical.search import rebuild_problem_index
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text index of medical problems."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help='Database to rebuild. Defaults to the "default" database.',
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        rebuild_problem_index(connection)
+        self.stdout.write(
+            self.style.SUCCESS(f"Problem search index rebuilt ({connection.vendor}).")
+        )
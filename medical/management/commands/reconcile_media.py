@@ -0,0 +1,99 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from medical.models import Test
+from medical.reconcile import (
+    MEDIA_DIR,
+    delete_orphan,
+    document_names,
+    parallel_walk_files,
+    reconcile,
+    walk_files,
+)
+from medical.storage import document_storage
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the test documents on disk with the database: reports (or "
+        "deletes) the files no test uses and the tests whose file is missing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--delete",
+            action="store_true",
+            help="Deletes the orphan files.",
+        )
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=3600,
+            help=(
+                "Seconds since the last modification of an orphan file before "
+                "it is reported (files of uploads not committed yet)."
+            ),
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=0,
+            help="Threads walking the directories ahead (0: no threads).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Document names fetched from the database at a time.",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help='Database to compare with. Defaults to the "default" database.',
+        )
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        root = document_storage().location
+        if options["workers"] > 0:
+            files = parallel_walk_files(root, MEDIA_DIR, options["workers"])
+        else:
+            files = walk_files(root, MEDIA_DIR)
+        names = document_names(Test, using, chunk_size=options["chunk_size"])
+
+        newest = time.time() - options["min_age"]
+        orphans = deleted = missing = 0
+        for problem, name, entry in reconcile(files, names):
+            if problem == "missing":
+                missing += 1
+                self.stdout.write(f"missing {name}")
+                continue
+
+            try:
+                if entry.stat().st_mtime > newest:
+                    continue
+            except FileNotFoundError:
+                continue  # deleted meanwhile
+
+            orphans += 1
+            if options["delete"] and delete_orphan(name, using):
+                deleted += 1
+                self.stdout.write(f"deleted {name}")
+            else:
+                self.stdout.write(f"orphan {name}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{orphans} orphan files ({deleted} deleted), "
+                f"{missing} documents missing."
+            )
+        )
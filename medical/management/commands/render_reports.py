@@ -0,0 +1,105 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+import re
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import translation
+
+from medical.models import Patient, ReportBatch
+from medical.report_batches import batch_dir, run_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Renders the PDF medical reports of several patients to the spool "
+        "directory, in a pool of processes."
+    )
+
+    CHUNK_SIZE = 500
+
+    def add_arguments(self, parser):
+        parser.add_argument("patients", nargs="*", type=int, help="Patient ids.")
+        parser.add_argument(
+            "--file",
+            help='File with the patient ids, one per line ("-" for standard input).',
+        )
+        parser.add_argument(
+            "--batch",
+            help="Id of a batch to resume (failed reports are tried again).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Rendering processes. Defaults to MEDICAL_REPORT_WORKERS.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch"]:
+            try:
+                batch = ReportBatch.objects.get(pk=options["batch"])
+            except (ReportBatch.DoesNotExist, ValueError):
+                raise CommandError(f"Unknown batch: {options['batch']}")
+        else:
+            patients = self.read_patients(options["patients"], options["file"])
+            batch = ReportBatch.objects.create(
+                patients=patients,
+                total=len(patients),
+                language=translation.get_language(),
+            )
+
+        start = time.perf_counter()
+        run_batch(batch, options["workers"])
+        for patient_id, error in batch.errors.items():
+            self.stderr.write(f"{patient_id}: {error}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Batch {batch.pk}: {batch.done} reports in {batch_dir(batch)}, "
+                f"{batch.failed} failed ({time.perf_counter() - start:.1f} s)."
+            )
+        )
+
+    def read_patients(self, patients, path):
+        """
+        Returns the known patient ids of the arguments and the file, without
+        duplicates. Unlike ReportBatchForm, the number of patients is not
+        limited by MEDICAL_REPORT_BATCH_MAX_SIZE.
+        """
+        patients = list(patients)
+        if path:
+            with open(0 if path == "-" else path, encoding="utf-8") as ids:
+                try:
+                    patients.extend(
+                        int(patient_id)
+                        for line in ids
+                        for patient_id in re.split(r"[\s,;]+", line)
+                        if patient_id
+                    )
+                except ValueError as e:
+                    raise CommandError(f"Invalid patient identifier in {path}: {e}")
+        patients = list(dict.fromkeys(patients))
+        if not patients:
+            raise CommandError("No patients.")
+
+        known = set()
+        # within the query parameter limit of the database
+        for start in range(0, len(patients), self.CHUNK_SIZE):
+            known.update(
+                Patient.objects.filter(
+                    pk__in=patients[start : start + self.CHUNK_SIZE]
+                ).values_list("pk", flat=True)
+            )
+        unknown = [patient_id for patient_id in patients if patient_id not in known]
+        if unknown:
+            raise CommandError(
+                f"Unknown patients: {', '.join(map(str, unknown[:20]))}"
+                + (f" and {len(unknown) - 20} more" if len(unknown) > 20 else "")
+            )
+
+        return patients
@@ -0,0 +1,94 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+import multiprocessing
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from medical.jobs import DEFAULT_QUEUE, run_process, run_workers
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the queued jobs (previews, file deletions, report batches) in "
+        "a pool of threads or processes, until it is stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threads", type=int, default=1, help="Worker threads per process."
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Worker processes (for CPU bound jobs).",
+        )
+        parser.add_argument(
+            "--queue",
+            action="append",
+            dest="queues",
+            help=f'Queue to run (repeatable). Defaults to "{DEFAULT_QUEUE}".',
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds between searches when no job is due.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exits when no job is due.",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help='Database of the queue. Defaults to the "default" database.',
+        )
+
+    def handle(self, *args, **options):
+        kwargs = {
+            "queues": tuple(options["queues"] or (DEFAULT_QUEUE,)),
+            "poll_interval": options["poll_interval"],
+            "burst": options["burst"],
+            "using": options["database"],
+        }
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stop.set())
+
+        if options["processes"] <= 1:
+            count = run_workers(options["threads"], stop, **kwargs)
+            self.stdout.write(self.style.SUCCESS(f"{count} jobs run."))
+            return
+
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(
+                target=run_process,
+                args=(options["threads"],),
+                kwargs=kwargs,
+                name=f"jobs-{number}",
+            )
+            for number in range(options["processes"])
+        ]
+        for process in processes:
+            process.start()
+        while any(process.is_alive() for process in processes):
+            if stop.wait(1):
+                # each process finishes its running jobs
+                for process in processes:
+                    process.terminate()
+                break
+        for process in processes:
+            process.join()
+
+        self.stdout.write(self.style.SUCCESS("Workers stopped."))
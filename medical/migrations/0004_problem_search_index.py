@@ -0,0 +1,27 @@
+from django.db import migrations
+
+from medical.search import (
+    install_problem_index,
+    rebuild_problem_index,
+    uninstall_problem_index,
+)
+
+
+def install(apps, schema_editor):
+    install_problem_index(schema_editor.connection)
+    rebuild_problem_index(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    uninstall_problem_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("medical", "0003_alter_patient_options_alter_patient_doctor_assigned_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
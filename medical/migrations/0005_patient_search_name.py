@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:47
+
+from django.db import migrations, models
+
+from medical.search import (
+    PATIENT_NAME_FIELDS,
+    install_patient_name_index,
+    normalize_name,
+    rebuild_patient_name_index,
+    uninstall_patient_name_index,
+)
+
+
+def fill_search_name(apps, schema_editor):
+    patients = apps.get_model("medical", "Patient").objects.db_manager(
+        schema_editor.connection.alias
+    )
+    batch = []
+    for patient in patients.only(
+        "id", *PATIENT_NAME_FIELDS
+    ).iterator(chunk_size=2000):
+        patient.search_name = normalize_name(
+            " ".join(getattr(patient, field) or "" for field in PATIENT_NAME_FIELDS)
+        )
+        batch.append(patient)
+        if len(batch) == 2000:
+            patients.bulk_update(batch, ["search_name"])
+            batch = []
+
+    patients.bulk_update(batch, ["search_name"])
+
+
+def install(apps, schema_editor):
+    install_patient_name_index(schema_editor.connection)
+    rebuild_patient_name_index(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    uninstall_patient_name_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("medical", "0004_problem_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="patient",
+            name="search_name",
+            field=models.CharField(default="", editable=False, max_length=100),
+        ),
+        migrations.RunPython(fill_search_name, migrations.RunPython.noop),
+        migrations.RunPython(install, uninstall),
+    ]
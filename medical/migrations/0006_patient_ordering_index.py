@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("medical", "0005_patient_search_name"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(
+                fields=["last_name", "last_name_optional", "first_name", "id"],
+                name="patient_ordering_idx",
+            ),
+        ),
+    ]
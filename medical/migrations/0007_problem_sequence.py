@@ -0,0 +1,88 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill(apps, schema_editor):
+    """
+    Renumbers problems sharing an order number with an older problem of
+    the same patient and sets every counter to its patient's highest order
+    number (a copy of medical.models.problem.backfill_problem_sequences as
+    it was when this migration was written).
+    """
+    using = schema_editor.connection.alias
+    problems = apps.get_model("medical", "Problem").objects.using(using)
+    sequence_model = apps.get_model("medical", "ProblemSequence")
+    last_numbers = dict(
+        problems.values_list("patient_id")
+        .annotate(models.Max("order_number"))
+        .order_by()
+    )
+
+    duplicated = (
+        problems.values("patient_id", "order_number")
+        .annotate(count=models.Count("id"))
+        .filter(count__gt=1)
+        .order_by()
+    )
+    renumbered = []
+    for group in duplicated.iterator():
+        for problem in problems.filter(
+            patient_id=group["patient_id"], order_number=group["order_number"]
+        ).order_by("created", "id")[1:]:
+            last_numbers[problem.patient_id] += 1
+            problem.order_number = last_numbers[problem.patient_id]
+            renumbered.append(problem)
+    problems.bulk_update(renumbered, ["order_number"], batch_size=1000)
+
+    sequence_model.objects.using(using).bulk_create(
+        [
+            sequence_model(patient_id=patient_id, last_number=last_number)
+            for patient_id, last_number in last_numbers.items()
+        ],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["patient"],
+        update_fields=["last_number"],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("medical", "0006_patient_ordering_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProblemSequence",
+            fields=[
+                (
+                    "patient",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to="medical.patient",
+                    ),
+                ),
+                ("last_number", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "db_table": "problem_sequence",
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name="problem",
+            name="problem_patient_da215c_idx",
+        ),
+        migrations.AddConstraint(
+            model_name="problem",
+            constraint=models.UniqueConstraint(
+                fields=("patient", "order_number"),
+                name="problem_patient_order_number_uniq",
+            ),
+        ),
+    ]
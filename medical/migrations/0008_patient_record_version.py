@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 15:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def fill_record_modified(apps, schema_editor):
+    apps.get_model("medical", "Patient").objects.using(
+        schema_editor.connection.alias
+    ).update(record_modified=models.F("modified"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("medical", "0007_problem_sequence"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="patient",
+            name="record_modified",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False
+            ),
+        ),
+        migrations.AddField(
+            model_name="patient",
+            name="record_version",
+            field=models.PositiveBigIntegerField(default=1, editable=False),
+        ),
+        migrations.RunPython(fill_record_modified, migrations.RunPython.noop),
+    ]
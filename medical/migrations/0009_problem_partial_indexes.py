@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 15:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("medical", "0008_patient_record_version"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="problem",
+            name="problem_closing_0d1a05_idx",
+        ),
+        migrations.AddIndex(
+            model_name="problem",
+            index=models.Index(
+                condition=models.Q(("closing_date__isnull", True)),
+                fields=["patient", "-modified", "-id"],
+                name="problem_opened_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="problem",
+            index=models.Index(
+                condition=models.Q(("closing_date__isnull", False)),
+                fields=["patient", "-modified", "-id"],
+                name="problem_closed_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 15:18
+
+from django.db import migrations, models
+
+import medical.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("medical", "0009_problem_partial_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentBlob",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=100, primary_key=True, serialize=False),
+                ),
+                ("references", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "db_table": "document_blob",
+            },
+        ),
+        migrations.AddField(
+            model_name="test",
+            name="document_name",
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name="test",
+            name="document",
+            field=models.FileField(
+                storage=medical.storage.document_storage,
+                upload_to="medical_tests/%Y/%m/%d",
+                verbose_name="document",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 15:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("medical", "0011_test_upload"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="test",
+            name="has_thumbnail",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 15:33
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("medical", "0012_test_thumbnail"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FileDeletion",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                (
+                    "next_attempt",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+                ("error", models.TextField(blank=True)),
+            ],
+            options={
+                "db_table": "file_deletion",
+            },
+        ),
+    ]
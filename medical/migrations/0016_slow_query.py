@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:04
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("medical", "0015_job"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlowQuery",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fingerprint", models.CharField(max_length=40, unique=True)),
+                ("sql", models.TextField(verbose_name="SQL")),
+                ("view", models.CharField(blank=True, max_length=200)),
+                ("calls", models.PositiveIntegerField(default=0)),
+                ("total_time", models.FloatField(default=0)),
+                ("max_time", models.FloatField(default=0)),
+                ("plan", models.TextField(blank=True)),
+                ("first_seen", models.DateTimeField(auto_now_add=True)),
+                ("last_seen", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "verbose_name_plural": "slow queries",
+                "db_table": "slow_query",
+            },
+        ),
+    ]
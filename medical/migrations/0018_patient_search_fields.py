@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:42
+
+import unicodedata
+
+from django.db import migrations, models
+
+NAME_FIELDS = ("first_name", "last_name", "last_name_optional")
+
+
+def normalize_name(text):
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+
+    return " ".join(stripped.casefold().split())
+
+
+def fill_search_fields(apps, schema_editor):
+    patients = apps.get_model("medical", "Patient").objects.db_manager(
+        schema_editor.connection.alias
+    )
+    search_fields = [f"search_{field}" for field in NAME_FIELDS]
+    batch = []
+    for patient in patients.only("id", *NAME_FIELDS).iterator(chunk_size=2000):
+        for field in NAME_FIELDS:
+            setattr(patient, f"search_{field}", normalize_name(getattr(patient, field)))
+        batch.append(patient)
+        if len(batch) == 2000:
+            patients.bulk_update(batch, search_fields)
+            batch = []
+
+    patients.bulk_update(batch, search_fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("medical", "0017_report_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="patient",
+            name="search_first_name",
+            field=models.CharField(default="", editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name="patient",
+            name="search_last_name",
+            field=models.CharField(default="", editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name="patient",
+            name="search_last_name_optional",
+            field=models.CharField(default="", editable=False, max_length=100),
+        ),
+        migrations.RunPython(fill_search_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("medical", "0018_patient_search_fields"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="problemsequence",
+            name="last_number",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
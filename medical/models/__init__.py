@@ -3,8 +3,12 @@
 # import order is important!!!
 
 from .time_stamped import TimeStampedModel
+from .patient_record import PatientRecordMixin
 from .history import History
 from .patient import Patient
-from .problem import Problem
+from .problem import Problem, ProblemSequence
 from .staff import Staff
-from .test import Test
+from .test import DocumentBlob, FileDeletion, Test, TestUpload
+from .report import ReportBatch, ReportVersion
+from .job import Job
+from .slow_query import SlowQuery
@@ -19,8 +19,10 @@ __license__ = "GPLv3"
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from . import PatientRecordMixin
 
-class History(models.Model):
+
+class History(PatientRecordMixin, models.Model):
     patient = models.OneToOneField("Patient", on_delete=models.CASCADE)
 
     birth_growth = models.TextField(
@@ -0,0 +1,61 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+__author__ = "Jose Antonio Chavarría"
+__license__ = "GPLv3"
+
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class Job(models.Model):
+    """Call of a registered task, run by run_workers (see medical.jobs)."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (QUEUED, _("Queued")),
+        (RUNNING, _("Running")),
+        (FAILED, _("Failed")),
+    )
+
+    name = models.CharField(max_length=200, verbose_name=_("task"))
+    args = models.JSONField(default=list, blank=True)
+    queue = models.CharField(max_length=50, default="default")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    # claim of the worker running the job
+    locked_by = models.CharField(max_length=64, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        app_label = "medical"
+        db_table = "job"
+        indexes = [
+            models.Index(
+                fields=["queue", "run_at"],
+                condition=models.Q(status="queued"),
+                name="job_queued_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name}{tuple(self.args)}"
@@ -19,11 +19,35 @@ __license__ = "GPLv3"
 from datetime import datetime
 
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models.signals import m2m_changed
+from django.dispatch.dispatcher import receiver
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from ..search import (
+    PATIENT_NAME_FIELDS,
+    PATIENT_SEARCH_FIELDS,
+    SEARCH_NAME_FIELDS,
+    normalize_name,
+    search_patients,
+)
 from . import TimeStampedModel
 
+RECORD_FIELDS = ("record_version", "record_modified")
+
+
+class PatientQuerySet(models.QuerySet):
+    def search_by_name(self, text, field=None):
+        return search_patients(self, text, field)
+
+    def touch_records(self):
+        """Moves the record version of the patients forward (one UPDATE)."""
+        return self.update(
+            record_version=models.F("record_version") + 1,
+            record_modified=timezone.now(),
+        )
+
 
 class Patient(TimeStampedModel):
     GENDER_CHOICES = (
@@ -107,6 +131,22 @@ class Patient(TimeStampedModel):
 
     relatives = models.ManyToManyField("self", blank=True)
 
+    # normalized full name, backed by a trigram index (see medical.search)
+    search_name = models.CharField(max_length=100, default="", editable=False)
+    # normalized names, for searches in one of them
+    search_first_name = models.CharField(max_length=100, default="", editable=False)
+    search_last_name = models.CharField(max_length=100, default="", editable=False)
+    search_last_name_optional = models.CharField(
+        max_length=100, default="", editable=False
+    )
+
+    # moved forward whenever anything in the patient's medical record
+    # (patient, history, problems, tests, relatives) changes
+    record_version = models.PositiveBigIntegerField(default=1, editable=False)
+    record_modified = models.DateTimeField(default=timezone.now, editable=False)
+
+    objects = PatientQuerySet.as_manager()
+
     class Meta:
         app_label = "medical"
         db_table = "patient"
@@ -115,6 +155,11 @@ class Patient(TimeStampedModel):
         verbose_name_plural = _("Patients")
         indexes = [
             models.Index(fields=["last_name", "first_name"]),
+            # keyset pagination of the patient list (see KeysetPaginationMixin)
+            models.Index(
+                fields=["last_name", "last_name_optional", "first_name", "id"],
+                name="patient_ordering_idx",
+            ),
             models.Index(fields=["birth_date"]),
             models.Index(fields=["tin"]),
         ]
@@ -134,6 +179,48 @@ class Patient(TimeStampedModel):
         ):
             raise ValidationError(_("Can not die before birth"))
 
+    def save(self, *args, **kwargs):
+        self.set_search_names()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and set(PATIENT_NAME_FIELDS) & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, *SEARCH_NAME_FIELDS}
+
+        adding = self._state.adding
+        if not adding and update_fields is None:
+            # a stale in-memory version must not overwrite a newer one
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in RECORD_FIELDS
+            ]
+        using = kwargs.get("using") or router.db_for_write(Patient, instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            if not adding:
+                self.touch_record(using)
+
+    def touch_record(self, using=None):
+        """
+        Moves the record version forward. The in-memory values are
+        reloaded from the database on next access.
+        """
+        Patient.objects.using(using or self._state.db).filter(
+            pk=self.pk
+        ).touch_records()
+        for field in RECORD_FIELDS:
+            self.__dict__.pop(field, None)
+
+    def get_search_name(self):
+        return normalize_name(
+            " ".join(getattr(self, field) or "" for field in PATIENT_NAME_FIELDS)
+        )
+
+    def set_search_names(self):
+        """Computes search_name and the normalized copy of every name."""
+        self.search_name = self.get_search_name()
+        for field, search_field in PATIENT_SEARCH_FIELDS.items():
+            setattr(self, search_field, normalize_name(getattr(self, field)))
+
     def age(self):
         age = 0
         if self.birth_date:
@@ -148,3 +235,14 @@ class Patient(TimeStampedModel):
             return dict(self.GENDER_CHOICES)[self.gender]
 
         return None
+
+
+@receiver(m2m_changed, sender=Patient.relatives.through)
+def patient_relatives_changed(sender, instance, action, pk_set, using, **kwargs):
+    if action == "pre_clear":
+        pk_set = set(instance.relatives.values_list("pk", flat=True))
+    elif action not in ("post_add", "post_remove"):
+        return
+
+    # relatives are symmetrical: both sides change
+    Patient.objects.using(using).filter(pk__in={instance.pk, *pk_set}).touch_records()
@@ -0,0 +1,53 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+from django.apps import apps
+from django.db import router, transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete
+from django.dispatch.dispatcher import receiver
+
+
+class PatientRecordMixin:
+    """
+    Model belonging to a patient's medical record: saving or deleting it
+    moves Patient.record_version forward in the same transaction.
+
+    record_patient is (lookup, attname): the Patient filter reaching the
+    patient from the value of the instance attribute.
+    """
+
+    record_patient = ("pk", "patient_id")
+
+    def get_record_patients(self, using=None):
+        lookup, attname = self.record_patient
+        patient_model = apps.get_model("medical", "Patient")
+        return patient_model.objects.using(using).filter(
+            **{lookup: getattr(self, attname)}
+        )
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            self.get_record_patients(using).touch_records()
+
+
+@receiver(post_delete)
+def patient_record_delete(sender, instance, using, origin=None, **kwargs):
+    if not isinstance(instance, PatientRecordMixin):
+        return
+
+    patient_model = apps.get_model("medical", "Patient")
+    if isinstance(origin, patient_model) or (
+        isinstance(origin, QuerySet) and origin.model is patient_model
+    ):
+        # the whole record is going away
+        return
+
+    # sent inside the deletion transaction
+    instance.get_record_patients(using).touch_records()
@@ -16,23 +16,37 @@
 __author__ = "Jose Antonio Chavarría"
 __license__ = "GPLv3"
 
-from django.db import models
+from django.db import IntegrityError, models, router, transaction
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed
+from django.dispatch.dispatcher import receiver
 from django.utils.translation import gettext_lazy as _
 
-from . import TimeStampedModel
+from ..search import PROBLEM_SEARCH_FIELDS, search_problems
+from . import PatientRecordMixin, TimeStampedModel
+from .patient import Patient
 
 
-class OpenedManager(models.Manager):
+class ProblemQuerySet(models.QuerySet):
+    def search(self, text, fields=PROBLEM_SEARCH_FIELDS):
+        return search_problems(self, text, fields)
+
+
+class ProblemManager(models.Manager.from_queryset(ProblemQuerySet)):
+    pass
+
+
+class OpenedManager(ProblemManager):
     def get_queryset(self):
         return super().get_queryset().filter(closing_date__isnull=True)
 
 
-class ClosedManager(models.Manager):
+class ClosedManager(ProblemManager):
     def get_queryset(self):
         return super().get_queryset().filter(closing_date__isnull=False)
 
 
-class Problem(TimeStampedModel):
+class Problem(PatientRecordMixin, TimeStampedModel):
     order_number = models.PositiveSmallIntegerField(verbose_name=_("order number"))
     closing_date = models.DateField(
         blank=True, null=True, editable=False, verbose_name=_("closing date")
@@ -66,7 +80,7 @@ class Problem(TimeStampedModel):
 
     connections = models.ManyToManyField("self", blank=True)
 
-    objects = models.Manager()
+    objects = ProblemManager()
     opened = OpenedManager()
     closed = ClosedManager()
 
@@ -77,19 +91,158 @@ class Problem(TimeStampedModel):
         verbose_name = _("Medical Problem")
         verbose_name_plural = _("Medical Problems")
         indexes = [
-            models.Index(fields=["patient", "order_number"]),
-            models.Index(fields=["closing_date", "modified"]),
+            # a patient's opened / closed problems, newest first (the
+            # Problem.opened and Problem.closed lists and the medical report)
+            models.Index(
+                fields=["patient", "-modified", "-id"],
+                condition=models.Q(closing_date__isnull=True),
+                name="problem_opened_idx",
+            ),
+            models.Index(
+                fields=["patient", "-modified", "-id"],
+                condition=models.Q(closing_date__isnull=False),
+                name="problem_closed_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["patient", "order_number"],
+                name="problem_patient_order_number_uniq",
+            ),
         ]
 
     def __str__(self):
         return f"{self.order_number}: {self.wording}"
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+
+        # the number is allocated in the same transaction as the insert, so
+        # a failed insert does not leave a gap
+        using = kwargs.get("using") or router.db_for_write(Problem, instance=self)
+        with transaction.atomic(using=using):
+            self.order_number = ProblemSequence.allocate(
+                self.patient_id, self.order_number, using=using
+            )
+            return super().save(*args, **kwargs)
+
     @staticmethod
     def get_last_order_number(patient_id):
-        last_order_number = Problem.objects.filter(
-            patient_id__exact=patient_id
-        ).aggregate(models.Max("order_number"))["order_number__max"]
-        if not last_order_number:
-            last_order_number = 0
+        return (
+            ProblemSequence.objects.filter(patient_id=patient_id)
+            .values_list("last_number", flat=True)
+            .first()
+            or 0
+        )
+
+
+class ProblemSequence(models.Model):
+    """Last order number given to the problems of a patient."""
+
+    patient = models.OneToOneField(
+        "Patient", primary_key=True, on_delete=models.CASCADE
+    )
+    # same type as Problem.order_number
+    last_number = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        app_label = "medical"
+        db_table = "problem_sequence"
+
+    def __str__(self):
+        return f"{self.patient_id}: {self.last_number}"
+
+    @classmethod
+    def allocate(cls, patient_id, number=None, using=None):
+        """
+        Returns the next order number for the patient's problems, or number
+        when given (moving the counter past it).
+
+        The counter row is changed with a single UPDATE, which holds its
+        lock until the transaction ends: concurrent allocations for the same
+        patient wait for each other instead of reading the same MAX().
+        """
+        sequences = cls.objects.db_manager(using).filter(patient_id=patient_id)
+        last_number = (
+            Greatest(models.F("last_number"), number)
+            if number
+            else models.F("last_number") + 1
+        )
+        with transaction.atomic(using=using):
+            if not sequences.update(last_number=last_number):
+                try:
+                    with transaction.atomic(using=using):
+                        cls._create(patient_id, number, using)
+                except IntegrityError:
+                    # created by a concurrent allocation
+                    sequences.update(last_number=last_number)
+
+            return number or sequences.values_list("last_number", flat=True).get()
+
+    @classmethod
+    def _create(cls, patient_id, number, using):
+        if not number:
+            # the patient has no counter yet (created before it existed)
+            number = (
+                Problem.objects.using(using)
+                .filter(patient_id=patient_id)
+                .aggregate(models.Max("order_number"))["order_number__max"]
+                or 0
+            ) + 1
+        cls.objects.using(using).create(patient_id=patient_id, last_number=number)
+
+
+@receiver(m2m_changed, sender=Problem.connections.through)
+def problem_connections_changed(sender, instance, action, pk_set, using, **kwargs):
+    if action == "pre_clear":
+        pk_set = set(instance.connections.values_list("pk", flat=True))
+    elif action not in ("post_add", "post_remove"):
+        return
+
+    Patient.objects.using(using).filter(
+        problem__in={instance.pk, *pk_set}
+    ).touch_records()
+
+
+def backfill_problem_sequences(problem_model, sequence_model, using):
+    """
+    Renumbers problems sharing an order number with an older problem of
+    the same patient and resets every counter to its patient's highest
+    order number. Returns the number of renumbered problems.
+    """
+    problems = problem_model.objects.using(using)
+    last_numbers = dict(
+        problems.values_list("patient_id")
+        .annotate(models.Max("order_number"))
+        .order_by()
+    )
+
+    duplicated = (
+        problems.values("patient_id", "order_number")
+        .annotate(count=models.Count("id"))
+        .filter(count__gt=1)
+        .order_by()
+    )
+    renumbered = []
+    for group in duplicated.iterator():
+        for problem in problems.filter(
+            patient_id=group["patient_id"], order_number=group["order_number"]
+        ).order_by("created", "id")[1:]:
+            last_numbers[problem.patient_id] += 1
+            problem.order_number = last_numbers[problem.patient_id]
+            renumbered.append(problem)
+    problems.bulk_update(renumbered, ["order_number"], batch_size=1000)
+
+    sequence_model.objects.using(using).bulk_create(
+        [
+            sequence_model(patient_id=patient_id, last_number=last_number)
+            for patient_id, last_number in last_numbers.items()
+        ],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["patient"],
+        update_fields=["last_number"],
+    )
 
-        return last_order_number
+    return len(renumbered)
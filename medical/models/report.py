@@ -0,0 +1,118 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+__author__ = "Jose Antonio Chavarría"
+__license__ = "GPLv3"
+
+import uuid
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Coalesce
+from django.utils.translation import gettext_lazy as _
+
+from . import TimeStampedModel
+
+
+class ReportBatch(TimeStampedModel):
+    """
+    Medical reports of several patients rendered to PDF in the background
+    (see medical.report_batches).
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    FINISHED = "finished"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # none for batches run from the command line
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL
+    )
+    patients = models.JSONField(verbose_name=_("patients"))
+    language = models.CharField(max_length=10)
+    total = models.PositiveIntegerField(default=0)
+    done = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    # patient id: error message
+    errors = models.JSONField(default=dict, blank=True)
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        app_label = "medical"
+        db_table = "report_batch"
+
+    def __str__(self):
+        return f"{self.pk} ({self.done + self.failed}/{self.total})"
+
+    @property
+    def status(self):
+        if self.finished:
+            return self.FINISHED
+        if self.started:
+            return self.RUNNING
+
+        return self.PENDING
+
+
+class ReportVersion(models.Model):
+    """
+    Version of data shown in every patient page and report (staff names),
+    kept in the database so all the worker processes see its changes.
+    """
+
+    STAFF = "staff"
+
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        app_label = "medical"
+        db_table = "report_version"
+
+    def __str__(self):
+        return f"{self.name}: {self.version}"
+
+    @classmethod
+    def current(cls, name):
+        """Returns the version as an expression, to read it in other queries."""
+        return Coalesce(
+            models.Subquery(cls.objects.filter(name=name).values("version")[:1]),
+            0,
+            output_field=models.PositiveBigIntegerField(),
+        )
+
+    @classmethod
+    def get(cls, name, using=None):
+        return (
+            cls.objects.using(using)
+            .filter(name=name)
+            .values_list("version", flat=True)
+            .first()
+        ) or 0
+
+    @classmethod
+    def move(cls, name, using=None):
+        """Moves the version forward (see ProblemSequence.allocate)."""
+        versions = cls.objects.db_manager(using).filter(name=name)
+        with transaction.atomic(using=using):
+            if not versions.update(version=models.F("version") + 1):
+                try:
+                    with transaction.atomic(using=using):
+                        cls.objects.using(using).create(name=name, version=1)
+                except IntegrityError:
+                    # created by a concurrent move
+                    versions.update(version=models.F("version") + 1)
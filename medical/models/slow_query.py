@@ -0,0 +1,54 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+__author__ = "Jose Antonio Chavarría"
+__license__ = "GPLv3"
+
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class SlowQuery(models.Model):
+    """
+    Queries slower than SLOW_QUERY_THRESHOLD_MS with the same normalized SQL
+    (see medical.slow_queries).
+    """
+
+    # sha1 of sql
+    fingerprint = models.CharField(max_length=40, unique=True)
+    sql = models.TextField(verbose_name=_("SQL"))
+    # of the last call
+    view = models.CharField(max_length=200, blank=True)
+    calls = models.PositiveIntegerField(default=0)
+    # seconds
+    total_time = models.FloatField(default=0)
+    max_time = models.FloatField(default=0)
+    # EXPLAIN output of a sampled call
+    plan = models.TextField(blank=True)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        app_label = "medical"
+        db_table = "slow_query"
+        verbose_name_plural = _("slow queries")
+
+    def __str__(self):
+        return self.sql[:100]
+
+    @property
+    def mean_time(self):
+        return self.total_time / self.calls if self.calls else 0
@@ -17,25 +17,39 @@ __author__ = "Jose Antonio Chavarría"
 __license__ = "GPLv3"
 
 import os
+import uuid
 
-from django.db import models
-from django.db.models.signals import pre_delete
+from django.conf import settings
+from django.db import IntegrityError, models, router, transaction
+from django.db.models.signals import post_delete, pre_delete
 from django.dispatch.dispatcher import receiver
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from . import TimeStampedModel
+from .. import deletions
+from ..sniff import sniff_file
+from ..storage import document_storage
+from ..thumbnails import delete_thumbnail, schedule_thumbnail
+from . import PatientRecordMixin, TimeStampedModel
 
 
-class Test(TimeStampedModel):
+class Test(PatientRecordMixin, TimeStampedModel):
     document_type = models.CharField(
         max_length=128, null=True, blank=True, verbose_name=_("MIME type")
     )
     document = models.FileField(
-        upload_to="medical_tests/%Y/%m/%d", verbose_name=_("document")
+        upload_to="medical_tests/%Y/%m/%d",
+        storage=document_storage,
+        verbose_name=_("document"),
     )
+    # the stored name is the content digest
+    document_name = models.CharField(max_length=255, blank=True, editable=False)
+    has_thumbnail = models.BooleanField(default=False, editable=False)
 
     problem = models.ForeignKey("Problem", on_delete=models.CASCADE)
 
+    record_patient = ("problem", "problem_id")
+
     class Meta:
         app_label = "medical"
         indexes = [
@@ -45,10 +59,145 @@ class Test(TimeStampedModel):
     def __str__(self):
         return str(self.document)
 
+    def save(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(Test, instance=self)
+        new_document = bool(self.document) and not self.document._committed
+        previous = None
+        if new_document:
+            self.document_name = os.path.basename(self.document.name)
+            self.document_type = sniff_file(
+                self.document, self.document_name, self.document_type
+            )
+            if not self._state.adding:
+                # the document of an existing test is replaced
+                previous = (
+                    Test._base_manager.using(using)
+                    .filter(pk=self.pk)
+                    .values_list("document", flat=True)
+                    .first()
+                )
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            if previous and previous != self.document.name:
+                deletions.release([previous], using)
+        if new_document:
+            schedule_thumbnail(self.document.name, self.document_type)
+
     def filename(self):
-        return os.path.basename(self.document.name)
+        return self.document_name or os.path.basename(self.document.name)
+
+
+class TestUpload(TimeStampedModel):
+    """
+    Document uploaded in chunks (see medical.uploads). The Test is created
+    once offset reaches size.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    problem = models.ForeignKey("Problem", on_delete=models.CASCADE)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255, verbose_name=_("document"))
+    document_type = models.CharField(
+        max_length=128, null=True, blank=True, verbose_name=_("MIME type")
+    )
+    size = models.PositiveBigIntegerField(verbose_name=_("size"))
+    # bytes received and written to the staging file
+    offset = models.PositiveBigIntegerField(default=0)
+    test = models.OneToOneField(
+        Test, null=True, blank=True, editable=False, on_delete=models.SET_NULL
+    )
+
+    class Meta:
+        app_label = "medical"
+        db_table = "test_upload"
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+
+class DocumentBlob(models.Model):
+    """References from tests to a document stored by its content digest."""
+
+    name = models.CharField(max_length=100, primary_key=True)
+    references = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        app_label = "medical"
+        db_table = "document_blob"
+
+    def __str__(self):
+        return f"{self.name}: {self.references}"
+
+    @classmethod
+    def acquire(cls, name, using=None):
+        """
+        Adds a reference to the blob. Its row stays locked until the
+        transaction ends.
+        """
+        using = using or router.db_for_write(cls)
+        blobs = cls.objects.db_manager(using).filter(name=name)
+        references = models.F("references") + 1
+        with transaction.atomic(using=using):
+            if not blobs.update(references=references):
+                try:
+                    with transaction.atomic(using=using):
+                        cls.objects.using(using).create(name=name, references=1)
+                except IntegrityError:
+                    # created by a concurrent upload
+                    blobs.update(references=references)
+
+    @classmethod
+    def purge(cls, name, using=None):
+        """Deletes the blob and its file when nothing references it."""
+        using = using or router.db_for_write(cls)
+        with transaction.atomic(using=using):
+            blob = (
+                cls.objects.using(using)
+                .select_for_update()
+                .filter(name=name, references=0)
+                .first()
+            )
+            if blob is None:
+                return False
+
+            blob.delete(using=using)
+            document_storage().delete(name)
+            delete_thumbnail(name)
+
+        return True
+
+
+class FileDeletion(models.Model):
+    """Document queued for deletion after its tests (see medical.deletions)."""
+
+    name = models.CharField(max_length=100)
+    created = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt = models.DateTimeField(default=timezone.now, db_index=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        app_label = "medical"
+        db_table = "file_deletion"
+
+    def __str__(self):
+        return self.name
 
 
 @receiver(pre_delete, sender=Test)
-def test_delete(sender, instance, **kwargs):
-    instance.document.delete(False)
+def test_delete(sender, instance, using, origin=None, **kwargs):
+    if instance.document:
+        deletions.collect(instance.document.name, using, origin)
+
+
+@receiver(post_delete, sender=Test)
+def test_deleted(sender, instance, using, origin=None, **kwargs):
+    deletions.flush(using, origin)
+
+
+@receiver(post_delete, sender=TestUpload)
+def test_upload_deleted(sender, instance, using, **kwargs):
+    from ..uploads import discard_staging, staging_path
+
+    path = staging_path(instance)
+    transaction.on_commit(lambda: discard_staging(path), using=using)
@@ -0,0 +1,236 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Reconciliation of the test documents on disk with the database.
+
+The files under ``MEDIA_ROOT/medical_tests`` and the ``Test.document``
+names are both read in the same (code point) order and merged like two
+sorted lists: memory does not depend on the number of files or rows, only
+on the size of the largest directory.
+
+Directories are listed with ``os.scandir`` and sorted with a "/" appended
+to their names, which makes the depth-first walk yield paths in the order
+of the full path strings. Previews (``<name>.thumb.jpg``) sort with their
+document.
+"""
+
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import IntegrityError, connections, transaction
+from django.db.models.functions import Collate
+
+from .storage import document_storage, is_blob
+from .thumbnails import THUMBNAIL_SUFFIX
+
+MEDIA_DIR = "medical_tests"
+
+# collations comparing code points (UTF-8 bytes), as Python does
+BINARY_COLLATIONS = {
+    "postgresql": "C",
+    "sqlite": "BINARY",
+    "mysql": "utf8mb4_bin",
+}
+
+# directory depth of the subtrees walked in parallel (blobs/ab, 2017/01)
+PARTITION_DEPTH = 2
+
+_DONE = object()
+
+
+def _document_key(name):
+    """Returns (document name, is a preview) of a file name."""
+    if name.endswith(THUMBNAIL_SUFFIX):
+        return name[: -len(THUMBNAIL_SUFFIX)], True
+
+    return name, False
+
+
+def _sorted_entries(path):
+    """Returns the entries of a directory in walk order."""
+    with os.scandir(path) as entries:
+        return sorted(
+            entries,
+            key=lambda entry: (
+                (
+                    f"{entry.name}/"
+                    if entry.is_dir(follow_symlinks=False)
+                    else _document_key(entry.name)[0]
+                ),
+                entry.name.endswith(THUMBNAIL_SUFFIX),
+            ),
+        )
+
+
+def walk_files(root, relative, max_depth=None):
+    """
+    Yields the (relative path, DirEntry) of the files under root/relative,
+    sorted. Directories deeper than max_depth are yielded as
+    (relative path, None) instead of being walked.
+    """
+    try:
+        entries = _sorted_entries(os.path.join(root, relative))
+    except FileNotFoundError:
+        return  # removed while walking, or no document yet
+
+    for entry in entries:
+        path = f"{relative}/{entry.name}" if relative else entry.name
+        if entry.is_dir(follow_symlinks=False):
+            if max_depth is not None and max_depth <= 1:
+                yield path, None
+            else:
+                yield from walk_files(
+                    root, path, None if max_depth is None else max_depth - 1
+                )
+        elif entry.is_file(follow_symlinks=False):
+            yield path, entry
+
+
+class _Prefetch:
+    """Walks a subtree in a worker thread, through a bounded queue."""
+
+    def __init__(self, executor, root, relative, maxsize, cancelled):
+        self.queue = queue.Queue(maxsize)
+        self.cancelled = cancelled
+        self.future = executor.submit(self._fill, root, relative)
+
+    def _put(self, item):
+        while not self.cancelled.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _fill(self, root, relative):
+        try:
+            for item in walk_files(root, relative):
+                if self.cancelled.is_set():
+                    return
+                self._put(item)
+        finally:
+            self._put(_DONE)
+
+    def __iter__(self):
+        while (item := self.queue.get()) is not _DONE:
+            yield item
+        self.future.result()  # raises the errors of the walk
+
+
+def parallel_walk_files(root, relative, workers, maxsize=10000):
+    """
+    walk_files(root, relative) with the subtrees at PARTITION_DEPTH walked
+    ahead by workers threads (at most workers * maxsize paths in memory).
+    """
+    cancelled = threading.Event()
+    with ThreadPoolExecutor(workers, thread_name_prefix="reconcile") as executor:
+        try:
+            items = walk_files(root, relative, max_depth=PARTITION_DEPTH)
+            pending = deque()
+            while True:
+                # keep the next partitions being walked
+                while len(pending) < workers:
+                    item = next(items, None)
+                    if item is None:
+                        break
+                    path, entry = item
+                    pending.append(
+                        _Prefetch(executor, root, path, maxsize, cancelled)
+                        if entry is None
+                        else item
+                    )
+                if not pending:
+                    break
+
+                head = pending.popleft()
+                if isinstance(head, _Prefetch):
+                    yield from head
+                else:
+                    yield head
+        finally:
+            cancelled.set()
+
+
+def document_names(model, using, prefix=MEDIA_DIR, chunk_size=2000):
+    """
+    Yields the distinct document names of model under prefix, in code point
+    order.
+    """
+    collation = BINARY_COLLATIONS.get(connections[using].vendor)
+    key = Collate("document", collation) if collation else "document"
+    return (
+        model._base_manager.using(using)
+        .filter(document__startswith=f"{prefix}/")
+        .annotate(key=key)
+        .order_by("key")
+        .values_list("document", flat=True)
+        .distinct()
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def reconcile(files, names):
+    """
+    Merges the sorted (relative path, DirEntry) of the files with the sorted
+    document names, yielding ("orphan", path, entry) for files without
+    test and ("missing", name, None) for documents without file.
+    """
+    names = iter(names)
+    current = next(names, None)
+    found = False
+    for path, entry in files:
+        document, _ = _document_key(path)
+        while current is not None and current < document:
+            if not found:
+                yield "missing", current, None
+            current, found = next(names, None), False
+
+        if current == document:
+            found = found or not path.endswith(THUMBNAIL_SUFFIX)
+        else:
+            yield "orphan", path, entry
+
+    while current is not None:
+        if not found:
+            yield "missing", current, None
+        current, found = next(names, None), False
+
+
+def delete_orphan(name, using):
+    """
+    Deletes an orphan file. Blobs (and their previews) are purged under the
+    lock of their DocumentBlob row, checking again that no test uses them:
+    an upload of the same content may have referenced the blob meanwhile.
+    """
+    from .models import DocumentBlob, Test
+
+    document, _ = _document_key(name)
+    if not is_blob(document):
+        document_storage().delete(name)
+        return True
+
+    with transaction.atomic(using=using):
+        try:
+            with transaction.atomic(using=using):
+                DocumentBlob.objects.using(using).create(name=document)
+        except IntegrityError:
+            pass
+        blob = DocumentBlob.objects.using(using).select_for_update().get(name=document)
+        if Test._base_manager.using(using).filter(document=document).exists():
+            return False
+
+        if blob.references:
+            blob.references = 0
+            blob.save(using=using, update_fields=["references"])
+        DocumentBlob.purge(document, using)
+        # a preview left by an unfinished upload
+        document_storage().delete(name)
+
+    return True
@@ -0,0 +1,217 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Medical reports of many patients, rendered to PDF in the background.
+
+A ``ReportBatch`` lists the patients. ``run_batch()`` renders their reports
+in a pool of ``MEDICAL_REPORT_WORKERS`` processes (PDF layout is CPU bound)
+to ``<MEDICAL_REPORT_SPOOL_DIR>/<batch id>/<patient id>.pdf``, counting the
+progress in the batch row. Each report is read with the same constant
+number of queries as the report page (see medical.reports), or is a cache
+hit.
+
+Batches requested from the web are run out of the request (see
+medical.jobs): by the job workers, or after commit by a thread of the web
+process (0 workers: in the request); ``render_reports`` runs them in the
+foreground. A stopped batch is resumed by running it again: the reports
+already in the spool are kept, the failed ones are tried again.
+
+The spool is outside MEDIA_ROOT, the reports are only sent by the staff
+download view, and ``expire_report_batches`` deletes the batches finished
+MEDICAL_REPORT_BATCH_RETENTION seconds ago with their reports.
+"""
+
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from datetime import timedelta
+from itertools import repeat
+
+import django
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, models
+from django.utils import timezone, translation
+
+from . import jobs
+from .models import History, Patient, ReportBatch
+from .reports import render_report_pdf
+
+logger = logging.getLogger(__name__)
+
+
+def spool_dir():
+    directory = os.path.abspath(
+        settings.MEDICAL_REPORT_SPOOL_DIR
+        or os.path.join(settings.BASE_DIR, "spool", "reports")
+    )
+    media_root = os.path.abspath(settings.MEDIA_ROOT)
+    if os.path.commonpath([directory, media_root]) == media_root:
+        # the web server could publish the reports
+        raise ImproperlyConfigured(
+            "MEDICAL_REPORT_SPOOL_DIR must be outside MEDIA_ROOT."
+        )
+
+    return directory
+
+
+def batch_dir(batch):
+    return os.path.join(spool_dir(), str(batch.pk))
+
+
+def report_path(batch, patient_id):
+    return os.path.join(batch_dir(batch), f"{patient_id}.pdf")
+
+
+def render_to_spool(patient_id, directory, language):
+    """
+    Renders the report of a patient to directory. Returns (patient id,
+    error message or None).
+    """
+    try:
+        with translation.override(language):
+            _, pdf = render_report_pdf(patient_id)
+    except (Patient.DoesNotExist, History.DoesNotExist):
+        return patient_id, "No medical report"
+    except Exception as e:
+        logger.exception("Report of patient %s failed", patient_id)
+        return patient_id, f"{type(e).__name__}: {e}"
+
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as temp_file:
+            temp_file.write(pdf)
+        os.replace(temp_path, os.path.join(directory, f"{patient_id}.pdf"))
+    finally:
+        with suppress(FileNotFoundError):
+            os.unlink(temp_path)
+
+    return patient_id, None
+
+
+def run_batch(batch, workers=None):
+    """Renders the reports of a batch that are not in the spool yet."""
+    workers = settings.MEDICAL_REPORT_WORKERS if workers is None else workers
+    directory = batch_dir(batch)
+    os.makedirs(directory, exist_ok=True)
+    pending = [
+        patient_id
+        for patient_id in batch.patients
+        if not os.path.exists(report_path(batch, patient_id))
+    ]
+    batch.started = timezone.now()
+    batch.finished = None
+    batch.done = len(batch.patients) - len(pending)
+    batch.failed = 0
+    batch.errors = {}
+    batch.save(update_fields=["started", "finished", "done", "failed", "errors"])
+
+    arguments = (pending, repeat(directory), repeat(batch.language))
+    if workers:
+        with ProcessPoolExecutor(
+            workers,
+            # a forked child would share the database connections
+            mp_context=multiprocessing.get_context("spawn"),
+            # before the tasks import this module
+            initializer=django.setup,
+        ) as pool:
+            _record(batch, pool.map(render_to_spool, *arguments, chunksize=4))
+    else:
+        _record(batch, map(render_to_spool, *arguments))
+
+    batch.finished = timezone.now()
+    batch.save(update_fields=["finished"])
+
+    return batch
+
+
+def _record(batch, results):
+    batches = ReportBatch.objects.filter(pk=batch.pk)
+    for patient_id, error in results:
+        if error is None:
+            batch.done += 1
+            batches.update(done=models.F("done") + 1)
+        else:
+            batch.failed += 1
+            batch.errors[str(patient_id)] = error
+            batches.update(failed=models.F("failed") + 1, errors=batch.errors)
+
+
+def schedule_batch(batch):
+    """Runs a batch out of the request."""
+    # one batch at a time, each using MEDICAL_REPORT_WORKERS processes
+    jobs.defer(
+        run_report_batch,
+        str(batch.pk),
+        workers=min(settings.MEDICAL_REPORT_WORKERS, 1),
+    )
+
+
+@jobs.task
+def run_report_batch(batch_id):
+    run_batch(ReportBatch.objects.get(pk=batch_id))
+
+
+def batch_members(batch):
+    """Returns the ZIP archive members (see medical.archives) of a batch."""
+    for patient_id in batch.patients:
+        path = report_path(batch, patient_id)
+        if os.path.exists(path):
+            yield (
+                f"{patient_id}.pdf",
+                path,
+                timezone.localtime(batch.created).timetuple()[:6],
+                False,
+            )
+
+
+def expire_report_batches(using=DEFAULT_DB_ALIAS):
+    """
+    Deletes the batches finished (or abandoned) more than
+    MEDICAL_REPORT_BATCH_RETENTION seconds ago, their reports and the spool
+    directories left without batch. Returns the number of (batches,
+    directories) deleted.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.MEDICAL_REPORT_BATCH_RETENTION)
+    expired = ReportBatch.objects.using(using).filter(
+        models.Q(finished__lt=cutoff) | models.Q(finished=None, modified__lt=cutoff)
+    )
+    batches = 0
+    for batch in expired.only("pk"):
+        directory = batch_dir(batch)
+        # the row first: a download never finds a batch without its reports
+        batch.delete()
+        shutil.rmtree(directory, ignore_errors=True)
+        batches += 1
+
+    directories = 0
+    with suppress(FileNotFoundError), os.scandir(spool_dir()) as entries:
+        stale = {}
+        for entry in entries:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            if entry.stat().st_mtime >= cutoff.timestamp():
+                continue
+            with suppress(ValueError):
+                stale[uuid.UUID(entry.name)] = entry.path
+
+        existing = set(
+            ReportBatch.objects.using(using)
+            .filter(pk__in=stale)
+            .values_list("pk", flat=True)
+        )
+        for pk, path in stale.items():
+            if pk not in existing:
+                shutil.rmtree(path, ignore_errors=True)
+                directories += 1
+
+    return batches, directories
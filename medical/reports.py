@@ -0,0 +1,182 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Printable patient medical report.
+
+The report body is rendered once and cached under the patient's
+``record_version``, which moves forward whenever the patient or anything
+shown in the report (history, problems, tests, relatives, connections)
+changes, so an unchanged chart costs one indexed lookup and a cache hit.
+Changes made with ``QuerySet.update()`` or raw SQL bypass it: call
+``Patient.objects.filter(...).touch_records()`` after them.
+
+The same body is rendered to PDF, server side, by WeasyPrint
+(``pip install openclinic[pdf]``).
+"""
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Prefetch, prefetch_related_objects
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.template.loader import render_to_string
+from django.utils import timezone, translation
+
+from openclinic.metrics import count_cache
+
+from .models import Patient, Problem, ReportVersion, Staff, Test
+
+REPORT_TEMPLATE = "includes/patient_medical_report.html"
+PDF_TEMPLATE = "patient_medical_report_pdf.html"
+PDF_STYLESHEET = "css/print.css"
+
+_REPORT_KEY = "medical:report:{}:{}:{}:{}:{}:{}"
+
+_STAFF_NAME_FIELDS = {"first_name", "last_name", "last_name_optional"}
+
+
+def _cache():
+    return caches[getattr(settings, "MEDICAL_REPORT_CACHE", "default")]
+
+
+def _timeout():
+    return getattr(settings, "MEDICAL_REPORT_CACHE_TIMEOUT", 60 * 60 * 24)
+
+
+def get_report_patient(patient_id):
+    """
+    Returns the patient with everything the report shows, in six queries
+    whatever the size of the chart. Raises Patient.DoesNotExist or
+    History.DoesNotExist.
+
+    Opened and closed problems are loaded apart so each list is read, in
+    order, from its partial index (problem_opened_idx, problem_closed_idx).
+    """
+    patient = (
+        Patient.objects.select_related("doctor_assigned", "history")
+        .prefetch_related(
+            Prefetch("relatives", queryset=Patient.objects.only("id")),
+            Prefetch(
+                "problem_set",
+                queryset=Problem.opened.select_related("doctor").order_by("-modified"),
+                to_attr="opened_problems",
+            ),
+            Prefetch(
+                "problem_set",
+                queryset=Problem.closed.select_related("doctor").order_by("-modified"),
+                to_attr="closed_problems",
+            ),
+        )
+        .get(pk=patient_id)
+    )
+    patient.history  # noqa: B018 (raises History.DoesNotExist)
+    prefetch_related_objects(
+        [*patient.opened_problems, *patient.closed_problems],
+        Prefetch("test_set", queryset=Test.objects.only("id", "problem_id")),
+        Prefetch("connections", queryset=Problem.objects.only("id")),
+    )
+
+    return patient
+
+
+def get_report_context(patient):
+    return {
+        "patient": patient,
+        "history": patient.history,
+        "problem_list": patient.opened_problems,
+        "closed_problem_list": patient.closed_problems,
+    }
+
+
+def report_version(patient_id):
+    """
+    Returns the cache versions of the report of a patient: the staff names
+    version and the patient's record version and time (one query; the time
+    tells apart patients reusing the id of a deleted one).
+    """
+    record = (
+        Patient.objects.filter(pk=patient_id)
+        .values_list(
+            ReportVersion.current(ReportVersion.STAFF),
+            "record_version",
+            "record_modified",
+        )
+        .first()
+    )
+    if record is None:
+        raise Patient.DoesNotExist
+
+    return record[0], record[1], record[2].timestamp()
+
+
+def staff_version():
+    """Returns the version of the staff names shown in patient pages."""
+    return ReportVersion.get(ReportVersion.STAFF)
+
+
+def invalidate_reports():
+    """Invalidates every report (patient changes move record_version)."""
+    ReportVersion.move(ReportVersion.STAFF)
+
+
+def render_report(patient_id, request=None):
+    """
+    Returns (title, html) of the report body, rendering it only when the
+    cached copy is missing or stale.
+    """
+    cache = _cache()
+    key = _REPORT_KEY.format(
+        patient_id,
+        *report_version(patient_id),
+        translation.get_language(),
+        # the report shows the patient's age
+        timezone.localdate(),
+    )
+    report = cache.get(key)
+    count_cache("report", report is not None)
+    if report is None:
+        patient = get_report_patient(patient_id)
+        report = (
+            str(patient),
+            render_to_string(REPORT_TEMPLATE, get_report_context(patient), request),
+        )
+        cache.set(key, report, _timeout())
+
+    return report
+
+
+def html_to_pdf(html):
+    try:
+        from weasyprint import HTML  # slow to import, only needed here
+    except ImportError as e:
+        raise ImproperlyConfigured(
+            "PDF reports require WeasyPrint: pip install openclinic[pdf]"
+        ) from e
+
+    return HTML(string=html).write_pdf(stylesheets=[finders.find(PDF_STYLESHEET)])
+
+
+def render_report_pdf(patient_id):
+    """Returns (title, PDF bytes) of the report of a patient."""
+    title, report = render_report(patient_id)
+    html = render_to_string(PDF_TEMPLATE, {"report_title": title, "report": report})
+
+    return title, html_to_pdf(html)
+
+
+@receiver(post_save, sender=Staff)
+@receiver(post_delete, sender=Staff)
+def staff_changed(sender, instance, update_fields=None, raw=False, **kwargs):
+    # fixtures are loaded by early migrations, before report_version exists
+    if raw:
+        return
+
+    # staff are users: logins save last_login only
+    if update_fields is None or _STAFF_NAME_FIELDS.intersection(update_fields):
+        invalidate_reports()
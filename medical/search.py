@@ -0,0 +1,327 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Full-text search over the clinical notes of medical problems.
+
+SQLite keeps an external content FTS5 table (``problem_fts``) in sync with
+the ``problem`` table through triggers. PostgreSQL uses one GIN index per
+field over ``to_tsvector``, so the index is maintained by the database
+itself. Any other backend falls back to ``icontains`` lookups.
+
+Patient names are searched through ``Patient.search_name``, a normalized
+(lowercase, accent-folded) copy of the full name with a trigram index:
+an FTS5 ``trigram`` table on SQLite and ``pg_trgm`` on PostgreSQL. Each
+name also has its normalized copy (``search_first_name``...), to search in
+a single one.
+"""
+
+import re
+import unicodedata
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+PROBLEM_SEARCH_FIELDS = (
+    "wording",
+    "subjetive",
+    "objetive",
+    "appreciation",
+    "action_plan",
+    "prescription",
+)
+
+PROBLEM_FTS_TABLE = "problem_fts"
+
+PATIENT_NAME_FIELDS = ("first_name", "last_name", "last_name_optional")
+
+# normalized copy of each name, for searches in a single name
+PATIENT_SEARCH_FIELDS = {field: f"search_{field}" for field in PATIENT_NAME_FIELDS}
+
+# derived from the names on save
+SEARCH_NAME_FIELDS = ("search_name", *PATIENT_SEARCH_FIELDS.values())
+
+PATIENT_NAME_FTS_TABLE = "patient_name_fts"
+
+# trigram indexes can not match anything shorter
+TRIGRAM_LENGTH = 3
+
+# "simple" avoids language specific stemming: notes are written in any of
+# the languages in settings.LANGUAGES
+POSTGRES_SEARCH_CONFIG = "simple"
+
+_SQLITE_TRIGGERS = {
+    "ai": "AFTER INSERT ON {source} BEGIN {insert}; END",
+    "ad": "AFTER DELETE ON {source} BEGIN {delete}; END",
+    "au": "AFTER UPDATE OF {columns} ON {source} BEGIN {delete}; {insert}; END",
+}
+
+
+def _columns(fields, prefix=""):
+    return ", ".join(f"{prefix}{field}" for field in fields)
+
+
+def _sqlite_install(cursor, table, source, fields, options):
+    """
+    Creates an external content FTS5 table over source and the triggers
+    keeping it in sync. Returns True when something had to be created.
+    """
+    cursor.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN "
+        f"({', '.join(['%s'] * len(_SQLITE_TRIGGERS))})",
+        [f"{table}_{suffix}" for suffix in _SQLITE_TRIGGERS],
+    )
+    if cursor.fetchone()[0] == len(_SQLITE_TRIGGERS):
+        return False
+
+    columns = _columns(fields)
+    insert = (
+        f"INSERT INTO {table}(rowid, {columns}) "
+        f"VALUES (new.id, {_columns(fields, 'new.')})"
+    )
+    delete = (
+        f"INSERT INTO {table}({table}, rowid, {columns}) "
+        f"VALUES ('delete', old.id, {_columns(fields, 'old.')})"
+    )
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+        f"{columns}, content='{source}', content_rowid='id', {options})"
+    )
+    for suffix, body in _SQLITE_TRIGGERS.items():
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_{suffix} "
+            + body.format(source=source, columns=columns, insert=insert, delete=delete)
+        )
+
+    return True
+
+
+def _sqlite_uninstall(cursor, table):
+    for suffix in _SQLITE_TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {table}_{suffix}")
+    cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def _sqlite_rebuild(cursor, table):
+    cursor.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+    cursor.execute(f"INSERT INTO {table}({table}) VALUES ('optimize')")
+
+
+def _postgres_index_name(field):
+    return f"problem_{field}_fts_idx"
+
+
+def _postgres_document(field):
+    return f"to_tsvector('{POSTGRES_SEARCH_CONFIG}', coalesce({field}, ''))"
+
+
+def install_problem_index(connection):
+    """
+    Creates the full-text index structures if they are missing.
+
+    Returns True when something had to be (re)created, so the caller knows
+    the index must be rebuilt from the ``problem`` table.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            return _sqlite_install(
+                cursor,
+                PROBLEM_FTS_TABLE,
+                "problem",
+                PROBLEM_SEARCH_FIELDS,
+                "tokenize='unicode61 remove_diacritics 2', prefix='2 3'",
+            )
+
+        if connection.vendor == "postgresql":
+            for field in PROBLEM_SEARCH_FIELDS:
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {_postgres_index_name(field)} "
+                    f"ON problem USING gin ({_postgres_document(field)})"
+                )
+
+    return False
+
+
+def uninstall_problem_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            _sqlite_uninstall(cursor, PROBLEM_FTS_TABLE)
+        elif connection.vendor == "postgresql":
+            for field in PROBLEM_SEARCH_FIELDS:
+                cursor.execute(f"DROP INDEX IF EXISTS {_postgres_index_name(field)}")
+
+
+def rebuild_problem_index(connection):
+    install_problem_index(connection)
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            _sqlite_rebuild(cursor, PROBLEM_FTS_TABLE)
+        elif connection.vendor == "postgresql":
+            for field in PROBLEM_SEARCH_FIELDS:
+                cursor.execute(f"REINDEX INDEX {_postgres_index_name(field)}")
+
+
+def install_patient_name_index(connection):
+    """
+    Creates the trigram index over ``patient.search_name`` if it is missing.
+
+    Returns True when it had to be (re)created (see install_problem_index).
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            return _sqlite_install(
+                cursor,
+                PATIENT_NAME_FTS_TABLE,
+                "patient",
+                ("search_name",),
+                "tokenize='trigram'",
+            )
+
+        if connection.vendor == "postgresql":
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS patient_search_name_trgm_idx "
+                "ON patient USING gin (search_name gin_trgm_ops)"
+            )
+
+    return False
+
+
+def uninstall_patient_name_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            _sqlite_uninstall(cursor, PATIENT_NAME_FTS_TABLE)
+        elif connection.vendor == "postgresql":
+            cursor.execute("DROP INDEX IF EXISTS patient_search_name_trgm_idx")
+
+
+def rebuild_patient_name_index(connection):
+    install_patient_name_index(connection)
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            _sqlite_rebuild(cursor, PATIENT_NAME_FTS_TABLE)
+        elif connection.vendor == "postgresql":
+            cursor.execute("REINDEX INDEX patient_search_name_trgm_idx")
+
+
+def normalize_name(text):
+    """Lowercases text, strips accents and collapses whitespace."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+
+    return " ".join(stripped.casefold().split())
+
+
+def search_terms(text):
+    return re.findall(r"\w+", text or "")
+
+
+def _sqlite_match(terms, fields):
+    expression = " ".join(f'"{term}"*' for term in terms)
+    if tuple(fields) == PROBLEM_SEARCH_FIELDS:
+        return expression
+
+    return "{{{}}} : ({})".format(" ".join(fields), expression)
+
+
+def _postgres_query(terms):
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def search_problems(queryset, text, fields=PROBLEM_SEARCH_FIELDS):
+    """
+    Filters a Problem queryset by text (prefix matching every word) in fields.
+
+    Matches are annotated with ``search_rank`` (higher is better) and
+    ordered by it.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset
+
+    vendor = connections[queryset.db].vendor
+    if vendor == "sqlite":
+        match = _sqlite_match(terms, fields)
+        queryset = queryset.filter(
+            id__in=RawSQL(
+                f"SELECT rowid FROM {PROBLEM_FTS_TABLE} "
+                f"WHERE {PROBLEM_FTS_TABLE} MATCH %s",
+                [match],
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT -bm25({PROBLEM_FTS_TABLE}) FROM {PROBLEM_FTS_TABLE} "
+                f"WHERE {PROBLEM_FTS_TABLE} MATCH %s "
+                f'AND {PROBLEM_FTS_TABLE}.rowid = "problem"."id"',
+                [match],
+                output_field=FloatField(),
+            )
+        )
+    elif vendor == "postgresql":
+        query = _postgres_query(terms)
+        tsquery = f"to_tsquery('{POSTGRES_SEARCH_CONFIG}', %s)"
+        matches = " OR ".join(
+            f"{_postgres_document(field)} @@ {tsquery}" for field in fields
+        )
+        rank = " + ".join(
+            f"ts_rank({_postgres_document(field)}, {tsquery})" for field in fields
+        )
+        queryset = queryset.filter(
+            RawSQL(matches, [query] * len(fields), output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(rank, [query] * len(fields), output_field=FloatField())
+        )
+    else:
+        condition = Q()
+        for term in terms:
+            term_condition = Q()
+            for field in fields:
+                term_condition |= Q(**{f"{field}__icontains": term})
+            condition &= term_condition
+        queryset = queryset.filter(condition).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+    return queryset.order_by("-search_rank", "-modified")
+
+
+def search_patients(queryset, text, field=None):
+    """
+    Filters a Patient queryset keeping those whose full name contains every
+    word of text, ignoring case and accents.
+
+    With field (one of PATIENT_NAME_FIELDS), that name must also contain the
+    whole text (compared with its normalized copy, among the candidates
+    found by the index).
+    """
+    text = normalize_name(text)
+    terms = text.split()
+    if not terms:
+        return queryset
+
+    indexed = [term for term in terms if len(term) >= TRIGRAM_LENGTH]
+    if indexed and connections[queryset.db].vendor == "sqlite":
+        match = " ".join('"{}"'.format(term.replace('"', '""')) for term in indexed)
+        queryset = queryset.filter(
+            id__in=RawSQL(
+                f"SELECT rowid FROM {PATIENT_NAME_FTS_TABLE} "
+                f"WHERE {PATIENT_NAME_FTS_TABLE} MATCH %s",
+                [match],
+            )
+        )
+        terms = [term for term in terms if term not in indexed]
+
+    # LIKE '%term%' is served by the gin_trgm_ops index on PostgreSQL
+    for term in terms:
+        queryset = queryset.filter(search_name__contains=term)
+
+    if field is not None:
+        queryset = queryset.filter(
+            **{f"{PATIENT_SEARCH_FIELDS[field]}__contains": text}
+        )
+
+    return queryset
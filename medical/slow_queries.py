@@ -0,0 +1,101 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Slow query recorder.
+
+RequestTimingMiddleware (see openclinic.middleware) keeps the queries of a
+request slower than ``SLOW_QUERY_THRESHOLD_MS``; after the response they
+are logged and added up in ``SlowQuery`` by fingerprint: the SQL with its
+literals, parameters and IN lists replaced, so the same query with other
+values is counted once. The plan of ``SLOW_QUERY_EXPLAIN_RATE`` of the
+calls (and of the first one) is saved, from ``EXPLAIN`` (``EXPLAIN QUERY
+PLAN`` on SQLite) run with the parameters of the call. The admin site
+lists the fingerprints by total time.
+"""
+
+import hashlib
+import logging
+import random
+import re
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, models, transaction
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize(sql):
+    """Returns sql without its values."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _LIST.sub("(...)", sql)
+
+    return _SPACE.sub(" ", sql).strip()
+
+
+def fingerprint(sql):
+    return hashlib.sha1(sql.encode()).hexdigest()
+
+
+def explain(using, sql, params):
+    """Returns the plan of a SELECT query, or "" if it has none."""
+    if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+        return ""
+
+    connection = connections[using]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+            return "\n".join(
+                " ".join(str(column) for column in row) for row in cursor.fetchall()
+            )
+    except DatabaseError as e:
+        return f"{type(e).__name__}: {e}"
+
+
+def record(view, queries):
+    """Adds the (database alias, sql, params, seconds) of slow queries."""
+    for using, sql, params, duration in queries:
+        logger.warning("Slow query (%.0f ms) in %s: %s", duration * 1000, view, sql)
+        normalized = normalize(sql)
+        key = fingerprint(normalized)
+        slow_queries = SlowQuery.objects.filter(fingerprint=key)
+        sampled = random.random() < settings.SLOW_QUERY_EXPLAIN_RATE
+        changes = {
+            "view": view or "",
+            "calls": models.F("calls") + 1,
+            "total_time": models.F("total_time") + duration,
+            "max_time": Greatest("max_time", duration),
+            "last_seen": timezone.now(),
+        }
+        if not slow_queries.update(**changes):
+            try:
+                with transaction.atomic():
+                    SlowQuery.objects.create(
+                        fingerprint=key,
+                        sql=normalized,
+                        view=view or "",
+                        calls=1,
+                        total_time=duration,
+                        max_time=duration,
+                    )
+                sampled = True
+            except IntegrityError:
+                # created meanwhile by another request
+                slow_queries.update(**changes)
+        if sampled:
+            slow_queries.update(plan=explain(using, sql, params))
@@ -0,0 +1,78 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Content type detection of the test documents from their first bytes."""
+
+import mimetypes
+
+# bytes read to detect the content type (DICOM puts its signature at 128)
+HEAD_SIZE = 512
+
+# (offset, signature, content type)
+SIGNATURES = (
+    (0, b"%PDF-", "application/pdf"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (0, b"II*\x00", "image/tiff"),
+    (0, b"MM\x00*", "image/tiff"),
+    (0, b"BM", "image/bmp"),
+    (128, b"DICM", "application/dicom"),
+    (0, b"{\\rtf", "application/rtf"),
+    (0, b"\x1f\x8b", "application/gzip"),
+)
+
+# containers whose actual type is given by the extension (docx, odt, xls...)
+CONTAINERS = {
+    b"PK\x03\x04": "application/zip",
+    b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1": "application/x-ole-storage",
+}
+
+
+def sniff_content_type(head, filename="", declared=None):
+    """
+    Returns the content type of a document from its first HEAD_SIZE bytes.
+    A known signature wins over the declared type, which wins over the
+    file name extension.
+    """
+    for offset, signature, content_type in SIGNATURES:
+        if head[offset : offset + len(signature)] == signature:
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if declared:
+        return declared
+
+    guessed = mimetypes.guess_type(filename)[0]
+    for signature, content_type in CONTAINERS.items():
+        if head.startswith(signature):
+            return guessed or content_type
+    if guessed:
+        return guessed
+    if head and b"\x00" not in head:
+        try:
+            head.decode("utf-8")
+        except UnicodeDecodeError as e:
+            # a multibyte character cut at HEAD_SIZE
+            if e.start < len(head) - 3:
+                return "application/octet-stream"
+        return "text/plain"
+
+    return "application/octet-stream"
+
+
+def sniff_file(file, filename="", declared=None):
+    """Returns the content type of a file object, keeping its position."""
+    position = file.tell()
+    file.seek(0)
+    try:
+        head = file.read(HEAD_SIZE)
+    finally:
+        file.seek(position)
+
+    return sniff_content_type(head, filename or getattr(file, "name", ""), declared)
@@ -0,0 +1,141 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Content-addressed storage of the medical test documents.
+
+Uploads are stored once per content, under their SHA-256 digest
+(``medical_tests/blobs/ab/ab12...ef.pdf``): uploading the same lab report
+for several problems or relatives takes disk (and backup) space once. The
+references from ``Test`` rows are counted in ``DocumentBlob``, and a blob
+is only unlinked when its last reference is deleted.
+
+Documents stored before (``medical_tests/%Y/%m/%d/...``) keep their names
+and are served and deleted as before.
+"""
+
+import errno
+import hashlib
+import os
+import shutil
+import tempfile
+from contextlib import suppress
+
+from django.core.files.storage import FileSystemStorage, storages
+from django.db import router, transaction
+
+BLOBS_DIR = "medical_tests/blobs"
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# FileField max_length (100) - len("medical_tests/blobs/ab/") - 64
+_MAX_EXTENSION_LENGTH = 13
+
+
+def document_storage():
+    """Storage of Test.document (the "medical_documents" entry of STORAGES)."""
+    return storages["medical_documents"]
+
+
+def is_blob(name):
+    return name.startswith(f"{BLOBS_DIR}/")
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage naming files after the SHA-256 of their content.
+
+    The upload is hashed while it is copied to a temporary file, next to
+    the blobs, which is then renamed to its final name (or discarded when
+    that blob already exists): the content is read once.
+    """
+
+    def blob_name(self, digest, name):
+        extension = os.path.splitext(name)[1].lower()[:_MAX_EXTENSION_LENGTH]
+        return f"{BLOBS_DIR}/{digest[:2]}/{digest}{extension}"
+
+    def get_available_name(self, name, max_length=None):
+        # the final name depends on the content, see _save()
+        return name
+
+    def _save(self, name, content):
+        from .models import DocumentBlob
+
+        directory = self.path(BLOBS_DIR)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".upload-")
+        try:
+            digest = hashlib.sha256()
+            with os.fdopen(fd, "wb") as temp_file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+
+            name = self.blob_name(digest.hexdigest(), name)
+            # locks the blob row: a concurrent purge can not unlink it now
+            DocumentBlob.acquire(name)
+            self._place(temp_path, name)
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.unlink(temp_path)
+            raise
+
+        return name
+
+    def _place(self, source, name):
+        """Moves the local file source to the blob name, unless it exists."""
+        path = self.path(name)
+        if os.path.exists(path):
+            os.unlink(source)
+            return
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # mkstemp() creates the file readable by its owner only
+        os.chmod(source, self.file_permissions_mode or 0o644)
+        try:
+            os.replace(source, path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # on another file system: copied next to the blob, then renamed
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".upload-")
+            try:
+                with os.fdopen(fd, "wb") as temp_file, open(source, "rb") as file:
+                    shutil.copyfileobj(file, temp_file, COPY_BUFFER_SIZE)
+                os.chmod(temp_path, self.file_permissions_mode or 0o644)
+                os.replace(temp_path, path)
+            except BaseException:
+                with suppress(FileNotFoundError):
+                    os.unlink(temp_path)
+                raise
+            os.unlink(source)
+
+    def adopt(self, source, name):
+        """
+        Stores the local file source (moved, not copied, when it is on the
+        same file system) and returns its name, referenced once. Runs out of
+        any transaction: the reference is committed before the file is
+        moved, so a concurrent purge can not unlink it.
+        """
+        from .deletions import release
+        from .models import DocumentBlob
+
+        digest = hashlib.sha256()
+        with open(source, "rb") as file:
+            while chunk := file.read(COPY_BUFFER_SIZE):
+                digest.update(chunk)
+
+        name = self.blob_name(digest.hexdigest(), name)
+        DocumentBlob.acquire(name)
+        try:
+            self._place(source, name)
+        except BaseException:
+            with transaction.atomic():
+                release([name], router.db_for_write(DocumentBlob))
+            raise
+
+        return name
@@ -21,6 +21,12 @@ def enable_db_access(db):
     pass
 
 
+@pytest.fixture(autouse=True)
+def strict_query_budgets(settings):
+    """Fail the tests of views over their query budget."""
+    settings.REQUEST_QUERY_BUDGET_STRICT = True
+
+
 @pytest.fixture
 def client_logged_in(client, db):
     """Provide a logged-in client for tests."""
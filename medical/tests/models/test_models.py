@@ -2,8 +2,12 @@ from datetime import date, timedelta
 
 import pytest
 from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
 
-from medical.models import History, Patient, Problem
+from medical.models import History, Patient, Problem, ProblemSequence, Test
 
 
 @pytest.mark.django_db
@@ -88,6 +92,116 @@ class TestProblemModel:
         assert closed_problem in Problem.closed.all()
         assert closed_problem not in Problem.opened.all()
 
+    def test_problem_order_number_allocated(self, test_patient):
+        """Test that order numbers are allocated per patient on save."""
+        other = Patient.objects.create(first_name="Other", last_name="Patient")
+        first = Problem.objects.create(patient=test_patient, wording="First")
+        second = Problem.objects.create(patient=test_patient, wording="Second")
+        other_first = Problem.objects.create(patient=other, wording="First")
+        assert (first.order_number, second.order_number) == (1, 2)
+        assert other_first.order_number == 1
+        assert Problem.get_last_order_number(test_patient.pk) == 2
+
+        second.delete()
+        assert (
+            Problem.objects.create(patient=test_patient, wording="3").order_number == 3
+        )
+
+    def test_problem_explicit_order_number_moves_counter(self, test_patient):
+        """Test that an explicit order number is kept and never reallocated."""
+        Problem.objects.create(patient=test_patient, wording="Old", order_number=7)
+        problem = Problem.objects.create(patient=test_patient, wording="New")
+        assert problem.order_number == 8
+
+    def test_problem_order_number_unique_per_patient(self, test_patient):
+        """Test that two problems of a patient can not share a number."""
+        Problem.objects.create(patient=test_patient, wording="A", order_number=1)
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Problem.objects.create(patient=test_patient, wording="B", order_number=1)
+
+    def test_problem_counter_created_from_existing_problems(self, test_patient):
+        """Test that a missing counter starts after the existing problems."""
+        Problem.objects.bulk_create(
+            Problem(patient=test_patient, wording=str(i), order_number=i)
+            for i in range(1, 4)
+        )
+        assert not ProblemSequence.objects.filter(patient=test_patient).exists()
+        problem = Problem.objects.create(patient=test_patient, wording="Next")
+        assert problem.order_number == 4
+
+    def test_backfill_problem_sequences(self, test_patient):
+        """Test that the backfill command resets counters behind bulk inserts."""
+        Problem.objects.create(patient=test_patient, wording="First")
+        Problem.objects.bulk_create(
+            [Problem(patient=test_patient, wording="Bulk", order_number=5)]
+        )
+        call_command("backfill_problem_sequences")
+        assert Problem.get_last_order_number(test_patient.pk) == 5
+
+    def test_problem_counter_fits_order_number(self):
+        """Test that the counter can not give numbers the column can not hold."""
+        counter = ProblemSequence._meta.get_field("last_number")
+        order_number = Problem._meta.get_field("order_number")
+        assert counter.get_internal_type() == order_number.get_internal_type()
+
+
+@pytest.mark.django_db
+class TestPatientRecordVersion:
+    """Tests for Patient.record_version."""
+
+    def versions(self, *patients):
+        return [
+            Patient.objects.get(pk=patient.pk).record_version for patient in patients
+        ]
+
+    def test_record_changes_move_version(self, test_patient, settings, tmp_path):
+        """Test that every part of the record moves the version forward."""
+        settings.MEDIA_ROOT = tmp_path
+        history = History.objects.create(patient=test_patient)
+        history.habits = "Sport"
+        history.save()
+        problem = Problem.objects.create(patient=test_patient, wording="Problem")
+        test = Test.objects.create(
+            problem=problem, document=SimpleUploadedFile("a.txt", b"a")
+        )
+        test.delete()
+        assert self.versions(test_patient) == [6]
+
+    def test_patient_save_moves_version(self, test_patient):
+        """Test that saving the patient keeps a concurrent version bump."""
+        stale = Patient.objects.get(pk=test_patient.pk)
+        Problem.objects.create(patient=test_patient, wording="Problem")
+        stale.first_name = "Johnny"
+        stale.save()
+        assert stale.record_version == 3
+        assert stale.record_modified >= test_patient.record_modified
+
+    def test_relatives_move_both_versions(self, test_patient):
+        """Test that relatives changes move both patients."""
+        relative = Patient.objects.create(first_name="Jane", last_name="Doe")
+        test_patient.relatives.add(relative)
+        assert self.versions(test_patient, relative) == [2, 2]
+        test_patient.relatives.clear()
+        assert self.versions(test_patient, relative) == [3, 3]
+
+    def test_problem_connections_move_version(self, test_patient):
+        """Test that connecting problems of two patients moves both."""
+        other = Patient.objects.create(first_name="Jane", last_name="Doe")
+        problem = Problem.objects.create(patient=test_patient, wording="A")
+        other_problem = Problem.objects.create(patient=other, wording="B")
+        problem.connections.add(other_problem)
+        assert self.versions(test_patient, other) == [3, 3]
+
+    def test_patient_delete_does_not_touch(self, test_patient):
+        """Test that deleting a patient does not update it per problem."""
+        for i in range(3):
+            Problem.objects.create(patient=test_patient, wording=str(i))
+        with CaptureQueriesContext(connection) as queries:
+            test_patient.delete()
+        assert not [
+            query for query in queries if query["sql"].startswith('UPDATE "patient"')
+        ]
+
 
 @pytest.mark.django_db
 class TestHistoryModel:
@@ -7,10 +7,13 @@
 
 """Tests for Test model."""
 
+import hashlib
+import os
+
 import pytest
 from django.core.files.uploadedfile import SimpleUploadedFile
 
-from medical.models import Test
+from medical.models import DocumentBlob, Test
 
 
 @pytest.mark.django_db
@@ -86,3 +89,68 @@ class TestTestModel:
         # Tests should be ordered by modified (descending) via TimeStampedModel
         tests = Test.objects.filter(problem=test_problem)
         assert tests.count() == 2
+
+
+@pytest.mark.django_db
+class TestDocumentStorage:
+    """Tests for the content-addressed storage of Test documents."""
+
+    @pytest.fixture(autouse=True)
+    def media_root(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        settings.MEDICAL_DELETION_WORKERS = 0
+        return tmp_path
+
+    def upload(self, problem, name, content=b"lab report"):
+        return Test.objects.create(
+            problem=problem, document=SimpleUploadedFile(name, content)
+        )
+
+    def test_stored_by_digest(self, test_problem, media_root):
+        test = self.upload(test_problem, "Report.PDF")
+        digest = hashlib.sha256(b"lab report").hexdigest()
+        assert test.document.name == f"medical_tests/blobs/{digest[:2]}/{digest}.pdf"
+        assert test.document.read() == b"lab report"
+        assert test.filename() == "Report.PDF"
+        # no temporary file left behind
+        assert os.listdir(media_root / "medical_tests/blobs") == [digest[:2]]
+
+    def test_same_content_stored_once(self, test_problem):
+        first = self.upload(test_problem, "a.pdf")
+        second = self.upload(test_problem, "b.pdf")
+        other = self.upload(test_problem, "c.pdf", b"other report")
+        assert first.document.name == second.document.name != other.document.name
+        assert DocumentBlob.objects.get(name=first.document.name).references == 2
+
+    def test_unlinked_with_last_reference(
+        self, test_problem, django_capture_on_commit_callbacks
+    ):
+        first = self.upload(test_problem, "a.pdf")
+        second = self.upload(test_problem, "b.pdf")
+        path = first.document.path
+
+        with django_capture_on_commit_callbacks(execute=True):
+            first.delete()
+        assert os.path.exists(path)
+        assert DocumentBlob.objects.get(name=second.document.name).references == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            second.problem.delete()
+        assert not os.path.exists(path)
+        assert not DocumentBlob.objects.exists()
+
+    def test_legacy_names(
+        self, test_problem, media_root, django_capture_on_commit_callbacks
+    ):
+        legacy = media_root / "medical_tests/2017/01/01/old.pdf"
+        legacy.parent.mkdir(parents=True)
+        legacy.write_bytes(b"old")
+        test = Test.objects.create(
+            problem=test_problem, document="medical_tests/2017/01/01/old.pdf"
+        )
+        assert test.document.read() == b"old"
+        assert test.filename() == "old.pdf"
+
+        with django_capture_on_commit_callbacks(execute=True):
+            test.delete()
+        assert not legacy.exists()
@@ -0,0 +1,137 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Tests for the queued deletion of test documents."""
+
+import os
+from io import StringIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from medical import deletions
+from medical.models import DocumentBlob, FileDeletion, Problem, Test
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.MEDICAL_DELETION_WORKERS = 0
+    return tmp_path
+
+
+@pytest.fixture
+def documents(test_problem, media_root):
+    other = Problem.objects.create(
+        patient=test_problem.patient, wording="Other", order_number=2
+    )
+    tests = [
+        Test.objects.create(problem=problem, document=SimpleUploadedFile(name, content))
+        for problem, name, content in [
+            (test_problem, "a.pdf", b"%PDF-a"),
+            (test_problem, "b.pdf", b"%PDF-b"),
+            (other, "a-copy.pdf", b"%PDF-a"),
+        ]
+    ]
+    legacy = media_root / "medical_tests/2017/01/01/old.pdf"
+    legacy.parent.mkdir(parents=True)
+    legacy.write_bytes(b"old")
+    tests.append(
+        Test.objects.create(problem=other, document="medical_tests/2017/01/01/old.pdf")
+    )
+    return [test.document.path for test in tests]
+
+
+@pytest.mark.django_db
+class TestFileDeletion:
+    """Tests for medical.deletions."""
+
+    def test_patient_cascade(
+        self, test_patient, documents, django_capture_on_commit_callbacks
+    ):
+        with (
+            django_capture_on_commit_callbacks() as callbacks,
+            CaptureQueriesContext(connection) as queries,
+        ):
+            test_patient.delete()
+        # one INSERT for the whole cascade, no file deleted in the transaction
+        inserts = [query for query in queries if "INSERT INTO" in query["sql"].upper()]
+        assert len(inserts) == 1
+        assert FileDeletion.objects.count() == 3
+        assert all(os.path.exists(path) for path in documents)
+        assert set(DocumentBlob.objects.values_list("references", flat=True)) == {0}
+
+        for callback in callbacks:
+            callback()
+        assert not any(os.path.exists(path) for path in documents)
+        assert not FileDeletion.objects.exists()
+        assert not DocumentBlob.objects.exists()
+
+    def test_rolled_back(self, test_patient, documents):
+        with pytest.raises(RuntimeError), transaction.atomic():
+            test_patient.delete()
+            raise RuntimeError
+
+        assert not FileDeletion.objects.exists()
+        assert DocumentBlob.objects.get(name__endswith=".pdf", references=2)
+        assert all(os.path.exists(path) for path in documents)
+
+    def test_shared_blob_kept(
+        self, test_problem, documents, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            test_problem.delete()
+        assert os.path.exists(documents[0])
+        assert not os.path.exists(documents[1])
+        assert not FileDeletion.objects.exists()
+
+    def test_replaced_document(
+        self, test_problem, documents, django_capture_on_commit_callbacks
+    ):
+        test = Test.objects.get(document_name="b.pdf")
+        test.document = SimpleUploadedFile("c.pdf", b"%PDF-c")
+        with django_capture_on_commit_callbacks(execute=True):
+            test.save()
+        assert not os.path.exists(documents[1])
+        assert os.path.exists(test.document.path)
+        assert DocumentBlob.objects.get(name=test.document.name).references == 1
+        assert not DocumentBlob.objects.filter(name__endswith=".pdf", references=0)
+        assert not FileDeletion.objects.exists()
+
+    def test_retry(
+        self, test_patient, documents, monkeypatch, django_capture_on_commit_callbacks
+    ):
+        delete_document = deletions.delete_document
+
+        def failing(name, using):
+            raise PermissionError(13, "Permission denied")
+
+        monkeypatch.setattr(deletions, "delete_document", failing)
+        with django_capture_on_commit_callbacks(execute=True):
+            test_patient.delete()
+        deletion = FileDeletion.objects.first()
+        assert deletion.attempts == 1
+        assert deletion.next_attempt > timezone.now()
+        assert "Permission denied" in deletion.error
+        # not due yet
+        assert deletions.process() == (0, 0)
+
+        monkeypatch.setattr(deletions, "delete_document", delete_document)
+        FileDeletion.objects.update(next_attempt=timezone.now())
+        out = StringIO()
+        call_command("process_file_deletions", stdout=out)
+        assert "3 documents deleted, 0 failed." in out.getvalue()
+        assert not any(os.path.exists(path) for path in documents)
+
+    def test_retry_delay(self):
+        assert deletions.retry_delay(1).total_seconds() == 60
+        assert deletions.retry_delay(3).total_seconds() == 240
+        assert deletions.retry_delay(30).total_seconds() == 86400
@@ -0,0 +1,90 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Tests for the bulk export of medical records."""
+
+import csv
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+
+from medical.exports import export_rows
+from medical.models import Patient
+
+
+@pytest.fixture
+def patients(db):
+    return Patient.objects.bulk_create(
+        Patient(first_name=f"Patient {i}", last_name="Núñez") for i in range(5)
+    )
+
+
+@pytest.mark.django_db
+class TestExportRows:
+    """Tests for medical.exports.export_rows."""
+
+    def test_csv_chunks(self, patients):
+        chunks = list(export_rows("patients", "csv", chunk_size=2))
+        assert len(chunks) == 3
+        rows = list(csv.DictReader(StringIO("".join(chunks))))
+        assert [row["first_name"] for row in rows] == [p.first_name for p in patients]
+        assert "search_name" not in rows[0]
+
+    def test_ndjson(self, test_problem):
+        lines = "".join(export_rows("problems", "ndjson")).splitlines()
+        row = json.loads(lines[0])
+        assert row["patient_id"] == test_problem.patient_id
+        assert row["wording"] == test_problem.wording
+
+
+@pytest.mark.django_db
+class TestExportCommand:
+    """Tests for the export_patients command."""
+
+    def test_single_model_to_stdout(self, patients):
+        out = StringIO()
+        call_command("export_patients", "patients", format="ndjson", stdout=out)
+        assert len(out.getvalue().splitlines()) == len(patients)
+
+    def test_every_model_to_directory(self, patients, test_history, tmp_path):
+        call_command("export_patients", output=str(tmp_path), stderr=StringIO())
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            "histories.csv",
+            "patients.csv",
+            "problems.csv",
+            "tests.csv",
+        ]
+        assert "Núñez" in (tmp_path / "patients.csv").read_text(encoding="utf-8")
+
+    def test_several_models_need_directory(self):
+        with pytest.raises(CommandError):
+            call_command("export_patients", "patients", "problems")
+
+
+@pytest.mark.django_db
+class TestExportView:
+    """Tests for the MedicalExport view."""
+
+    def test_staff_only(self, client_logged_in):
+        url = reverse("medical_export", args=("patients", "csv"))
+        assert client_logged_in.get(url).status_code == 403
+
+    def test_streams_export(self, client, admin_user, patients):
+        client.force_login(admin_user)
+        resp = client.get(reverse("medical_export", args=("patients", "ndjson")))
+        assert resp.streaming
+        assert resp["Content-Type"].startswith("application/x-ndjson")
+        body = b"".join(resp.streaming_content).decode()
+        assert len(body.splitlines()) == len(patients)
+
+    def test_unknown_model(self, client, admin_user):
+        client.force_login(admin_user)
+        url = reverse("medical_export", args=("staff", "csv"))
+        assert client.get(url).status_code == 404
@@ -0,0 +1,134 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Tests for the bulk import of patients."""
+
+import csv
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from medical.exports import export_rows
+from medical.imports import import_patients, read_rows
+from medical.models import Patient, Staff
+
+
+@pytest.fixture
+def doctor(db):
+    return Staff.objects.create_user(
+        username="doctor", staff_type="D", collegiate_number="282812345"
+    )
+
+
+@pytest.mark.django_db
+class TestImportPatients:
+    """Tests for medical.imports.import_patients."""
+
+    def run(self, text, import_format="csv", **kwargs):
+        rejects = []
+        result = import_patients(
+            read_rows(StringIO(text), import_format),
+            lambda line, row, errors: rejects.append((line, errors)),
+            **kwargs,
+        )
+        return result, rejects
+
+    def test_csv(self, doctor):
+        (imported, rejected), _ = self.run(
+            "first_name,last_name,gender,birth_date,doctor_assigned\n"
+            "Ana,Núñez,F,1980-05-01,282812345\n"
+            "Luis,Pérez,,,\n"
+        )
+        assert (imported, rejected) == (2, 0)
+        ana = Patient.objects.get(first_name="Ana")
+        assert ana.doctor_assigned == doctor
+        assert str(ana.birth_date) == "1980-05-01"
+        assert ana.search_name == ana.get_search_name()
+        luis = Patient.objects.get(first_name="Luis")
+        assert luis.gender is None
+        assert luis.doctor_assigned is None
+
+    def test_rejects(self, doctor):
+        (imported, rejected), rejects = self.run(
+            "first_name,last_name,gender,birth_date,decease_date,doctor_assigned\n"
+            "Ana,Núñez,F,1980-05-01,1970-01-01,\n"
+            ",Pérez,,,,\n"
+            "Luis,Pérez,X,,,\n"
+            "Eva,Gil,,not a date,,\n"
+            "Juan,Gil,,,,999\n"
+            "Rosa,Gil,,,,282812345\n"
+        )
+        assert (imported, rejected) == (1, 5)
+        assert [line for line, _ in rejects] == [2, 3, 4, 5, 6]
+        assert rejects[0][1] == ["Can not die before birth"]
+        assert list(Patient.objects.values_list("first_name", flat=True)) == ["Rosa"]
+
+    def test_malformed_rows(self):
+        (imported, rejected), rejects = self.run(
+            "first_name,last_name\nAna,Núñez,extra\nLuis,Pérez\n"
+        )
+        assert (imported, rejected) == (1, 1)
+        assert rejects == [(2, ["Unknown columns: (unnamed)"])]
+
+        (imported, rejected), rejects = self.run(
+            '{"first_name": "Eva", "last_name": "Gil", "birth_date": 5}\n'
+            '{"first_name": "Rosa", "last_name": "Gil", "birth_date": "1980-05-01"}\n',
+            "ndjson",
+        )
+        assert (imported, rejected) == (1, 1)
+        assert [line for line, _ in rejects] == [1]
+        assert sorted(Patient.objects.values_list("first_name", flat=True)) == [
+            "Luis",
+            "Rosa",
+        ]
+
+    def test_ndjson_batches(self):
+        text = "\n".join(
+            json.dumps({"first_name": f"Patient {i}", "last_name": "Gil"})
+            for i in range(10)
+        )
+        text += "\nnot json\n[]\n"
+        with CaptureQueriesContext(connection) as queries:
+            (imported, rejected), _ = self.run(
+                text, "ndjson", batch_size=2, chunk_size=3
+            )
+        assert (imported, rejected) == (10, 2)
+        # chunks of 3, 3, 3 and 1 rows, inserted 2 at a time
+        inserts = [q for q in queries if q["sql"].startswith("INSERT")]
+        assert len(inserts) == 7
+        assert Patient.objects.count() == 10
+
+    def test_export_round_trip(self, test_patient):
+        text = "".join(export_rows("patients", "csv"))
+        (imported, rejected), _ = self.run(text)
+        assert (imported, rejected) == (1, 0)
+        assert Patient.objects.filter(first_name=test_patient.first_name).count() == 2
+
+
+@pytest.mark.django_db
+class TestImportCommand:
+    """Tests for the import_patients command."""
+
+    def test_writes_rejects_file(self, tmp_path):
+        path = tmp_path / "legacy.csv"
+        path.write_text(
+            "first_name,last_name,tin\nAna,Núñez,1\n,Pérez,2\n", encoding="utf-8"
+        )
+        out = StringIO()
+        call_command("import_patients", str(path), stdout=out)
+        assert "1 patients imported, 1 rejected" in out.getvalue()
+
+        with open(f"{path}.rejects", encoding="utf-8", newline="") as rejects:
+            rows = list(csv.DictReader(rejects))
+        assert len(rows) == 1
+        assert rows[0]["line"] == "3"
+        assert rows[0]["tin"] == "2"
+        assert rows[0]["errors"]
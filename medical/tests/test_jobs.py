@@ -0,0 +1,178 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Tests for the job queue in the database."""
+
+import threading
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.urls import reverse
+from django.utils import timezone
+
+from medical import jobs
+from medical.deletions import process
+from medical.models import Job
+
+CALLS = []
+
+
+@jobs.task
+def record(*args):
+    CALLS.append(args)
+
+
+@jobs.task
+def fail():
+    raise ValueError("broken")
+
+
+@pytest.fixture(autouse=True)
+def calls():
+    CALLS.clear()
+    return CALLS
+
+
+@pytest.mark.django_db
+class TestJobs:
+    """Tests for medical.jobs."""
+
+    def test_run(self, calls):
+        job = jobs.enqueue(record, 1, "a")
+        assert job.status == Job.QUEUED
+
+        [claimed] = jobs.claim("worker")
+        assert claimed.pk == job.pk
+        assert claimed.status == Job.RUNNING
+        assert claimed.attempts == 1
+        assert claimed.locked_by.startswith("worker/")
+        # claimed once
+        assert jobs.claim("other") == []
+
+        assert jobs.run_job(claimed)
+        assert calls == [(1, "a")]
+        assert not Job.objects.exists()
+
+    def test_not_a_task(self):
+        with pytest.raises(ValueError):
+            jobs.enqueue(print)
+
+    def test_due(self):
+        jobs.enqueue(record, run_at=timezone.now() + timedelta(minutes=5))
+        jobs.enqueue(record, queue="other")
+        assert jobs.claim("worker") == []
+        assert len(jobs.claim("worker", queues=("other",))) == 1
+
+    def test_retry(self, settings):
+        settings.MEDICAL_JOB_MAX_ATTEMPTS = 2
+        jobs.enqueue(fail)
+
+        [job] = jobs.claim("worker")
+        assert not jobs.run_job(job)
+        job.refresh_from_db()
+        assert job.status == Job.QUEUED
+        assert job.run_at > timezone.now() + timedelta(seconds=50)
+        assert "ValueError: broken" in job.last_error
+
+        Job.objects.update(run_at=timezone.now())
+        [job] = jobs.claim("worker")
+        assert not jobs.run_job(job)
+        job.refresh_from_db()
+        assert job.status == Job.FAILED
+        assert job.attempts == 2
+        assert job.locked_by == ""
+
+    def test_unknown_task(self):
+        Job.objects.create(name="medical.tests.test_jobs.missing")
+        [job] = jobs.claim("worker")
+        assert not jobs.run_job(job)
+        job.refresh_from_db()
+        assert job.status == Job.FAILED
+        assert "Unknown task" in job.last_error
+
+    def test_requeue_stale(self, settings):
+        jobs.enqueue(record)
+        jobs.claim("worker")
+        assert jobs.requeue_stale() == 0
+
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=2))
+        assert jobs.requeue_stale() == 1
+        job = Job.objects.get()
+        assert job.status == Job.QUEUED
+        assert job.locked_at is None
+
+    def test_work(self, calls):
+        for number in range(3):
+            jobs.enqueue(record, number)
+        jobs.enqueue(record, run_at=timezone.now() + timedelta(minutes=5))
+
+        assert jobs.work(threading.Event(), burst=True) == 3
+        assert sorted(calls) == [(0,), (1,), (2,)]
+        assert Job.objects.count() == 1
+
+    def test_work_survives_database_errors(self, calls, monkeypatch):
+        run_job = jobs.run_job
+
+        def finish_fails(job, using):
+            if job.args == [0]:
+                raise OperationalError("database is locked")
+            return run_job(job, using)
+
+        monkeypatch.setattr(jobs, "run_job", finish_fails)
+        jobs.enqueue(record, 0)
+        jobs.enqueue(record, 1)
+
+        assert jobs.work(threading.Event(), burst=True) == 1
+        assert calls == [(1,)]
+        assert Job.objects.get().status == Job.RUNNING
+
+    def test_defer(self, settings, calls, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            jobs.defer(record, 1)
+        assert calls == [(1,)]
+
+        settings.MEDICAL_JOB_QUEUE = True
+        with django_capture_on_commit_callbacks(execute=True):
+            jobs.defer(process, "default")
+        job = Job.objects.get()
+        assert job.name == "medical.deletions.process"
+        assert job.args == ["default"]
+        assert calls == [(1,)]
+
+    def test_admin_retry(self, client, admin_user):
+        jobs.enqueue(fail)
+        Job.objects.update(status=Job.FAILED, attempts=5)
+        client.force_login(admin_user)
+        resp = client.post(
+            reverse("admin:medical_job_changelist"),
+            {
+                "action": "retry",
+                "_selected_action": [job.pk for job in Job.objects.all()],
+            },
+        )
+        assert resp.status_code == 302
+        job = Job.objects.get()
+        assert (job.status, job.attempts) == (Job.QUEUED, 0)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_run_workers(calls):
+    jobs.enqueue(record, "a")
+    jobs.enqueue(record, "b")
+
+    # threads writing at once to the in-memory SQLite test database (shared
+    # cache) fail at once with "database table is locked", busy_timeout
+    # does not apply there
+    threads = "1" if connection.vendor == "sqlite" else "2"
+    out = StringIO()
+    call_command("run_workers", "--threads", threads, "--burst", stdout=out)
+    assert "2 jobs run." in out.getvalue()
+    assert sorted(calls) == [("a",), ("b",)]
+    assert not Job.objects.exists()
@@ -0,0 +1,144 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Tests for the reconciliation of the test documents with the database."""
+
+import os
+from io import StringIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+
+from medical.models import DocumentBlob, Test
+from medical.reconcile import delete_orphan, parallel_walk_files, reconcile, walk_files
+from medical.thumbnails import thumbnail_name
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.MEDICAL_THUMBNAIL_WORKERS = 0
+    return tmp_path
+
+
+def touch(root, name, content=b"x"):
+    path = root / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return path
+
+
+class TestWalkFiles:
+    """Tests for medical.reconcile.walk_files and parallel_walk_files."""
+
+    NAMES = [
+        "medical_tests/a-b.pdf",
+        "medical_tests/a.pdf",
+        "medical_tests/a.pdf.thumb.jpg",
+        "medical_tests/a/b/c.pdf",
+        "medical_tests/a/b/c.pdf-2",
+        "medical_tests/a/d.pdf",
+        "medical_tests/blobs/00/x.png",
+        "medical_tests/blobs/ff/y.png",
+        "medical_tests/blobs/ff/y.png.thumb.jpg",
+    ]
+
+    def test_sorted_like_the_names(self, media_root):
+        for name in self.NAMES:
+            touch(media_root, name)
+
+        paths = [path for path, _ in walk_files(media_root, "medical_tests")]
+        assert paths == self.NAMES
+
+    @pytest.mark.parametrize("workers", [1, 3])
+    def test_parallel(self, media_root, workers):
+        for name in self.NAMES:
+            touch(media_root, name)
+
+        walk = parallel_walk_files(media_root, "medical_tests", workers, maxsize=2)
+        assert [path for path, _ in walk] == self.NAMES
+
+    def test_reconcile(self):
+        files = [
+            ("medical_tests/a.pdf", None),
+            ("medical_tests/a.pdf.thumb.jpg", None),
+            ("medical_tests/b.pdf.thumb.jpg", None),
+            ("medical_tests/c.pdf", None),
+            ("medical_tests/e.pdf.thumb.jpg", None),
+        ]
+        names = ["medical_tests/a.pdf", "medical_tests/b.pdf", "medical_tests/d.pdf"]
+        assert [problem[:2] for problem in reconcile(files, names)] == [
+            ("missing", "medical_tests/b.pdf"),
+            ("orphan", "medical_tests/c.pdf"),
+            ("missing", "medical_tests/d.pdf"),
+            ("orphan", "medical_tests/e.pdf.thumb.jpg"),
+        ]
+
+
+@pytest.mark.django_db
+class TestReconcileMedia:
+    """Tests for the reconcile_media command."""
+
+    def run(self, *args):
+        out = StringIO()
+        call_command("reconcile_media", "--min-age=0", *args, stdout=out)
+        return out.getvalue().splitlines()
+
+    @pytest.fixture
+    def documents(self, test_problem, media_root):
+        kept = Test.objects.create(
+            problem=test_problem, document=SimpleUploadedFile("a.pdf", b"%PDF-a")
+        )
+        touch(media_root, thumbnail_name(kept.document.name))
+        lost = Test.objects.create(
+            problem=test_problem, document=SimpleUploadedFile("b.pdf", b"%PDF-b")
+        )
+        os.unlink(lost.document.path)
+        orphan = Test.objects.create(
+            problem=test_problem, document=SimpleUploadedFile("c.pdf", b"%PDF-c")
+        )
+        # deleted bypassing the signals, leaving its blob
+        Test.objects.filter(pk=orphan.pk)._raw_delete(using="default")
+        legacy = touch(media_root, "medical_tests/2015/03/old.pdf")
+        return kept, lost, orphan, legacy
+
+    def test_report(self, documents):
+        _, lost, orphan, legacy = documents
+        output = self.run()
+        assert f"missing {lost.document.name}" in output
+        assert f"orphan {orphan.document.name}" in output
+        assert "orphan medical_tests/2015/03/old.pdf" in output
+        assert output[-1] == "2 orphan files (0 deleted), 1 documents missing."
+        assert os.path.exists(legacy)
+
+        assert self.run("--workers=2") == output
+
+    def test_min_age(self, documents):
+        out = StringIO()
+        call_command("reconcile_media", stdout=out)
+        assert "0 orphan files" in out.getvalue()
+
+    def test_delete(self, documents, media_root):
+        kept, _, orphan, legacy = documents
+        self.run("--delete")
+        assert not os.path.exists(legacy)
+        assert not os.path.exists(media_root / orphan.document.name)
+        assert not DocumentBlob.objects.filter(name=orphan.document.name).exists()
+        assert os.path.exists(kept.document.path)
+        assert os.path.exists(media_root / thumbnail_name(kept.document.name))
+
+        assert self.run()[-1] == "0 orphan files (0 deleted), 1 documents missing."
+
+    def test_delete_blob_used_again(self, documents, test_problem):
+        _, _, orphan, _ = documents
+        Test.objects.create(
+            problem=test_problem, document=SimpleUploadedFile("c2.pdf", b"%PDF-c")
+        )
+        # used again after the walk: not deleted
+        assert not delete_orphan(orphan.document.name, "default")
+        assert os.path.exists(orphan.document.path)
@@ -0,0 +1,194 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Tests for the PDF medical reports and their batches."""
+
+import io
+import os
+import time
+import uuid
+import zipfile
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from medical import reports
+from medical.models import Patient, ReportBatch
+from medical.report_batches import (
+    batch_dir,
+    expire_report_batches,
+    report_path,
+    run_batch,
+    spool_dir,
+)
+
+
+def fake_pdf(html):
+    return b"%PDF-" + html.encode()
+
+
+@pytest.fixture(autouse=True)
+def report_settings(settings, tmp_path, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path / "media"
+    settings.MEDICAL_REPORT_SPOOL_DIR = tmp_path / "spool"
+    settings.MEDICAL_REPORT_WORKERS = 0
+    # WeasyPrint is an optional dependency, see test_weasyprint
+    monkeypatch.setattr(reports, "html_to_pdf", fake_pdf)
+
+
+@pytest.fixture
+def without_history(db):
+    return Patient.objects.create(first_name="Ana", last_name="Núñez")
+
+
+@pytest.mark.django_db
+class TestPatientMedicalReportPDF:
+    """Tests for the PatientMedicalReportPDF view."""
+
+    def test_pdf(self, client_logged_in, test_patient, test_history):
+        url = reverse("patient_medical_report_pdf", args=(test_patient.pk,))
+        resp = client_logged_in.get(url)
+        assert resp.status_code == 200
+        assert resp["Content-Type"] == "application/pdf"
+        assert resp.content.startswith(b"%PDF-<!DOCTYPE html>")
+        assert test_patient.first_name.encode() in resp.content
+
+    def test_no_history(self, client_logged_in, without_history):
+        url = reverse("patient_medical_report_pdf", args=(without_history.pk,))
+        assert client_logged_in.get(url).status_code == 404
+
+    def test_weasyprint(self, test_patient, test_history, monkeypatch):
+        pytest.importorskip("weasyprint")
+        monkeypatch.undo()
+        _, pdf = reports.render_report_pdf(test_patient.pk)
+        assert pdf.startswith(b"%PDF-")
+
+
+@pytest.mark.django_db
+class TestReportBatch:
+    """Tests for medical.report_batches and the report batch views."""
+
+    def test_staff_only(self, client_logged_in):
+        resp = client_logged_in.post(reverse("report_batch_add"), {"patients": "1"})
+        assert resp.status_code == 403
+
+    def test_unknown_patients(self, client, admin_user, test_patient):
+        client.force_login(admin_user)
+        resp = client.post(
+            reverse("report_batch_add"), {"patients": f"{test_patient.pk}, 999999"}
+        )
+        assert resp.status_code == 400
+        assert "999999" in resp.json()["errors"]["patients"][0]
+
+    def test_batch(
+        self,
+        client,
+        admin_user,
+        test_patient,
+        test_history,
+        without_history,
+        django_capture_on_commit_callbacks,
+    ):
+        client.force_login(admin_user)
+        with django_capture_on_commit_callbacks(execute=True):
+            resp = client.post(
+                reverse("report_batch_add"),
+                {"patients": f"{test_patient.pk}\n{without_history.pk}\n"},
+            )
+        assert resp.status_code == 202
+
+        status = client.get(resp["Location"]).json()
+        assert status["status"] == "finished"
+        assert (status["total"], status["done"], status["failed"]) == (2, 1, 1)
+        assert status["errors"] == {str(without_history.pk): "No medical report"}
+
+        resp = client.get(status["download"])
+        with zipfile.ZipFile(io.BytesIO(b"".join(resp.streaming_content))) as archive:
+            assert archive.namelist() == [f"{test_patient.pk}.pdf"]
+
+    def test_resume(self, test_patient, test_history, without_history):
+        batch = ReportBatch.objects.create(
+            patients=[test_patient.pk, without_history.pk], total=2, language="en"
+        )
+        run_batch(batch)
+        path = report_path(batch, test_patient.pk)
+        with open(path, "wb") as report:
+            report.write(b"kept")
+
+        out = StringIO()
+        err = StringIO()
+        call_command("render_reports", batch=str(batch.pk), stdout=out, stderr=err)
+        assert "1 reports in" in out.getvalue()
+        assert "No medical report" in err.getvalue()
+        with open(path, "rb") as report:
+            assert report.read() == b"kept"
+
+    def test_command(self, test_patient, test_history):
+        out = StringIO()
+        call_command("render_reports", str(test_patient.pk), stdout=out)
+        batch = ReportBatch.objects.get()
+        assert batch.finished
+        assert batch.user is None
+        with open(report_path(batch, test_patient.pk), "rb") as report:
+            assert report.read().startswith(b"%PDF-")
+
+    def test_command_without_web_limit(
+        self, settings, test_patient, test_history, without_history, tmp_path
+    ):
+        settings.MEDICAL_REPORT_BATCH_MAX_SIZE = 1
+        ids = tmp_path / "patients.txt"
+        ids.write_text(f"{test_patient.pk}\n{without_history.pk}, {test_patient.pk}\n")
+        call_command(
+            "render_reports", file=str(ids), stdout=StringIO(), stderr=StringIO()
+        )
+        assert ReportBatch.objects.get().patients == [
+            test_patient.pk,
+            without_history.pk,
+        ]
+
+    def test_command_unknown_patients(self, test_patient):
+        with pytest.raises(CommandError, match="Unknown patients: 999999"):
+            call_command("render_reports", str(test_patient.pk), "999999")
+        with pytest.raises(CommandError, match="No patients"):
+            call_command("render_reports")
+        assert not ReportBatch.objects.exists()
+
+    def test_spool_outside_media_root(self, settings):
+        assert not spool_dir().startswith(str(settings.MEDIA_ROOT))
+        settings.MEDICAL_REPORT_SPOOL_DIR = settings.MEDIA_ROOT / "reports"
+        with pytest.raises(ImproperlyConfigured):
+            spool_dir()
+
+    def test_expire(self, settings, test_patient, test_history):
+        settings.MEDICAL_REPORT_BATCH_RETENTION = 60
+        old, recent = (
+            run_batch(
+                ReportBatch.objects.create(
+                    patients=[test_patient.pk], total=1, language="en"
+                )
+            )
+            for _ in range(2)
+        )
+        ReportBatch.objects.filter(pk=old.pk).update(
+            finished=timezone.now() - timedelta(minutes=2)
+        )
+        orphan = os.path.join(spool_dir(), str(uuid.uuid4()))
+        os.makedirs(orphan)
+        os.utime(orphan, (time.time() - 120,) * 2)
+
+        out = StringIO()
+        call_command("expire_report_batches", stdout=out)
+        assert "1 report batches expired, 1 orphan" in out.getvalue()
+        assert list(ReportBatch.objects.all()) == [recent]
+        assert not os.path.exists(batch_dir(old))
+        assert not os.path.exists(orphan)
+        assert os.path.exists(report_path(recent, test_patient.pk))
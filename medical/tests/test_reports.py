@@ -0,0 +1,127 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Tests for the cached patient medical report."""
+
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from medical.models import Patient, Problem, ReportVersion, Test
+from medical.reports import get_report_patient, render_report, report_version
+
+
+@pytest.fixture
+def chart(test_patient, test_history, settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    problems = [
+        Problem.objects.create(patient=test_patient, wording=f"Problem {i}")
+        for i in range(5)
+    ]
+    for problem in problems:
+        Test.objects.create(
+            problem=problem,
+            document=SimpleUploadedFile("test.pdf", b"%PDF", "application/pdf"),
+        )
+    problems[0].connections.add(problems[1])
+    Problem.objects.filter(pk=problems[-1].pk).update(closing_date="2020-01-01")
+    return test_patient
+
+
+@pytest.mark.django_db
+class TestMedicalReport:
+    """Tests for medical.reports."""
+
+    def test_queries_do_not_grow_with_the_chart(self, chart, django_assert_num_queries):
+        with django_assert_num_queries(6):
+            patient = get_report_patient(chart.pk)
+            for problem in [*patient.opened_problems, *patient.closed_problems]:
+                problem.test_set.count()
+                problem.connections.count()
+            patient.relatives.count()
+
+    def test_report_is_rendered_once(self, chart, django_assert_num_queries):
+        render_report(chart.pk)
+        # the record version lookup
+        with django_assert_num_queries(1):
+            title, report = render_report(chart.pk)
+        assert title == str(chart)
+        assert "Problem 4" in report
+
+    def test_report_lists_open_and_closed_problems(self, client_logged_in, chart):
+        url = reverse("patient_medical_report", kwargs={"pk": chart.pk})
+        resp = client_logged_in.get(url)
+        assert resp.status_code == 200
+        assert len(resp.context["problem_list"]) == 4
+        assert len(resp.context["closed_problem_list"]) == 1
+
+    def test_problem_change_invalidates(self, chart):
+        render_report(chart.pk)
+        problem = chart.problem_set.first()
+        problem.wording = "Renamed problem"
+        problem.save()
+        assert "Renamed problem" in render_report(chart.pk)[1]
+
+    def test_history_change_invalidates(self, chart, test_history):
+        render_report(chart.pk)
+        test_history.medical_intolerance = "Aspirin"
+        test_history.save()
+        assert "Aspirin" in render_report(chart.pk)[1]
+
+    def test_test_and_relatives_change_version(self, chart):
+        version = report_version(chart.pk)
+        Test.objects.first().delete()
+        assert report_version(chart.pk) != version
+
+        version = report_version(chart.pk)
+        relative = Patient.objects.create(first_name="Jane", last_name="Doe")
+        version_relative = report_version(relative.pk)
+        chart.relatives.add(relative)
+        assert report_version(chart.pk) != version
+        assert report_version(relative.pk) != version_relative
+
+    def test_staff_rename_invalidates(self, chart, django_user_model):
+        doctor = django_user_model.objects.create_user(username="doctor")
+        version = report_version(chart.pk)
+        doctor.last_name = "Renamed"
+        doctor.save(update_fields=["last_name"])
+        assert report_version(chart.pk) != version
+        # stored in the database, shared by every worker process
+        assert ReportVersion.objects.get(name=ReportVersion.STAFF).version
+
+    def test_new_day_invalidates(self, chart, monkeypatch):
+        render_report(chart.pk)
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        monkeypatch.setattr(timezone, "localdate", lambda: tomorrow)
+        with CaptureQueriesContext(connection) as queries:
+            render_report(chart.pk)
+        # rendered again: more than the version lookup
+        assert len(queries) > 1
+
+    def test_login_does_not_invalidate(self, client, chart, django_user_model):
+        django_user_model.objects.create_user(username="doctor", password="secret")
+        version = report_version(chart.pk)
+        assert client.login(username="doctor", password="secret")
+        assert report_version(chart.pk) == version
+
+
+@pytest.mark.django_db
+def test_problem_lists_use_partial_indexes():
+    """The problem lists and the report read the opened/closed indexes."""
+    out = StringIO()
+    call_command(
+        "benchmark_problem_indexes", patients=5, problems=6, repeat=1, stdout=out
+    )
+    assert "problem_opened_idx" in out.getvalue()
+    assert "problem_closed_idx" in out.getvalue()
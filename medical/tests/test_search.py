@@ -0,0 +1,215 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Tests for the full-text search of problems and patient names."""
+
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from medical.lookups import PatientLookup
+from medical.models import Patient, Problem
+
+
+@pytest.fixture
+def problems(test_patient):
+    return [
+        Problem.objects.create(
+            patient=test_patient,
+            order_number=1,
+            wording="Chronic migraine",
+            subjetive="Headache since childhood",
+        ),
+        Problem.objects.create(
+            patient=test_patient,
+            order_number=2,
+            wording="Diabetes",
+            prescription="Metformina, revisión en tres meses",
+        ),
+        Problem.objects.create(
+            patient=test_patient,
+            order_number=3,
+            wording="Migraine with aura",
+            objetive="Migraine attacks, migraine diary",
+        ),
+    ]
+
+
+@pytest.mark.django_db
+class TestProblemSearch:
+    """Tests for Problem.objects.search."""
+
+    def test_search_matches_word_prefix(self, problems):
+        result = Problem.objects.search("migr")
+        assert {problem.pk for problem in result} == {problems[0].pk, problems[2].pk}
+
+    def test_search_requires_every_word(self, problems):
+        result = Problem.objects.search("migraine aura")
+        assert list(result) == [problems[2]]
+
+    def test_search_ignores_accents(self, problems):
+        assert list(Problem.objects.search("revision")) == [problems[1]]
+
+    def test_search_restricted_to_fields(self, problems):
+        result = Problem.objects.search("headache", fields=("wording",))
+        assert not result.exists()
+        result = Problem.objects.search("headache", fields=("subjetive",))
+        assert list(result) == [problems[0]]
+
+    def test_search_ranks_best_match_first(self, problems):
+        result = list(Problem.objects.search("migraine"))
+        assert result[0] == problems[2]
+        assert result[0].search_rank > result[1].search_rank
+
+    def test_search_without_words_returns_everything(self, problems):
+        assert Problem.objects.search(" ,; ").count() == 3
+
+    def test_index_follows_updates_and_deletes(self, problems):
+        problems[1].wording = "Hypertension"
+        problems[1].save()
+        assert list(Problem.objects.search("hypertension")) == [problems[1]]
+        assert not Problem.objects.search("diabetes").exists()
+
+        problems[1].delete()
+        assert not Problem.objects.search("hypertension").exists()
+
+    def test_search_from_opened_manager(self, problems):
+        problems[0].closing_date = "2024-01-01"
+        problems[0].save()
+        assert list(Problem.opened.search("migraine")) == [problems[2]]
+
+    def test_rebuild_command(self, problems):
+        call_command("rebuild_problem_index", stdout=StringIO())
+        assert Problem.objects.search("diabetes").count() == 1
+
+
+@pytest.mark.django_db
+class TestProblemSearchView:
+    """Tests for ProblemSearch view using the full-text index."""
+
+    def test_search_by_field(self, client_logged_in, problems):
+        url = reverse("problem_search")
+        resp = client_logged_in.get(
+            url,
+            {"search_type_problem": "wording", "search_text_problem": "migraine"},
+        )
+        assert resp.status_code == 200
+        assert set(resp.context["object_list"]) == {problems[0], problems[2]}
+
+    def test_search_unknown_field(self, client_logged_in, problems):
+        url = reverse("problem_search")
+        resp = client_logged_in.get(
+            url, {"search_type_problem": "patient__ssn", "search_text_problem": "x"}
+        )
+        assert resp.status_code == 200
+        assert resp.context["object_list"] is None
+
+
+@pytest.fixture
+def patients():
+    return [
+        Patient.objects.create(first_name="José", last_name="Peña", gender="M"),
+        Patient.objects.create(
+            first_name="Ana", last_name="Martínez", last_name_optional="Ruiz"
+        ),
+        Patient.objects.create(first_name="Bob", last_name="Marley"),
+    ]
+
+
+@pytest.mark.django_db
+class TestPatientNameSearch:
+    """Tests for Patient.objects.search_by_name."""
+
+    def test_search_name_is_normalized(self, patients):
+        assert patients[0].search_name == "jose pena"
+        assert patients[1].search_name == "ana martinez ruiz"
+        assert patients[0].search_last_name == "pena"
+        assert patients[1].search_last_name_optional == "ruiz"
+
+    def test_search_ignores_case_and_accents(self, patients):
+        assert list(Patient.objects.search_by_name("PEÑA")) == [patients[0]]
+        assert list(Patient.objects.search_by_name("martinez")) == [patients[1]]
+
+    def test_search_matches_inside_names(self, patients):
+        result = Patient.objects.search_by_name("arl")
+        assert list(result) == [patients[2]]
+
+    def test_search_every_word(self, patients):
+        assert list(Patient.objects.search_by_name("mar ruiz")) == [patients[1]]
+        assert set(Patient.objects.search_by_name("mar")) == {
+            patients[1],
+            patients[2],
+        }
+
+    def test_search_in_field(self, patients):
+        assert list(Patient.objects.search_by_name("PENA", "last_name")) == [
+            patients[0]
+        ]
+        assert not Patient.objects.search_by_name("jose", "last_name").exists()
+        assert list(Patient.objects.search_by_name("ez ru", "last_name")) == []
+        assert list(Patient.objects.search_by_name("ruiz", "last_name_optional")) == [
+            patients[1]
+        ]
+        # short terms (no index) are filtered in the database too
+        assert list(Patient.objects.search_by_name("ña", "last_name")) == [patients[0]]
+
+    def test_search_short_terms(self, patients):
+        assert list(Patient.objects.search_by_name("bo")) == [patients[2]]
+
+    def test_index_follows_renames(self, patients):
+        patients[2].last_name = "Dylan"
+        patients[2].save(update_fields=["last_name"])
+        patients[2].refresh_from_db()
+        assert patients[2].search_name == "bob dylan"
+        assert list(Patient.objects.search_by_name("dylan")) == [patients[2]]
+        assert not Patient.objects.search_by_name("marley").exists()
+
+    def test_rebuild_command(self, patients):
+        Patient.objects.filter(pk=patients[0].pk).update(
+            search_name="", search_last_name=""
+        )
+        call_command("rebuild_patient_name_index", stdout=StringIO())
+        assert list(Patient.objects.search_by_name("jose")) == [patients[0]]
+        assert list(Patient.objects.search_by_name("pena", "last_name")) == [
+            patients[0]
+        ]
+
+
+@pytest.mark.django_db
+class TestPatientNameSearchViews:
+    """Tests for the patient search entry points using the name index."""
+
+    def test_patient_search(self, client_logged_in, patients):
+        resp = client_logged_in.get(reverse("patient_search"), {"q": "pena"})
+        assert resp.status_code == 200
+        assert list(resp.context["object_list"]) == [patients[0]]
+
+    def test_patient_list_by_name_field(self, client_logged_in, patients):
+        resp = client_logged_in.get(
+            reverse("patient_list"),
+            {"search_type": "first_name", "search_text": "mar"},
+        )
+        assert resp.status_code == 200
+        assert not resp.context["object_list"]
+
+        resp = client_logged_in.get(
+            reverse("patient_list"),
+            {"search_type": "last_name", "search_text": "mar"},
+        )
+        assert set(resp.context["object_list"]) == {patients[1], patients[2]}
+
+        resp = client_logged_in.get(
+            reverse("patient_list"),
+            {"search_type": "last_name", "search_text": "pena"},
+        )
+        assert list(resp.context["object_list"]) == [patients[0]]
+
+    def test_patients_lookup(self, patients):
+        lookup = PatientLookup()
+        assert list(lookup.get_query("ruiz", None)) == [patients[1]]
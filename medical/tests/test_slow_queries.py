@@ -0,0 +1,74 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Tests for the slow query recorder."""
+
+from django.db import connection
+from django.urls import reverse
+
+from medical import slow_queries
+from medical.models import SlowQuery
+
+SQL = 'SELECT "patient"."id" FROM "patient" WHERE "patient"."id" IN (%s, %s)'
+
+
+def test_normalize():
+    assert slow_queries.normalize(
+        "SELECT  *\n FROM t WHERE a = 'it''s' AND b > 10.5 AND c IN (1, 2, 3)"
+    ) == ("SELECT * FROM t WHERE a = ? AND b > ? AND c IN (...)")
+    assert slow_queries.normalize(SQL) == slow_queries.normalize(
+        SQL.replace("(%s, %s)", "(%s, %s, %s)")
+    )
+
+
+def test_record_adds_up_fingerprints(settings):
+    settings.SLOW_QUERY_EXPLAIN_RATE = 0
+    slow_queries.record("PatientList", [("default", SQL, (1, 2), 0.2)])
+    slow_queries.record(
+        "PatientSearch",
+        [("default", SQL.replace("(%s, %s)", "(%s)"), (3,), 0.5)],
+    )
+
+    query = SlowQuery.objects.get()
+    assert query.sql == slow_queries.normalize(SQL)
+    assert query.calls == 2
+    assert query.total_time == 0.7
+    assert query.max_time == 0.5
+    assert query.view == "PatientSearch"
+    if connection.vendor == "sqlite":
+        # the plan of the first call
+        assert "patient" in query.plan
+
+
+def test_explain_skips_writes():
+    assert slow_queries.explain("default", "DELETE FROM patient", ()) == ""
+
+
+def test_middleware_records_slow_queries(settings, client_logged_in, test_patient):
+    settings.SLOW_QUERY_THRESHOLD_MS = 0
+    url = reverse("patient_detail", args=(test_patient.pk, "patient"))
+    resp = client_logged_in.get(url)
+    assert resp.status_code == 200
+    assert SlowQuery.objects.filter(view="PatientDetail").exists()
+
+    settings.SLOW_QUERY_THRESHOLD_MS = None
+    SlowQuery.objects.all().delete()
+    client_logged_in.get(url)
+    assert not SlowQuery.objects.exists()
+
+
+def test_admin_lists_slow_queries(client, admin_user):
+    slow_queries.record("PatientList", [("default", SQL, (1, 2), 0.2)])
+    client.force_login(admin_user)
+    resp = client.get(reverse("admin:medical_slowquery_changelist"))
+    assert resp.status_code == 200
+    assert "PatientList" in resp.content.decode()
+
+    resp = client.get(
+        reverse("admin:medical_slowquery_change", args=[SlowQuery.objects.get().pk])
+    )
+    assert resp.status_code == 200
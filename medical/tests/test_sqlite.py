@@ -0,0 +1,43 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Tests for the SQLite production profile."""
+
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+pytestmark = pytest.mark.skipif(connection.vendor != "sqlite", reason="SQLite profile")
+
+
+@pytest.mark.django_db
+def test_pragmas():
+    with connection.cursor() as cursor:
+        for pragma, expected in [
+            ("busy_timeout", 5000),
+            ("synchronous", 1),  # NORMAL
+            ("temp_store", 2),  # MEMORY
+            ("cache_size", -20000),
+        ]:
+            cursor.execute(f"PRAGMA {pragma}")
+            assert cursor.fetchone()[0] == expected
+    assert connection.transaction_mode == "IMMEDIATE"
+
+
+def test_benchmark(tmp_path):
+    out = StringIO()
+    call_command(
+        "benchmark_sqlite_writes",
+        workers=2,
+        transactions=5,
+        directory=str(tmp_path),
+        stdout=out,
+    )
+    assert "default: " in out.getvalue()
+    assert "tuned: " in out.getvalue()
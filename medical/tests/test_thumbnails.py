@@ -0,0 +1,121 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Tests for the content type detection and previews of test documents."""
+
+import io
+import os
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+
+from medical.models import Patient, Test
+from medical.sniff import sniff_content_type
+from medical.thumbnails import make_thumbnail, thumbnail_name
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.MEDICAL_THUMBNAIL_WORKERS = 0
+    settings.MEDICAL_DELETION_WORKERS = 0
+    return tmp_path
+
+
+class TestSniffContentType:
+    """Tests for medical.sniff.sniff_content_type."""
+
+    @pytest.mark.parametrize(
+        ("head", "filename", "expected"),
+        [
+            (b"%PDF-1.7\n", "scan.bin", "application/pdf"),
+            (PNG, "photo.jpg", "image/png"),
+            (b"\xff\xd8\xff\xe0", "", "image/jpeg"),
+            (b"\x00" * 128 + b"DICM", "IM0001", "application/dicom"),
+            (b"RIFF\x00\x00\x00\x00WEBPVP8 ", "", "image/webp"),
+            (b"PK\x03\x04", "report.docx", None),
+            (b"PK\x03\x04", "report", "application/zip"),
+            (b"Glucosa: 90 mg/dl", "results", "text/plain"),
+            (b"\x00\x01\x02", "data", "application/octet-stream"),
+        ],
+    )
+    def test_signatures(self, head, filename, expected):
+        content_type = sniff_content_type(head, filename)
+        if expected is None:
+            assert content_type.endswith("wordprocessingml.document")
+        else:
+            assert content_type == expected
+
+    def test_signature_wins_over_declared_type(self):
+        assert sniff_content_type(b"%PDF-1.4", "a.txt", "text/html") == (
+            "application/pdf"
+        )
+        assert sniff_content_type(b"plain", "a.txt", "text/csv") == "text/csv"
+
+
+@pytest.mark.django_db
+class TestThumbnails:
+    """Tests for medical.thumbnails and the ProblemTestThumbnail view."""
+
+    def upload(self, problem, name, content):
+        return Test.objects.create(
+            problem=problem, document=SimpleUploadedFile(name, content)
+        )
+
+    def test_document_type_detected(self, test_problem):
+        test = self.upload(test_problem, "scan", b"%PDF-1.7\n")
+        assert test.document_type == "application/pdf"
+
+    def test_image_thumbnail(
+        self, client_logged_in, test_problem, django_capture_on_commit_callbacks
+    ):
+        image = pytest.importorskip("PIL.Image")
+        content = io.BytesIO()
+        image.new("RGB", (1200, 800), "red").save(content, "PNG")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            test = self.upload(test_problem, "photo.png", content.getvalue())
+        test.refresh_from_db()
+        assert test.has_thumbnail
+
+        resp = client_logged_in.get(reverse("problem_test_thumbnail", args=(test.pk,)))
+        assert resp.status_code == 200
+        assert resp["Content-Type"] == "image/jpeg"
+        with image.open(io.BytesIO(b"".join(resp.streaming_content))) as thumbnail:
+            assert thumbnail.size == (256, 171)
+
+    def test_flags_tests_sharing_the_document(self, test_problem, media_root):
+        first = self.upload(test_problem, "a.png", PNG)
+        self.upload(test_problem, "b.png", PNG)
+        (media_root / thumbnail_name(first.document.name)).write_bytes(b"jpeg")
+        version = Patient.objects.get(pk=test_problem.patient_id).record_version
+
+        assert make_thumbnail(first.document.name, "image/png")
+        assert set(Test.objects.values_list("has_thumbnail", flat=True)) == {True}
+        patient = Patient.objects.get(pk=test_problem.patient_id)
+        assert patient.record_version == version + 1
+
+    def test_no_thumbnail(self, client_logged_in, test_problem):
+        test = self.upload(test_problem, "notes.txt", b"notes")
+        assert not test.has_thumbnail
+        url = reverse("problem_test_thumbnail", args=(test.pk,))
+        assert client_logged_in.get(url).status_code == 404
+
+    def test_deleted_with_document(
+        self, test_problem, media_root, django_capture_on_commit_callbacks
+    ):
+        test = self.upload(test_problem, "a.png", PNG)
+        thumbnail = media_root / thumbnail_name(test.document.name)
+        thumbnail.write_bytes(b"jpeg")
+        make_thumbnail(test.document.name, "image/png")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            test.delete()
+        assert not os.path.exists(thumbnail)
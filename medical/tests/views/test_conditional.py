@@ -0,0 +1,107 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Tests for conditional GET on patient record pages."""
+
+import pytest
+from django.contrib.messages import constants
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.urls import reverse
+
+from medical.models import Problem
+
+PATIENT_PAGES = ("patient_detail", "problem_list", "patient_history", "patient_tests")
+
+
+def patient_url(name, patient_pk):
+    if name == "patient_detail":
+        return reverse(name, kwargs={"pk": patient_pk, "slug": "patient"})
+
+    return reverse(name, args=(patient_pk,))
+
+
+def revalidate(client, url, response, **headers):
+    return client.get(url, HTTP_IF_NONE_MATCH=response["ETag"], **headers)
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    """Tests for PatientRecordConditionalMixin."""
+
+    @pytest.mark.parametrize("name", PATIENT_PAGES)
+    def test_unchanged_page_is_not_modified(self, client_logged_in, test_patient, name):
+        url = patient_url(name, test_patient.pk)
+        resp = client_logged_in.get(url)
+        assert resp.status_code == 200
+        assert resp.has_header("Last-Modified")
+        assert "no-cache" in resp["Cache-Control"]
+        assert revalidate(client_logged_in, url, resp).status_code == 304
+
+    def test_not_modified_costs_one_record_query(
+        self, client_logged_in, test_problem, django_assert_num_queries
+    ):
+        url = reverse("problem_detail", args=(test_problem.pk,))
+        resp = client_logged_in.get(url)
+        # session, user and record version
+        with django_assert_num_queries(3):
+            assert revalidate(client_logged_in, url, resp).status_code == 304
+
+    def test_record_change_refreshes_page(self, client_logged_in, test_history):
+        url = reverse("patient_history_antecedents", args=(test_history.patient.pk,))
+        resp = client_logged_in.get(url)
+        test_history.habits = "Running"
+        test_history.save()
+        resp = revalidate(client_logged_in, url, resp)
+        assert resp.status_code == 200
+        assert b"Running" in resp.content
+
+    def test_problem_change_refreshes_other_problem(
+        self, client_logged_in, test_problem
+    ):
+        url = reverse("problem_detail", args=(test_problem.pk,))
+        resp = client_logged_in.get(url)
+        Problem.objects.create(patient=test_problem.patient, wording="Another")
+        assert revalidate(client_logged_in, url, resp).status_code == 200
+
+    def test_ajax_page_has_its_own_etag(self, client_logged_in, test_patient):
+        url = reverse("problem_list", args=(test_patient.pk,))
+        resp = client_logged_in.get(url)
+        assert "X-Requested-With" in resp["Vary"]
+        ajax = revalidate(
+            client_logged_in, url, resp, HTTP_X_REQUESTED_WITH="XMLHttpRequest"
+        )
+        assert ajax.status_code == 200
+
+    def test_pending_messages_render_page(self, client_logged_in, test_patient):
+        url = patient_url("patient_detail", test_patient.pk)
+        resp = client_logged_in.get(url)
+        storage = CookieStorage(resp.wsgi_request)
+        storage.add(constants.SUCCESS, "Saved")
+        storage.update(resp)
+        client_logged_in.cookies.update(resp.cookies)
+        assert revalidate(client_logged_in, url, resp).status_code == 200
+
+    def test_new_session_refreshes_page(self, client_logged_in, test_patient):
+        url = patient_url("patient_detail", test_patient.pk)
+        resp = client_logged_in.get(url)
+        user = resp.wsgi_request.user
+        client_logged_in.logout()
+        client_logged_in.force_login(user)
+        # the page embeds the CSRF token of the previous session
+        assert revalidate(client_logged_in, url, resp).status_code == 200
+
+    def test_staff_rename_refreshes_page(self, client_logged_in, test_patient):
+        url = patient_url("patient_detail", test_patient.pk)
+        resp = client_logged_in.get(url)
+        user = resp.wsgi_request.user
+        user.first_name = "Renamed"
+        user.save()
+        assert revalidate(client_logged_in, url, resp).status_code == 200
+
+    def test_missing_patient_is_not_found(self, client_logged_in):
+        url = patient_url("patient_detail", 999999)
+        assert client_logged_in.get(url, HTTP_IF_NONE_MATCH="*").status_code == 404
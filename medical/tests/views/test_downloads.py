@@ -0,0 +1,173 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Tests for the protected test document downloads."""
+
+import hashlib
+import io
+import os
+import zipfile
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+
+from medical.archives import zip_stream
+from medical.models import Test
+
+CONTENT = b"0123456789" * 100
+
+
+@pytest.fixture
+def test_document(settings, tmp_path, test_problem):
+    settings.MEDIA_ROOT = tmp_path
+    return Test.objects.create(
+        problem=test_problem, document=SimpleUploadedFile("scan.pdf", CONTENT)
+    )
+
+
+def download_url(test):
+    return reverse("problem_test_download", args=(test.pk,))
+
+
+def body(response):
+    return b"".join(response.streaming_content)
+
+
+@pytest.mark.django_db
+class TestProblemTestDownload:
+    """Tests for the ProblemTestDownload view."""
+
+    def test_login_required(self, client, test_document):
+        assert client.get(download_url(test_document)).status_code == 302
+
+    def test_file_response(self, client_logged_in, test_document):
+        resp = client_logged_in.get(
+            download_url(test_document), HTTP_ACCEPT_ENCODING="gzip"
+        )
+        assert resp.status_code == 200
+        assert body(resp) == CONTENT
+        assert resp["Content-Length"] == str(len(CONTENT))
+        assert resp["Content-Type"] == "application/pdf"
+        assert resp["Content-Disposition"] == 'inline; filename="scan.pdf"'
+        assert resp["Accept-Ranges"] == "bytes"
+        assert resp["ETag"] == f'"{hashlib.sha256(CONTENT).hexdigest()}"'
+        assert not resp.has_header("Content-Encoding")
+
+    def test_not_modified(self, client_logged_in, test_document):
+        url = download_url(test_document)
+        etag = client_logged_in.get(url)["ETag"]
+        resp = client_logged_in.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert resp.status_code == 304
+        assert resp["ETag"] == etag
+
+    @pytest.mark.parametrize(
+        ("header", "start", "end"),
+        [("bytes=10-19", 10, 19), ("bytes=990-", 990, 999), ("bytes=-5", 995, 999)],
+    )
+    def test_range(self, client_logged_in, test_document, header, start, end):
+        resp = client_logged_in.get(download_url(test_document), HTTP_RANGE=header)
+        assert resp.status_code == 206
+        assert body(resp) == CONTENT[start : end + 1]
+        assert resp["Content-Length"] == str(end - start + 1)
+        assert resp["Content-Range"] == f"bytes {start}-{end}/{len(CONTENT)}"
+
+    def test_range_not_satisfiable(self, client_logged_in, test_document):
+        resp = client_logged_in.get(
+            download_url(test_document), HTTP_RANGE="bytes=2000-"
+        )
+        assert resp.status_code == 416
+        assert resp["Content-Range"] == f"bytes */{len(CONTENT)}"
+
+    def test_stale_if_range_sends_everything(self, client_logged_in, test_document):
+        resp = client_logged_in.get(
+            download_url(test_document), HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"old"'
+        )
+        assert resp.status_code == 200
+        assert body(resp) == CONTENT
+
+    def test_x_accel_redirect(self, settings, client_logged_in, test_document):
+        settings.MEDICAL_SENDFILE = "x-accel-redirect"
+        resp = client_logged_in.get(download_url(test_document))
+        assert resp.status_code == 200
+        assert resp["X-Accel-Redirect"] == f"/protected-media/{test_document.document}"
+        assert resp["Content-Type"] == "application/pdf"
+        assert resp.content == b""
+
+    def test_x_sendfile(self, settings, client_logged_in, test_document):
+        settings.MEDICAL_SENDFILE = "x-sendfile"
+        resp = client_logged_in.get(download_url(test_document))
+        assert resp["X-Sendfile"] == test_document.document.path
+
+    def test_html_is_downloaded(self, client_logged_in, test_problem, test_document):
+        test = Test.objects.create(
+            problem=test_problem, document=SimpleUploadedFile("page.html", b"<p>")
+        )
+        resp = client_logged_in.get(download_url(test))
+        assert resp["Content-Disposition"] == 'attachment; filename="page.html"'
+
+    def test_missing_file(self, client_logged_in, test_document):
+        test_document.document.storage.delete(test_document.document.name)
+        assert client_logged_in.get(download_url(test_document)).status_code == 404
+
+
+@pytest.mark.django_db
+class TestPatientTestsArchive:
+    """Tests for the PatientTestsArchive view and medical.archives."""
+
+    def get(self, client, patient, **headers):
+        resp = client.get(
+            reverse("patient_tests_archive", args=(patient.pk,)), **headers
+        )
+        assert resp.status_code == 200
+        assert resp["Content-Type"] == "application/zip"
+        return zipfile.ZipFile(io.BytesIO(body(resp)))
+
+    def test_login_required(self, client, test_problem):
+        url = reverse("patient_tests_archive", args=(test_problem.patient_id,))
+        assert client.get(url).status_code == 302
+
+    def test_archive(self, client_logged_in, test_problem, test_document):
+        Test.objects.create(
+            problem=test_problem,
+            document=SimpleUploadedFile("notes.txt", CONTENT + b"\n"),
+        )
+        Test.objects.create(
+            problem=test_problem, document=SimpleUploadedFile("scan.pdf", b"%PDF-2")
+        )
+
+        archive = self.get(
+            client_logged_in, test_problem.patient, HTTP_ACCEPT_ENCODING="gzip"
+        )
+        assert archive.testzip() is None
+        folder = "01-test-medical-problem"
+        infos = {info.filename: info for info in archive.infolist()}
+        assert set(infos) == {
+            f"{folder}/scan.pdf",
+            f"{folder}/notes.txt",
+            f"{folder}/scan (2).pdf",
+        }
+        # PDF is stored, plain text deflated
+        assert infos[f"{folder}/scan.pdf"].compress_type == zipfile.ZIP_STORED
+        assert infos[f"{folder}/notes.txt"].compress_type == zipfile.ZIP_DEFLATED
+        assert archive.read(f"{folder}/scan.pdf") == CONTENT
+        assert archive.read(f"{folder}/notes.txt") == CONTENT + b"\n"
+
+    def test_missing_file_skipped(self, client_logged_in, test_document):
+        os.unlink(test_document.document.path)
+        archive = self.get(client_logged_in, test_document.problem.patient)
+        assert archive.namelist() == []
+
+    def test_constant_memory(self, tmp_path):
+        path = tmp_path / "large.bin"
+        path.write_bytes(os.urandom(1024 * 1024))
+        members = [("large.bin", path, (2026, 1, 1, 0, 0, 0), False)]
+
+        chunks = list(zip_stream(members, chunk_size=64 * 1024))
+        assert max(len(chunk) for chunk in chunks) <= 64 * 1024 + 100
+        with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+            assert archive.read("large.bin") == path.read_bytes()
@@ -0,0 +1,100 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Tests for keyset pagination of the patient and problem lists."""
+
+import pytest
+from django.urls import reverse
+
+from medical.models import Patient, Problem
+from medical.views.pagination import KeysetPaginationMixin
+
+AJAX = {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}
+
+
+def walk(client, url, params=None):
+    """Follows every "more" cursor, returning the pages seen."""
+    params = dict(params or {})
+    pages = []
+    while True:
+        resp = client.get(url, params, **(AJAX if pages else {}))
+        assert resp.status_code == 200
+        pages.append(list(resp.context["object_list"]))
+        cursor = resp.context["next_cursor"]
+        if cursor is None:
+            return pages
+        params["cursor"] = cursor
+        params["querystring_key"] = "page"
+
+
+@pytest.fixture
+def many_patients():
+    names = ["Zoe", "Adam", "Eve", "Adam", "Bob"]
+    return [
+        Patient.objects.create(
+            first_name=names[i % len(names)],
+            last_name=f"Name{i % 4}",
+            last_name_optional=None if i % 3 else f"Opt{i % 2}",
+        )
+        for i in range(23)
+    ]
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    """Tests for KeysetPaginationMixin."""
+
+    def test_patient_pages_cover_ordering(self, client_logged_in, many_patients):
+        pages = walk(client_logged_in, reverse("patient_search"))
+        per_page = KeysetPaginationMixin.per_page
+        assert len(pages) == -(-len(many_patients) // per_page)
+        assert all(len(page) == per_page for page in pages[:-1])
+        seen = [patient for page in pages for patient in page]
+        expected = list(Patient.objects.order_by(*Patient._meta.ordering, "id"))
+        assert [p.pk for p in seen] == [p.pk for p in expected]
+
+    def test_problem_pages_with_equal_timestamps(self, client_logged_in, test_patient):
+        problems = Problem.objects.bulk_create(
+            Problem(patient=test_patient, order_number=i, wording=f"Problem {i}")
+            for i in range(1, 16)
+        )
+        Problem.objects.update(modified=problems[0].created)
+        pages = walk(client_logged_in, reverse("problem_list", args=(test_patient.pk,)))
+        seen = [problem.pk for page in pages for problem in page]
+        assert seen == sorted((problem.pk for problem in problems), reverse=True)
+
+    def test_first_page_counts_results(self, client_logged_in, many_patients):
+        resp = client_logged_in.get(reverse("patient_search"))
+        assert resp.context["result_count"] == len(many_patients)
+        assert resp.context["keyset_pagination"]
+
+    def test_more_pages_use_page_template(self, client_logged_in, many_patients):
+        resp = client_logged_in.get(reverse("patient_search"))
+        resp = client_logged_in.get(
+            reverse("patient_search"),
+            {"cursor": resp.context["next_cursor"], "querystring_key": "page"},
+            **AJAX,
+        )
+        assert resp.templates[0].name == "includes/patient_list.html"
+        assert resp.context["result_count"] is None
+
+    def test_count_can_be_skipped(self, client_logged_in, many_patients, settings):
+        settings.KEYSET_PAGINATION_COUNT = False
+        resp = client_logged_in.get(reverse("patient_search"))
+        assert resp.context["result_count"] is None
+        assert "elements" not in resp.content.decode()
+
+    def test_invalid_cursor(self, client_logged_in, many_patients):
+        resp = client_logged_in.get(reverse("patient_search"), {"cursor": "bogus"})
+        assert resp.status_code == 404
+
+    def test_offset_mode(self, client_logged_in, many_patients, settings):
+        settings.KEYSET_PAGINATION = False
+        resp = client_logged_in.get(reverse("patient_search"))
+        assert resp.status_code == 200
+        assert "keyset_pagination" not in resp.context
+        assert resp.context["result_count"] == len(many_patients)
@@ -0,0 +1,205 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Tests for the resumable chunked uploads of test documents."""
+
+import errno
+import os
+import uuid
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from medical.models import DocumentBlob, Test, TestUpload
+from medical.uploads import staging_path, upload_dir
+
+CONTENT = b"DICM" * 2500
+
+
+@pytest.fixture(autouse=True)
+def upload_settings(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.MEDICAL_UPLOAD_CHUNK_SIZE = 4096
+
+
+@pytest.fixture
+def upload(client_logged_in, test_problem):
+    resp = client_logged_in.post(
+        reverse("test_upload_add", args=(test_problem.pk,)),
+        {"filename": "C:\\scans\\head.dcm", "size": len(CONTENT)},
+    )
+    assert resp.status_code == 201
+    return resp.json()
+
+
+def send(client, upload, offset, data):
+    return client.patch(
+        upload["url"],
+        data,
+        content_type="application/offset+octet-stream",
+        HTTP_UPLOAD_OFFSET=str(offset),
+    )
+
+
+@pytest.mark.django_db
+class TestChunkedUpload:
+    """Tests for TestUploadCreate and TestUploadDetail."""
+
+    def test_start(self, upload):
+        assert upload["offset"] == 0
+        assert upload["size"] == len(CONTENT)
+        assert upload["chunk_size"] == 4096
+        assert TestUpload.objects.get().filename == "head.dcm"
+
+    def test_invalid_size(self, client_logged_in, test_problem, settings):
+        settings.MEDICAL_UPLOAD_MAX_SIZE = 100
+        resp = client_logged_in.post(
+            reverse("test_upload_add", args=(test_problem.pk,)),
+            {"filename": "head.dcm", "size": 101},
+        )
+        assert resp.status_code == 400
+        assert "size" in resp.json()["errors"]
+
+    def test_upload_and_commit(
+        self,
+        client_logged_in,
+        upload,
+        test_problem,
+        django_capture_on_commit_callbacks,
+    ):
+        for offset in range(0, len(CONTENT), 4096):
+            resp = send(
+                client_logged_in, upload, offset, CONTENT[offset : offset + 4096]
+            )
+            assert resp.status_code == 200
+            assert resp.json()["offset"] == min(offset + 4096, len(CONTENT))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            resp = client_logged_in.post(upload["url"])
+        assert resp.status_code == 200
+        assert resp.json()["redirect"] == reverse(
+            "problem_tests", args=(test_problem.pk,)
+        )
+        test = Test.objects.get(pk=resp.json()["test"])
+        assert test.problem == test_problem
+        assert test.filename() == "head.dcm"
+        assert test.document.read() == CONTENT
+        assert not os.path.exists(staging_path(TestUpload.objects.get()))
+
+        # committing again returns the same test
+        assert client_logged_in.post(upload["url"]).json()["test"] == test.pk
+        assert Test.objects.count() == 1
+
+    def upload_all(self, client, upload):
+        for offset in range(0, len(CONTENT), 4096):
+            send(client, upload, offset, CONTENT[offset : offset + 4096])
+
+    def test_commit_moves_staging_file(self, client_logged_in, upload):
+        self.upload_all(client_logged_in, upload)
+        path = staging_path(TestUpload.objects.get())
+        inode = os.stat(path).st_ino
+
+        test = Test.objects.get(pk=client_logged_in.post(upload["url"]).json()["test"])
+        assert not os.path.exists(path)
+        # renamed into the storage, not copied
+        assert os.stat(test.document.path).st_ino == inode
+        assert DocumentBlob.objects.get(name=test.document.name).references == 1
+
+    def test_commit_across_file_systems(self, client_logged_in, upload, monkeypatch):
+        self.upload_all(client_logged_in, upload)
+        replace = os.replace
+
+        def cross_device(source, target):
+            if source.endswith(".part"):
+                raise OSError(errno.EXDEV, "Invalid cross-device link")
+            replace(source, target)
+
+        monkeypatch.setattr(os, "replace", cross_device)
+        test = Test.objects.get(pk=client_logged_in.post(upload["url"]).json()["test"])
+        assert test.document.read() == CONTENT
+        assert not os.path.exists(staging_path(TestUpload.objects.get()))
+
+    def test_resume(self, client_logged_in, upload):
+        send(client_logged_in, upload, 0, CONTENT[:4096])
+        # a chunk lost in transit, then sent again from a stale offset
+        resp = send(client_logged_in, upload, 8192, CONTENT[8192:])
+        assert resp.status_code == 409
+        assert resp.json()["offset"] == 4096
+
+        status = client_logged_in.get(upload["url"]).json()
+        assert status["offset"] == 4096
+        send(client_logged_in, upload, 4096, CONTENT[4096:8192])
+        send(client_logged_in, upload, 8192, CONTENT[8192:])
+        test = Test.objects.get(pk=client_logged_in.post(upload["url"]).json()["test"])
+        assert test.document.read() == CONTENT
+
+    def test_interrupted_write_is_overwritten(self, client_logged_in, upload):
+        send(client_logged_in, upload, 0, CONTENT[:4096])
+        path = staging_path(TestUpload.objects.get())
+        with open(path, "ab") as staging:
+            staging.write(b"garbage")
+
+        send(client_logged_in, upload, 4096, CONTENT[4096:8192])
+        with open(path, "rb") as staging:
+            assert staging.read() == CONTENT[:8192]
+
+    def test_chunk_too_large(self, client_logged_in, upload):
+        assert send(client_logged_in, upload, 0, CONTENT[:4097]).status_code == 413
+
+    def test_incomplete_commit(self, client_logged_in, upload):
+        send(client_logged_in, upload, 0, CONTENT[:4096])
+        assert client_logged_in.post(upload["url"]).status_code == 400
+        assert not Test.objects.exists()
+
+    def test_other_users_upload(self, client, django_user_model, upload):
+        client.force_login(django_user_model.objects.create_user(username="other"))
+        assert client.get(upload["url"]).status_code == 404
+
+    def test_abort(self, client_logged_in, upload, django_capture_on_commit_callbacks):
+        send(client_logged_in, upload, 0, CONTENT[:4096])
+        path = staging_path(TestUpload.objects.get())
+        with django_capture_on_commit_callbacks(execute=True):
+            assert client_logged_in.delete(upload["url"]).status_code == 204
+        assert not TestUpload.objects.exists()
+        assert not os.path.exists(path)
+
+    def test_problem_delete_removes_staging_file(
+        self, client_logged_in, upload, test_problem, django_capture_on_commit_callbacks
+    ):
+        send(client_logged_in, upload, 0, CONTENT[:4096])
+        path = staging_path(TestUpload.objects.get())
+        with django_capture_on_commit_callbacks(execute=True):
+            test_problem.delete()
+        assert not os.path.exists(path)
+
+    def test_expire_uploads(
+        self, client_logged_in, upload, django_capture_on_commit_callbacks
+    ):
+        send(client_logged_in, upload, 0, CONTENT[:4096])
+        path = staging_path(TestUpload.objects.get())
+        orphan = os.path.join(upload_dir(), f"{uuid.uuid4()}.part")
+        with open(orphan, "wb"):
+            pass
+        old = (timezone.now() - timedelta(days=8)).timestamp()
+        os.utime(orphan, (old, old))
+
+        out = StringIO()
+        call_command("expire_uploads", stdout=out)
+        assert "0 uploads expired, 1 orphan" in out.getvalue()
+        assert os.path.exists(path)
+        assert not os.path.exists(orphan)
+
+        TestUpload.objects.update(modified=timezone.now() - timedelta(days=8))
+        with django_capture_on_commit_callbacks(execute=True):
+            call_command("expire_uploads", stdout=out)
+        assert "1 uploads expired" in out.getvalue()
+        assert not TestUpload.objects.exists()
+        assert not os.path.exists(path)
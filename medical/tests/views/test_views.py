@@ -1,7 +1,7 @@
 import pytest
 from django.urls import reverse
 
-from medical.models import Patient
+from medical.models import Patient, Problem
 
 
 class TestPatientRedirectDetail:
@@ -99,6 +99,22 @@ class TestProblemViews:
         resp = client_logged_in.post(url, data)
         assert resp.status_code == 302
 
+    def test_create_problem_ignores_posted_order_number(
+        self, client_logged_in, test_problem
+    ):
+        """Test that the order number is allocated, not taken from the form."""
+        url = reverse("problem_add", kwargs={"pk": test_problem.patient.pk})
+        data = {
+            "patient": test_problem.patient.pk,
+            "order_number": test_problem.order_number,
+            "wording": "Another medical issue",
+            "closed": False,
+        }
+        resp = client_logged_in.post(url, data)
+        assert resp.status_code == 302
+        problem = Problem.objects.get(wording="Another medical issue")
+        assert problem.order_number == test_problem.order_number + 1
+
 
 class TestHistoryViews:
     """Tests for History views."""
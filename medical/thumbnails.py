@@ -0,0 +1,149 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Small JPEG previews of the test documents.
+
+A preview is stored next to its document (``<name>.thumb.jpg``), so tests
+sharing a blob share it. Previews are made out of the request (see
+medical.jobs): by the job workers, or after commit by a local pool of
+``MEDICAL_THUMBNAIL_WORKERS`` threads (0: in the request):
+
+* images are downscaled with Pillow (``pip install openclinic[thumbnails]``);
+* the first page of PDF documents is rendered by ``pdftoppm`` (poppler).
+
+Types without an available converter get no preview.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+from contextlib import suppress
+
+from django.conf import settings
+from django.db import transaction
+
+from . import jobs
+from .storage import document_storage
+
+try:
+    from PIL import Image
+except ImportError:  # optional dependency
+    Image = None
+
+THUMBNAIL_SUFFIX = ".thumb.jpg"
+
+
+def thumbnail_name(name):
+    return f"{name}{THUMBNAIL_SUFFIX}"
+
+
+def can_preview(content_type):
+    if content_type == "application/pdf":
+        return shutil.which("pdftoppm") is not None
+    if content_type and content_type.startswith("image/"):
+        return Image is not None
+
+    return False
+
+
+def schedule_thumbnail(name, content_type):
+    """Makes the preview of a document out of the request."""
+    if can_preview(content_type):
+        jobs.defer(
+            make_thumbnail,
+            name,
+            content_type,
+            workers=settings.MEDICAL_THUMBNAIL_WORKERS,
+        )
+
+
+@jobs.task
+def make_thumbnail(name, content_type):
+    """
+    Writes the preview of a document and flags the tests using it. Returns
+    False when no preview can be made.
+    """
+    from .models import Patient, Test
+
+    storage = document_storage()
+    path = storage.path(name)
+    target = storage.path(thumbnail_name(name))
+    if not os.path.exists(target):
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(target), suffix=THUMBNAIL_SUFFIX
+        )
+        os.close(fd)
+        try:
+            if content_type == "application/pdf":
+                made = _pdf_thumbnail(path, temp_path)
+            else:
+                made = _image_thumbnail(path, temp_path)
+            if not made:
+                return False
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, target)
+        finally:
+            with suppress(FileNotFoundError):
+                os.unlink(temp_path)
+
+    with transaction.atomic():
+        tests = Test.objects.filter(document=name, has_thumbnail=False)
+        # the test lists must not be answered with 304
+        Patient.objects.filter(
+            pk__in=tests.values("problem__patient_id")
+        ).touch_records()
+        tests.update(has_thumbnail=True)
+
+    return True
+
+
+def delete_thumbnail(name):
+    document_storage().delete(thumbnail_name(name))
+
+
+def _image_thumbnail(path, target):
+    if Image is None:
+        return False
+
+    with Image.open(path) as image:
+        image.draft("RGB", settings.MEDICAL_THUMBNAIL_SIZE)  # fast JPEG decoding
+        image.thumbnail(settings.MEDICAL_THUMBNAIL_SIZE)
+        image.convert("RGB").save(target, "JPEG", quality=80, optimize=True)
+
+    return True
+
+
+def _pdf_thumbnail(path, target):
+    pdftoppm = shutil.which("pdftoppm")
+    if pdftoppm is None:
+        return False
+
+    width = settings.MEDICAL_THUMBNAIL_SIZE[0]
+    output = target.removesuffix(".jpg")
+    subprocess.run(
+        [
+            pdftoppm,
+            "-f",
+            "1",
+            "-l",
+            "1",
+            "-singlefile",
+            "-jpeg",
+            "-scale-to-x",
+            str(width),
+            "-scale-to-y",
+            "-1",
+            path,
+            output,
+        ],
+        check=True,
+        capture_output=True,
+        timeout=60,
+    )
+
+    return True
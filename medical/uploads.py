@@ -0,0 +1,194 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Resumable chunked uploads of test documents.
+
+1. ``POST problem/<pk>/tests/upload/`` (filename, size, document_type)
+   creates a ``TestUpload`` and returns its URL.
+2. ``PATCH <url>`` with an ``Upload-Offset`` header sends the chunk starting
+   at that offset (at most ``MEDICAL_UPLOAD_CHUNK_SIZE`` bytes). It is
+   appended to a staging file, flushed to disk, and only then is the new
+   offset saved. After a failure, ``GET <url>`` returns the confirmed offset
+   to resume from.
+3. ``POST <url>`` moves the staging file into the document storage and
+   creates the ``Test``.
+
+``DELETE <url>`` aborts an upload. Uploads not touched for
+``MEDICAL_UPLOAD_EXPIRY`` seconds are deleted by the ``expire_uploads``
+command, and the staging file of a deleted upload is removed after commit.
+"""
+
+import os
+import uuid
+from contextlib import suppress
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, router, transaction
+from django.utils import timezone
+
+from openclinic.metrics import count_upload
+
+from . import deletions
+from .models import Test, TestUpload
+from .sniff import sniff_file
+from .storage import document_storage
+from .thumbnails import schedule_thumbnail
+
+
+class UploadError(Exception):
+    pass
+
+
+class OffsetMismatchError(UploadError):
+    """The chunk does not start at the confirmed offset."""
+
+    def __init__(self, offset):
+        super().__init__(f"Expected offset {offset}")
+        self.offset = offset
+
+
+def upload_dir():
+    return settings.MEDICAL_UPLOAD_DIR or os.path.join(settings.MEDIA_ROOT, "uploads")
+
+
+def staging_path(upload):
+    return os.path.join(upload_dir(), f"{upload.pk}.part")
+
+
+def append_chunk(upload, offset, data):
+    """
+    Writes data at offset in the staging file of the upload, returning the
+    new confirmed offset.
+
+    Bytes after the confirmed offset (written by an interrupted request)
+    are overwritten.
+    """
+    with transaction.atomic():
+        upload = TestUpload.objects.select_for_update().get(pk=upload.pk)
+        if upload.test_id is not None:
+            raise UploadError("Upload already committed")
+        if offset != upload.offset:
+            raise OffsetMismatchError(upload.offset)
+        if offset + len(data) > upload.size:
+            raise UploadError("Chunk past the declared size")
+
+        path = staging_path(upload)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o600)
+        with os.fdopen(fd, "wb") as staging:
+            staging.truncate(offset)
+            staging.seek(offset)
+            staging.write(data)
+            staging.flush()
+            os.fsync(staging.fileno())
+
+        upload.offset = offset + len(data)
+        upload.save(update_fields=["offset", "modified"])
+
+    count_upload(len(data), "chunk")
+
+    return upload.offset
+
+
+def commit_upload(upload):
+    """
+    Creates and returns the Test of a complete upload (the existing one when
+    it was already committed).
+
+    The staging file is hashed and moved into the document storage out of
+    any transaction; the transaction creating the test is short, whatever
+    the size of the document.
+    """
+    upload = TestUpload.objects.select_related("test").get(pk=upload.pk)
+    if upload.test is not None:
+        return upload.test
+    if upload.offset != upload.size:
+        raise UploadError(f"Upload incomplete ({upload.offset}/{upload.size})")
+
+    path = staging_path(upload)
+    try:
+        with open(path, "rb") as staging:
+            document_type = sniff_file(staging, upload.filename, upload.document_type)
+        name = document_storage().adopt(path, upload.filename)
+    except FileNotFoundError:
+        # moved by a concurrent commit
+        upload.refresh_from_db()
+        if upload.test is not None:
+            return upload.test
+        raise UploadError("Upload data missing") from None
+
+    using = router.db_for_write(Test)
+    try:
+        with transaction.atomic(using=using):
+            upload = (
+                TestUpload.objects.using(using)
+                .select_for_update()
+                .select_related("test")
+                .get(pk=upload.pk)
+            )
+            if upload.test is not None:
+                deletions.release([name], using)
+                return upload.test
+
+            test = Test(
+                problem_id=upload.problem_id,
+                document_type=document_type,
+                document=name,
+                document_name=upload.filename,
+            )
+            test.save(using=using)
+            schedule_thumbnail(name, document_type)
+
+            upload.test = test
+            upload.save(update_fields=["test", "modified"])
+    except BaseException:
+        with transaction.atomic(using=using):
+            deletions.release([name], using)
+        raise
+
+    return test
+
+
+def discard_staging(path):
+    with suppress(FileNotFoundError):
+        os.unlink(path)
+
+
+def expire_uploads(using=DEFAULT_DB_ALIAS):
+    """
+    Deletes the uploads not touched for MEDICAL_UPLOAD_EXPIRY seconds
+    (abandoned, or committed long ago) and the staging files left without
+    upload. Returns the number of (uploads, files) deleted.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.MEDICAL_UPLOAD_EXPIRY)
+    # their staging files are removed after commit (see test_upload_deleted)
+    uploads = TestUpload.objects.using(using).filter(modified__lt=cutoff).delete()[0]
+
+    files = 0
+    with suppress(FileNotFoundError), os.scandir(upload_dir()) as entries:
+        stale = {}
+        for entry in entries:
+            name, extension = os.path.splitext(entry.name)
+            if extension != ".part" or not entry.is_file(follow_symlinks=False):
+                continue
+            if entry.stat().st_mtime >= cutoff.timestamp():
+                continue
+            with suppress(ValueError):
+                stale[uuid.UUID(name)] = entry.path
+
+        existing = set(
+            TestUpload.objects.using(using)
+            .filter(pk__in=stale)
+            .values_list("pk", flat=True)
+        )
+        for pk, path in stale.items():
+            if pk not in existing:
+                discard_staging(path)
+                files += 1
+
+    return uploads, files
@@ -24,15 +24,18 @@ from .views import (
     HistoryAntecedentsDetail,
     HistoryAntecedentsUpdate,
     HistoryList,
+    MedicalExport,
     PatientCreate,
     PatientDelete,
     PatientDetail,
     PatientListView,
     PatientMedicalReport,
+    PatientMedicalReportPDF,
     PatientRedirectDetail,
     PatientRelatives,
     PatientSearch,
     PatientTests,
+    PatientTestsArchive,
     PatientUpdate,
     ProblemConnections,
     ProblemCreate,
@@ -41,8 +44,15 @@ from .views import (
     ProblemList,
     ProblemSearch,
     ProblemTestDelete,
+    ProblemTestDownload,
     ProblemTests,
+    ProblemTestThumbnail,
     ProblemUpdate,
+    ReportBatchCreate,
+    ReportBatchDetail,
+    ReportBatchDownload,
+    TestUploadCreate,
+    TestUploadDetail,
 )
 
 urlpatterns = [
@@ -91,6 +101,11 @@ urlpatterns = [
         PatientMedicalReport.as_view(),
         name="patient_medical_report",
     ),
+    re_path(
+        r"^patient/(?P<pk>\d+)/report/pdf/$",
+        PatientMedicalReportPDF.as_view(),
+        name="patient_medical_report_pdf",
+    ),
     re_path(
         r"^patient/(?P<pk>\d+)/relatives/$",
         PatientRelatives.as_view(),
@@ -101,6 +116,11 @@ urlpatterns = [
         PatientTests.as_view(),
         name="patient_tests",
     ),
+    re_path(
+        r"^patient/(?P<pk>\d+)/tests/archive/$",
+        PatientTestsArchive.as_view(),
+        name="patient_tests_archive",
+    ),
     re_path(
         r"^problem/search/$",
         ProblemSearch.as_view(),
@@ -146,6 +166,26 @@ urlpatterns = [
         ProblemTestDelete.as_view(),
         name="problem_test_delete",
     ),
+    re_path(
+        r"^test/(?P<pk>\d+)/download/$",
+        ProblemTestDownload.as_view(),
+        name="problem_test_download",
+    ),
+    re_path(
+        r"^test/(?P<pk>\d+)/thumbnail/$",
+        ProblemTestThumbnail.as_view(),
+        name="problem_test_thumbnail",
+    ),
+    re_path(
+        r"^problem/(?P<pk>\d+)/tests/upload/$",
+        TestUploadCreate.as_view(),
+        name="test_upload_add",
+    ),
+    re_path(
+        r"^test/upload/(?P<pk>[0-9a-f-]{36})/$",
+        TestUploadDetail.as_view(),
+        name="test_upload",
+    ),
     re_path(
         r"^patient/(?P<pk>\d+)/history/$",
         HistoryList.as_view(),
@@ -166,4 +206,24 @@ urlpatterns = [
         HistoryAntecedentsUpdate.as_view(),
         name="patient_history_antecedents_change",
     ),
+    re_path(
+        r"^export/(?P<model>[a-z]+)\.(?P<export_format>[a-z]+)$",
+        MedicalExport.as_view(),
+        name="medical_export",
+    ),
+    re_path(
+        r"^report/batch/$",
+        ReportBatchCreate.as_view(),
+        name="report_batch_add",
+    ),
+    re_path(
+        r"^report/batch/(?P<pk>[0-9a-f-]{36})/$",
+        ReportBatchDetail.as_view(),
+        name="report_batch",
+    ),
+    re_path(
+        r"^report/batch/(?P<pk>[0-9a-f-]{36})/download/$",
+        ReportBatchDownload.as_view(),
+        name="report_batch_download",
+    ),
 ]
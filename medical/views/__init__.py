@@ -14,6 +14,9 @@ from the split view modules.
 # Import base utilities
 from .base import logger
 
+# Export views
+from .export_views import MedicalExport
+
 # History views
 from .history_views import (
     HistoryAntecedentsCreate,
@@ -34,6 +37,7 @@ from .patient_views import (
     PatientRelatives,
     PatientSearch,
     PatientTests,
+    PatientTestsArchive,
     PatientUpdate,
 )
 
@@ -48,10 +52,22 @@ from .problem_views import (
     ProblemUpdate,
 )
 
+# Report views
+from .report_views import (
+    PatientMedicalReportPDF,
+    ReportBatchCreate,
+    ReportBatchDetail,
+    ReportBatchDownload,
+)
+
 # Test views
 from .test_views import (
     ProblemTestDelete,
+    ProblemTestDownload,
     ProblemTests,
+    ProblemTestThumbnail,
+    TestUploadCreate,
+    TestUploadDetail,
 )
 
 __all__ = [
@@ -69,6 +85,7 @@ __all__ = [
     "PatientRelatives",
     "PatientMedicalReport",
     "PatientTests",
+    "PatientTestsArchive",
     # Problem views
     "ProblemCreate",
     "ProblemUpdate",
@@ -85,4 +102,15 @@ __all__ = [
     # Test views
     "ProblemTests",
     "ProblemTestDelete",
+    "ProblemTestDownload",
+    "ProblemTestThumbnail",
+    "TestUploadCreate",
+    "TestUploadDetail",
+    # Export views
+    "MedicalExport",
+    # Report views
+    "PatientMedicalReportPDF",
+    "ReportBatchCreate",
+    "ReportBatchDetail",
+    "ReportBatchDownload",
 ]
@@ -26,6 +26,7 @@ from django.views.generic import (
     DetailView,
     ListView,
     RedirectView,
+    TemplateView,
     UpdateView,
 )
 from el_pagination.views import AjaxListView
@@ -0,0 +1,99 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Conditional GET (ETag / Last-Modified) for patient record pages."""
+
+import hashlib
+
+from django.contrib.messages import get_messages
+from django.middleware.csrf import get_token
+from django.utils import timezone, translation
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from ..models import Patient, ReportVersion
+
+
+def _csrf_secret(request):
+    # get_token() returns a new masking every call, but makes sure there is
+    # a secret (creating it when the client has none yet)
+    get_token(request)
+
+    return request.META["CSRF_COOKIE"]
+
+
+class PatientRecordConditionalMixin:
+    """
+    Answers GET and HEAD with 304 Not Modified when the client already has
+    the current page, after a single query reading the patient's
+    record_version, which moves whenever anything in the record changes,
+    and the staff names version.
+
+    record_patient_lookup is the Patient lookup matched against the pk URL
+    argument (e.g. "problem" for pages of a problem).
+    """
+
+    record_patient_lookup = "pk"
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD") or len(get_messages(request)):
+            # pending messages are shown once, in a fresh page
+            return super().dispatch(request, *args, **kwargs)
+
+        response = condition(
+            etag_func=self.get_record_etag,
+            last_modified_func=self.get_record_modified,
+        )(super().dispatch)(request, *args, **kwargs)
+        # browsers must revalidate every time (the page is private anyway)
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ("Cookie", "X-Requested-With"))
+
+        return response
+
+    def get_record(self):
+        if not hasattr(self, "_record"):
+            self._record = (
+                Patient.objects.filter(
+                    **{self.record_patient_lookup: self.kwargs["pk"]}
+                )
+                .values_list(
+                    "record_version",
+                    "record_modified",
+                    ReportVersion.current(ReportVersion.STAFF),
+                )
+                .first()
+            )
+
+        return self._record
+
+    def get_record_etag(self, request, *args, **kwargs):
+        record = self.get_record()
+        if record is None:
+            return None
+
+        return hashlib.sha1(
+            ":".join(
+                str(value)
+                for value in (
+                    *record,
+                    request.user.pk,
+                    # pages embed a CSRF token (logout form), rotated on login
+                    _csrf_secret(request),
+                    translation.get_language(),
+                    # ages shown in the page change with the date
+                    timezone.localdate(),
+                    # "show more" pages render another template
+                    request.headers.get("x-requested-with"),
+                )
+            ).encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+
+    def get_record_modified(self, request, *args, **kwargs):
+        record = self.get_record()
+
+        return record[1] if record else None
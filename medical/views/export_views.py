@@ -0,0 +1,37 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Bulk export views."""
+
+from django.contrib.auth.mixins import UserPassesTestMixin
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.views import View
+
+from ..exports import EXPORT_FORMATS, EXPORT_MODELS, export_rows
+from .base import LoginRequiredMixin
+
+
+class MedicalExport(LoginRequiredMixin, UserPassesTestMixin, View):
+    """Streams EXPORT_MODELS[model] as CSV or NDJSON (staff only)."""
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, model, export_format):
+        if model not in EXPORT_MODELS or export_format not in EXPORT_FORMATS:
+            raise Http404
+
+        response = StreamingHttpResponse(
+            export_rows(model, export_format),
+            content_type=f"{EXPORT_FORMATS[export_format]}; charset=utf-8",
+        )
+        filename = f"{model}-{timezone.localdate().isoformat()}.{export_format}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        response["Cache-Control"] = "private, no-store"
+
+        return response
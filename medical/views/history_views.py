@@ -23,9 +23,16 @@ from .base import (
     redirect,
     reverse,
 )
+from .conditional import PatientRecordConditionalMixin
+from .pagination import KeysetPaginationMixin
 
 
-class HistoryList(LoginRequiredMixin, AjaxListView):
+class HistoryList(
+    LoginRequiredMixin,
+    PatientRecordConditionalMixin,
+    KeysetPaginationMixin,
+    AjaxListView,
+):
     model = Problem
     template_name = "history_list.html"
     page_template = "includes/problem_list.html"
@@ -46,7 +53,9 @@ class HistoryList(LoginRequiredMixin, AjaxListView):
         )
 
 
-class HistoryAntecedentsDetail(LoginRequiredMixin, DetailView):
+class HistoryAntecedentsDetail(
+    LoginRequiredMixin, PatientRecordConditionalMixin, DetailView
+):
     model = History
     context_object_name = "history"
     template_name = "history_antecedents_detail.html"
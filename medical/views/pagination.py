@@ -0,0 +1,214 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Keyset (cursor) pagination for endless list views."""
+
+import datetime
+import json
+import operator
+from functools import reduce
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import F, Q
+from django.http import Http404
+from el_pagination.settings import LOADING, PAGE_LABEL, PER_PAGE
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Keeps microseconds, which DjangoJSONEncoder truncates."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime | datetime.time):
+            return o.isoformat()
+
+        return super().default(o)
+
+
+class CursorSerializer(signing.JSONSerializer):
+    def dumps(self, obj):
+        return json.dumps(obj, separators=(",", ":"), cls=CursorEncoder).encode(
+            "latin-1"
+        )
+
+
+class KeysetPaginationMixin:
+    """
+    Pages object_list seeking past the last row shown instead of using
+    OFFSET/LIMIT, so page N costs the same as page 1.
+
+    Rows are ordered by the queryset ordering (the model ordering if none),
+    plus the primary key as tie-breaker. The position is handed to the
+    client as an opaque signed cursor.
+    """
+
+    cursor_key = "cursor"
+    cursor_salt = "medical.keyset_pagination"
+    keyset_pagination = None  # defaults to settings.KEYSET_PAGINATION
+    keyset_count = None  # defaults to settings.KEYSET_PAGINATION_COUNT
+    per_page = PER_PAGE
+
+    def get_keyset_pagination(self):
+        if self.keyset_pagination is None:
+            return getattr(settings, "KEYSET_PAGINATION", True)
+
+        return self.keyset_pagination
+
+    def get_keyset_count(self):
+        if self.request.headers.get("x-requested-with") == "XMLHttpRequest":
+            # "show more" pages never display the total
+            return False
+        if self.keyset_count is None:
+            return getattr(settings, "KEYSET_PAGINATION_COUNT", True)
+
+        return self.keyset_count
+
+    def get_context_data(self, **kwargs):
+        queryset = kwargs.get("object_list")
+        if queryset is None:
+            return super().get_context_data(**kwargs)
+
+        if not self.get_keyset_pagination():
+            context = super().get_context_data(**kwargs)
+            context["result_count"] = queryset.count()
+            return context
+
+        result_count = queryset.count() if self.get_keyset_count() else None
+        kwargs["object_list"], start_index, next_cursor = self.paginate_keyset(queryset)
+        context = super().get_context_data(**kwargs)
+        context.update(
+            {
+                "keyset_pagination": True,
+                # item numbering, as el_pagination's {% get_pages %}
+                "pages": {"current_start_index": start_index},
+                "result_count": result_count,
+                "next_cursor": next_cursor,
+                "next_querystring": self.get_next_querystring(next_cursor),
+                "loading": LOADING,
+                "querystring_key": PAGE_LABEL,
+            }
+        )
+
+        return context
+
+    def get_next_querystring(self, cursor):
+        if cursor is None:
+            return None
+
+        query = self.request.GET.copy()
+        query.pop("querystring_key", None)
+        query[self.cursor_key] = cursor
+
+        return query.urlencode()
+
+    def paginate_keyset(self, queryset):
+        keys = self.get_keys(queryset)
+        queryset = queryset.order_by(*[self._order_by(*key) for key in keys])
+
+        start_index = 1
+        cursor = self.request.GET.get(self.cursor_key)
+        if cursor:
+            try:
+                start_index, values = signing.loads(
+                    cursor, salt=self.cursor_salt, serializer=CursorSerializer
+                )
+            except (signing.BadSignature, TypeError, ValueError):
+                raise Http404("Invalid cursor")
+            if not isinstance(values, list) or len(values) != len(keys):
+                raise Http404("Invalid cursor")
+            nulls_largest = connections[queryset.db].vendor in ("postgresql", "oracle")
+            queryset = queryset.filter(self._after(keys, values, nulls_largest))
+
+        page = list(queryset[: self.per_page + 1])
+        if len(page) <= self.per_page:
+            return page, start_index, None
+
+        page = page[: self.per_page]
+        values = [getattr(page[-1], attname) for _, attname, _, _ in keys]
+        next_cursor = signing.dumps(
+            [start_index + len(page), values],
+            salt=self.cursor_salt,
+            serializer=CursorSerializer,
+            compress=True,
+        )
+
+        return page, start_index, next_cursor
+
+    @staticmethod
+    def get_keys(queryset):
+        """
+        Returns (lookup, attname, descending, nullable) for every ordering key.
+        """
+        opts = queryset.model._meta
+        ordering = list(queryset.query.order_by or opts.ordering)
+
+        keys = []
+        for item in ordering:
+            if not isinstance(item, str) or "__" in item or item == "?":
+                raise ImproperlyConfigured(
+                    f"Keyset pagination can not order by {item!r}"
+                )
+            name = item.lstrip("-")
+            if name == "pk":
+                name = opts.pk.name
+            try:
+                field = opts.get_field(name)
+                attname, nullable = field.attname, field.null
+            except FieldDoesNotExist:
+                # annotation
+                attname, nullable = name, False
+            keys.append((name, attname, item.startswith("-"), nullable))
+
+        if opts.pk.name not in [name for name, _, _, _ in keys]:
+            # same direction as the last key, so one index scan serves both
+            descending = bool(keys) and keys[-1][2]
+            keys.append((opts.pk.name, opts.pk.attname, descending, False))
+
+        return keys
+
+    @staticmethod
+    def _order_by(name, attname, descending, nullable):
+        return F(name).desc() if descending else F(name).asc()
+
+    @staticmethod
+    def _after(keys, values, nulls_largest):
+        """
+        Q matching the rows that come after values in keys ordering.
+
+        NULLs keep the backend's native placement (the largest value on
+        PostgreSQL, the smallest on SQLite) so plain indexes serve the order.
+        """
+        conditions = []
+        equal = Q()
+        for (name, _, descending, nullable), value in zip(keys, values, strict=True):
+            nulls_after = descending != nulls_largest
+            if value is None:
+                beyond = None if nulls_after else Q(**{f"{name}__isnull": False})
+            else:
+                beyond = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+                if nullable and nulls_after:
+                    beyond |= Q(**{f"{name}__isnull": True})
+            if beyond is not None:
+                conditions.append(equal & beyond)
+
+            if value is None:
+                equal &= Q(**{f"{name}__isnull": True})
+            else:
+                equal &= Q(**{name: value})
+
+        after = reduce(operator.or_, conditions, Q(pk__in=[]))
+
+        # redundant bound on the first key: lets the database seek in the
+        # index matching the ordering instead of sorting every row
+        name, _, descending, nullable = keys[0]
+        if values[0] is not None and not (nullable and descending != nulls_largest):
+            after &= Q(**{f"{name}__{'lte' if descending else 'gte'}": values[0]})
+
+        return after
@@ -7,13 +7,23 @@
 
 """Patient-related views."""
 
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+from django.views import View
+
+from openclinic.replicas import ReadReplicaMixin
+
+from ..archives import document_members, zip_stream
 from ..forms import (
     PatientForm,
     PatientRelativesForm,
     PatientSearchByMedicalProblemForm,
     PatientSearchForm,
 )
-from ..models import History, Patient, Problem
+from ..models import History, Patient, Problem, Test
+from ..reports import render_report
+from ..search import PATIENT_NAME_FIELDS
 from .base import (
     AjaxListView,
     CreateView,
@@ -22,9 +32,9 @@ from .base import (
     DetailView,
     ListView,
     LoginRequiredMixin,
-    Q,
     RedirectView,
     SuccessMessageMixin,
+    TemplateView,
     UpdateView,
     _,
     get_object_or_404,
@@ -32,6 +42,8 @@ from .base import (
     reverse,
     slugify,
 )
+from .conditional import PatientRecordConditionalMixin
+from .pagination import KeysetPaginationMixin
 
 
 class PatientCreate(LoginRequiredMixin, SuccessMessageMixin, CreateView):
@@ -76,7 +88,7 @@ class PatientDelete(
         return reverse(self.success_url_name)
 
 
-class PatientList(LoginRequiredMixin, AjaxListView):
+class PatientList(LoginRequiredMixin, KeysetPaginationMixin, AjaxListView):
     model = Patient
     queryset = Patient.objects.select_related("doctor_assigned")
     template_name = "patient_search.html"
@@ -91,12 +103,14 @@ class PatientList(LoginRequiredMixin, AjaxListView):
         return context
 
 
-class PatientListView(PatientList):
+class PatientListView(ReadReplicaMixin, PatientList):
     def get_queryset(self):
         queryset = super().get_queryset()
 
         search_type = self.request.GET.get("search_type", None)
         search_text = self.request.GET.get("search_text", "")
+        if search_type in PATIENT_NAME_FIELDS:
+            return queryset.search_by_name(search_text, field=search_type)
         if search_type:
             search_filter = f"{search_type}__icontains"
             return queryset.filter(**{search_filter: search_text})
@@ -104,17 +118,13 @@ class PatientListView(PatientList):
         return None
 
 
-class PatientSearch(PatientList):
+class PatientSearch(ReadReplicaMixin, PatientList):
     def get_queryset(self):
         queryset = super().get_queryset()
         pattern = self.request.GET.get("q", None)
 
         if pattern:
-            return queryset.filter(
-                Q(first_name__icontains=pattern)
-                | Q(last_name__icontains=pattern)
-                | Q(last_name_optional__icontains=pattern)
-            )
+            return queryset.search_by_name(pattern)
 
         return queryset
 
@@ -130,7 +140,7 @@ class PatientRedirectDetail(LoginRequiredMixin, RedirectView):
         return super().get(self, request, *args, **kwargs)
 
 
-class PatientDetail(LoginRequiredMixin, DetailView):
+class PatientDetail(LoginRequiredMixin, PatientRecordConditionalMixin, DetailView):
     model = Patient
     context_object_name = "patient"
     template_name = "patient_detail.html"
@@ -156,35 +166,23 @@ class PatientRelatives(LoginRequiredMixin, UpdateView):
         return super().form_valid(form)
 
 
-class PatientMedicalReport(LoginRequiredMixin, DetailView):
-    model = Patient
-    context_object_name = "patient"
+class PatientMedicalReport(LoginRequiredMixin, ReadReplicaMixin, TemplateView):
     template_name = "patient_medical_report.html"
 
     def get_context_data(self, **kwargs):
-        patient_id = self.kwargs.get("pk", None)
         context = super().get_context_data(**kwargs)
-        patient = get_object_or_404(Patient, pk=patient_id)
-        history = get_object_or_404(History, patient__id=patient_id)
-
-        context["patient"] = patient
-        context["history"] = history
-        # Optimized: select_related reduces N+1 queries when accessing doctor
-        context["problem_list"] = (
-            Problem.opened.filter(patient__id=self.kwargs["pk"])
-            .select_related("doctor")
-            .order_by("-modified")
-        )
-        context["closed_problem_list"] = (
-            Problem.closed.filter(patient__id=self.kwargs["pk"])
-            .select_related("doctor")
-            .order_by("-modified")
-        )
+        try:
+            context["report_title"], report = render_report(
+                self.kwargs["pk"], self.request
+            )
+        except (Patient.DoesNotExist, History.DoesNotExist):
+            raise Http404
+        context["report"] = mark_safe(report)
 
         return context
 
 
-class PatientTests(LoginRequiredMixin, ListView):
+class PatientTests(LoginRequiredMixin, PatientRecordConditionalMixin, ListView):
     model = Patient
     template_name = "patient_tests.html"
 
@@ -195,9 +193,28 @@ class PatientTests(LoginRequiredMixin, ListView):
 
     def get_queryset(self):
         super().get_queryset()
-        from ..models import Test
-
         # Optimized: select_related reduces queries when accessing problem and patient
         return Test.objects.filter(
             problem__patient__id=self.kwargs["pk"]
         ).select_related("problem", "problem__patient")
+
+
+class PatientTestsArchive(LoginRequiredMixin, View):
+    """Streams a ZIP archive of the documents of a patient's tests."""
+
+    def get(self, request, pk):
+        patient = get_object_or_404(Patient, pk=pk)
+        tests = (
+            Test.objects.filter(problem__patient=patient)
+            .select_related("problem")
+            .order_by("problem__order_number", "created", "pk")
+        )
+        response = StreamingHttpResponse(
+            zip_stream(document_members(tests.iterator())),
+            content_type="application/zip",
+        )
+        filename = f"{slugify(patient)}-{timezone.localdate().isoformat()}.zip"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        response["Cache-Control"] = "private, no-store"
+
+        return response
@@ -7,6 +7,8 @@
 
 """Problem-related views."""
 
+from openclinic.replicas import ReadReplicaMixin
+
 from ..forms import (
     PatientSearchByMedicalProblemForm,
     PatientSearchForm,
@@ -14,6 +16,7 @@ from ..forms import (
     ProblemForm,
 )
 from ..models import Patient, Problem
+from ..search import PROBLEM_SEARCH_FIELDS
 from .base import (
     AjaxListView,
     CreateView,
@@ -30,6 +33,8 @@ from .base import (
     messages,
     reverse,
 )
+from .conditional import PatientRecordConditionalMixin
+from .pagination import KeysetPaginationMixin
 
 
 class ProblemCreate(LoginRequiredMixin, ProblemClosingMixin, CreateView):
@@ -71,9 +76,11 @@ class ProblemUpdate(
         return context
 
 
-class ProblemSearch(LoginRequiredMixin, AjaxListView):
+class ProblemSearch(
+    LoginRequiredMixin, ReadReplicaMixin, KeysetPaginationMixin, AjaxListView
+):
     model = Problem
-    queryset = Problem.objects.select_related("patient", "last_doctor_assigned")
+    queryset = Problem.objects.select_related("patient", "doctor")
     template_name = "problem_search.html"
     page_template = "includes/problem_list.html"
 
@@ -90,14 +97,19 @@ class ProblemSearch(LoginRequiredMixin, AjaxListView):
 
         search_type = self.request.GET.get("search_type_problem", None)
         search_text = self.request.GET.get("search_text_problem", "")
-        if search_type:
-            search_filter = f"{search_type}__icontains"
-            return queryset.filter(**{search_filter: search_text})
+        if search_type in PROBLEM_SEARCH_FIELDS:
+            return queryset.search(search_text, fields=(search_type,))
 
         return None
 
 
-class ProblemList(LoginRequiredMixin, PatientContextMixin, AjaxListView):
+class ProblemList(
+    LoginRequiredMixin,
+    PatientRecordConditionalMixin,
+    PatientContextMixin,
+    KeysetPaginationMixin,
+    AjaxListView,
+):
     model = Problem
     template_name = "problem_list.html"
     page_template = "includes/problem_list.html"
@@ -112,10 +124,11 @@ class ProblemList(LoginRequiredMixin, PatientContextMixin, AjaxListView):
         )
 
 
-class ProblemDetail(LoginRequiredMixin, DetailView):
+class ProblemDetail(LoginRequiredMixin, PatientRecordConditionalMixin, DetailView):
     model = Problem
     template_name = "problem_detail.html"
     context_object_name = "problem"
+    record_patient_lookup = "problem"
 
     def get_object(self, queryset=None):
         # Optimized: select_related loads patient in a single query
@@ -0,0 +1,107 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""PDF medical report views."""
+
+from django.contrib.auth.mixins import UserPassesTestMixin
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import translation
+from django.views import View
+
+from openclinic.replicas import ReadReplicaMixin
+
+from ..archives import zip_stream
+from ..forms import ReportBatchForm
+from ..models import History, Patient, ReportBatch
+from ..report_batches import batch_members, schedule_batch
+from ..reports import render_report_pdf
+from .base import LoginRequiredMixin, get_object_or_404, reverse, slugify
+
+
+class PatientMedicalReportPDF(LoginRequiredMixin, ReadReplicaMixin, View):
+    """Sends the medical report of a patient as PDF."""
+
+    def get(self, request, pk):
+        try:
+            title, pdf = render_report_pdf(pk)
+        except (Patient.DoesNotExist, History.DoesNotExist):
+            raise Http404
+
+        response = HttpResponse(pdf, content_type="application/pdf")
+        response["Content-Disposition"] = f'inline; filename="{slugify(title)}.pdf"'
+        response["Cache-Control"] = "private, no-store"
+
+        return response
+
+
+def batch_status(batch):
+    status = {
+        "url": reverse("report_batch", args=(batch.pk,)),
+        "status": batch.status,
+        "total": batch.total,
+        "done": batch.done,
+        "failed": batch.failed,
+        "errors": batch.errors,
+    }
+    if batch.done:
+        status["download"] = reverse("report_batch_download", args=(batch.pk,))
+
+    return status
+
+
+class StaffRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
+    def test_func(self):
+        return self.request.user.is_staff
+
+
+class ReportBatchCreate(StaffRequiredMixin, View):
+    """Starts the rendering of the PDF reports of several patients."""
+
+    def post(self, request):
+        form = ReportBatchForm(request.POST)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+
+        patients = form.cleaned_data["patients"]
+        batch = ReportBatch.objects.create(
+            user=request.user,
+            patients=patients,
+            total=len(patients),
+            language=translation.get_language(),
+        )
+        schedule_batch(batch)
+
+        status = batch_status(batch)
+        response = JsonResponse(status, status=202)
+        response["Location"] = status["url"]
+
+        return response
+
+
+class ReportBatchDetail(StaffRequiredMixin, View):
+    """Progress of a batch of PDF reports."""
+
+    def get(self, request, pk):
+        response = JsonResponse(batch_status(get_object_or_404(ReportBatch, pk=pk)))
+        response["Cache-Control"] = "no-store"
+
+        return response
+
+
+class ReportBatchDownload(StaffRequiredMixin, View):
+    """Streams a ZIP archive of the reports rendered in a batch."""
+
+    def get(self, request, pk):
+        batch = get_object_or_404(ReportBatch, pk=pk)
+        response = StreamingHttpResponse(
+            zip_stream(batch_members(batch)), content_type="application/zip"
+        )
+        filename = f"reports-{batch.created:%Y-%m-%d}-{str(batch.pk)[:8]}.zip"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        response["Cache-Control"] = "private, no-store"
+
+        return response
@@ -0,0 +1,147 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Protected file downloads.
+
+With ``MEDICAL_SENDFILE = "x-accel-redirect"`` (nginx) or ``"x-sendfile"``
+(Apache, lighttpd) the view only checks access and the front proxy sends
+the file. Otherwise a ``FileResponse`` is returned, answering ``Range`` and
+``If-None-Match`` requests. Its file is handed to the WSGI server's
+``wsgi.file_wrapper`` (``sendfile()`` in gunicorn), so the bytes are copied
+by the kernel, not by the worker.
+"""
+
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, quote_etag
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class FileRange:
+    """Reads up to length bytes of file, from its current position."""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+        self.name = file.name
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Returns the (start, end) bytes, both included, of a single range
+    header, None when it must be ignored (the whole file is sent) or
+    False when it is not satisfiable.
+    """
+    match = RANGE_RE.match(header.replace(" ", ""))
+    if match is None:
+        return None
+
+    start, end = match.groups()
+    if not start:
+        if not end:
+            return None
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start > end:
+        return False
+
+    return start, end
+
+
+def sendfile_response(
+    request,
+    path,
+    name,
+    content_type=None,
+    filename="",
+    etag=None,
+    cache_control="private, no-cache",
+    **kwargs,
+):
+    """
+    Returns the response sending the file at path (name is its path in
+    MEDIA_ROOT). The ETag defaults to the file size and time.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError as e:
+        raise Http404 from e
+
+    etag = quote_etag(etag or f"{stat.st_size:x}-{int(stat.st_mtime):x}")
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if response is None:
+        response = _file_response(request, path, name, stat.st_size, etag, **kwargs)
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    response["Cache-Control"] = cache_control
+    if content_type and response.status_code != 304:
+        response["Content-Type"] = content_type
+    if filename and response.status_code in (200, 206):
+        response["Content-Disposition"] = content_disposition_header(
+            kwargs.get("as_attachment", False), filename
+        )
+
+    return response
+
+
+def _file_response(request, path, name, size, etag, as_attachment=False):
+    if settings.MEDICAL_SENDFILE == "x-accel-redirect":
+        response = HttpResponse()
+        response["X-Accel-Redirect"] = settings.MEDICAL_SENDFILE_URL + quote(name)
+        return response
+    if settings.MEDICAL_SENDFILE == "x-sendfile":
+        response = HttpResponse()
+        response["X-Sendfile"] = path
+        return response
+
+    byte_range = None
+    if_range = request.headers.get("If-Range")
+    if "Range" in request.headers and (not if_range or if_range == etag):
+        byte_range = parse_range(request.headers["Range"], size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    file = open(path, "rb")  # noqa: SIM115 (closed by the response)
+    if byte_range is None:
+        response = FileResponse(file, as_attachment=as_attachment)
+    else:
+        start, end = byte_range
+        file.seek(start)
+        response = FileResponse(
+            FileRange(file, end - start + 1), as_attachment=as_attachment, status=206
+        )
+        response["Content-Length"] = end - start + 1
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Accept-Ranges"] = "bytes"
+
+    return response
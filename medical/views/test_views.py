@@ -7,8 +7,20 @@
 
 """Test-related views."""
 
-from ..forms import TestForm
-from ..models import Problem, Test
+import mimetypes
+import os
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views import View
+
+from openclinic.metrics import count_upload
+
+from ..forms import TestForm, TestUploadForm
+from ..models import Problem, Test, TestUpload
+from ..storage import document_storage, is_blob
+from ..thumbnails import thumbnail_name
+from ..uploads import OffsetMismatchError, UploadError, append_chunk, commit_upload
 from .base import (
     CreateView,
     DeleteView,
@@ -18,6 +30,18 @@ from .base import (
     messages,
     reverse,
 )
+from .sendfile import sendfile_response
+
+# shown in the browser, other documents are downloaded (an uploaded HTML
+# page must not run in the application origin)
+INLINE_CONTENT_TYPES = {
+    "application/pdf",
+    "image/gif",
+    "image/jpeg",
+    "image/png",
+    "image/webp",
+    "text/plain",
+}
 
 
 class ProblemTests(LoginRequiredMixin, CreateView):
@@ -45,6 +69,12 @@ class ProblemTests(LoginRequiredMixin, CreateView):
 
         return context
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        count_upload(self.object.document.size, "form")
+
+        return response
+
     def get_success_url(self):
         messages.success(self.request, _("Medical test, %s, added!") % self.object)
 
@@ -68,3 +98,138 @@ class ProblemTestDelete(LoginRequiredMixin, DeleteView):
         )
 
         return reverse("problem_tests", args=(self.object.problem.id,))
+
+
+class ProblemTestDownload(LoginRequiredMixin, View):
+    """Sends the document of a test (see sendfile_response)."""
+
+    def get(self, request, pk):
+        test = get_object_or_404(Test, pk=pk)
+        name = test.document.name
+        filename = test.filename()
+        content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+        return sendfile_response(
+            request,
+            test.document.path,
+            name,
+            content_type=content_type,
+            filename=filename,
+            # blobs are named after their content digest
+            etag=os.path.basename(name).partition(".")[0] if is_blob(name) else None,
+            as_attachment=content_type not in INLINE_CONTENT_TYPES,
+        )
+
+
+class ProblemTestThumbnail(LoginRequiredMixin, View):
+    """Sends the preview of a test document (see medical.thumbnails)."""
+
+    def get(self, request, pk):
+        test = get_object_or_404(Test, pk=pk, has_thumbnail=True)
+        name = thumbnail_name(test.document.name)
+
+        return sendfile_response(
+            request,
+            document_storage().path(name),
+            name,
+            content_type="image/jpeg",
+            # the preview of a test never changes
+            cache_control="private, max-age=86400",
+        )
+
+
+def upload_status(upload):
+    return {
+        "url": reverse("test_upload", args=(upload.pk,)),
+        "offset": upload.offset,
+        "size": upload.size,
+        "chunk_size": settings.MEDICAL_UPLOAD_CHUNK_SIZE,
+    }
+
+
+class TestUploadCreate(LoginRequiredMixin, View):
+    """Starts a chunked upload of a document (see medical.uploads)."""
+
+    def post(self, request, pk):
+        problem = get_object_or_404(Problem, pk=pk)
+        form = TestUploadForm(request.POST)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+
+        upload = form.save(commit=False)
+        upload.problem = problem
+        upload.user = request.user
+        upload.save()
+
+        status = upload_status(upload)
+        response = JsonResponse(status, status=201)
+        response["Location"] = status["url"]
+
+        return response
+
+
+class TestUploadDetail(LoginRequiredMixin, View):
+    """
+    GET returns the confirmed offset, PATCH appends a chunk, POST creates
+    the test and DELETE aborts the upload.
+    """
+
+    def get_upload(self):
+        return get_object_or_404(
+            TestUpload, pk=self.kwargs["pk"], user=self.request.user
+        )
+
+    def get(self, request, pk):
+        response = JsonResponse(upload_status(self.get_upload()))
+        response["Cache-Control"] = "no-store"
+
+        return response
+
+    def patch(self, request, pk):
+        upload = self.get_upload()
+        try:
+            offset = int(request.headers["Upload-Offset"])
+            length = int(request.headers["Content-Length"])
+        except (KeyError, ValueError):
+            return JsonResponse(
+                {"error": "Upload-Offset and Content-Length headers required"},
+                status=400,
+            )
+        if length > settings.MEDICAL_UPLOAD_CHUNK_SIZE:
+            return JsonResponse({"error": "Chunk too large"}, status=413)
+
+        # one chunk in memory
+        data = request.read(length)
+        if len(data) != length:
+            return JsonResponse({"error": "Incomplete chunk"}, status=400)
+
+        try:
+            upload.offset = append_chunk(upload, offset, data)
+        except OffsetMismatchError as e:
+            upload.offset = e.offset
+            return JsonResponse({"error": str(e), **upload_status(upload)}, status=409)
+        except UploadError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        return JsonResponse(upload_status(upload))
+
+    def post(self, request, pk):
+        try:
+            test = commit_upload(self.get_upload())
+        except UploadError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        messages.success(request, _("Medical test, %s, added!") % test.filename())
+
+        return JsonResponse(
+            {
+                "test": test.pk,
+                "redirect": reverse("problem_tests", args=(test.problem_id,)),
+            }
+        )
+
+    def delete(self, request, pk):
+        # the staging file is removed after commit
+        self.get_upload().delete()
+
+        return HttpResponse(status=204)
@@ -7,15 +7,39 @@
 
 """Health check endpoints for container orchestration."""
 
-from django.db import connection
+from django.db import connection, connections
 from django.http import JsonResponse
 
 
+def database_connections():
+    """Returns the pool statistics, or the persistent connection
+    settings, of each database.
+
+    Returns:
+        dict: Statistics by database alias.
+    """
+    stats = {}
+    for alias in connections:
+        wrapper = connections[alias]
+        # PostgreSQL with OPTIONS["pool"] (psycopg_pool.ConnectionPool)
+        pool = getattr(wrapper, "pool", None)
+        if pool is not None:
+            stats[alias] = {"pool": pool.get_stats()}
+        else:
+            stats[alias] = {
+                "conn_max_age": wrapper.settings_dict["CONN_MAX_AGE"],
+                "health_checks": wrapper.settings_dict["CONN_HEALTH_CHECKS"],
+            }
+
+    return stats
+
+
 def health_check(request):
     """Basic health check endpoint.
 
     Returns:
-        JsonResponse: Health status with database connectivity.
+        JsonResponse: Health status with database connectivity and
+        connection pool statistics.
     """
     db_status = "healthy"
     try:
@@ -30,6 +54,7 @@ def health_check(request):
         {
             "status": "healthy" if status == 200 else "unhealthy",
             "database": db_status,
+            "connections": database_connections(),
         },
         status=status,
     )
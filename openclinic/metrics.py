@@ -0,0 +1,171 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Prometheus metrics, served at /metrics.
+
+Requests (by URL name), their latency, queries and SQL time are recorded by
+RequestTimingMiddleware; uploaded bytes, report cache hits and the
+connection pools of the databases too. Recording a request costs a few
+microseconds. Without prometheus_client (``pip install
+openclinic[production]``) nothing is recorded.
+
+gunicorn workers are separate processes: with ``PROMETHEUS_MULTIPROC_DIR``
+(an empty directory shared by the workers, see gunicorn.conf.py) each one
+writes its metrics there and /metrics adds them up.
+
+/metrics answers the addresses in ``METRICS_ALLOWED_IPS`` and the requests
+with the ``Authorization: Bearer <METRICS_TOKEN>`` header.
+"""
+
+import hmac
+import ipaddress
+import os
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:
+    prometheus_client = None
+
+METHODS = frozenset(("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"))
+
+# seconds between the readings of the pool statistics of a process
+POOL_INTERVAL = 5
+
+if prometheus_client is not None:
+    REQUESTS = prometheus_client.Counter(
+        "openclinic_requests",
+        "Requests by URL name.",
+        ["view", "method", "status"],
+    )
+    LATENCY = prometheus_client.Histogram(
+        "openclinic_request_duration_seconds",
+        "Time answering a request (streamed content excluded).",
+        ["view"],
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    )
+    QUERIES = prometheus_client.Histogram(
+        "openclinic_request_queries",
+        "Database queries per request.",
+        ["view"],
+        buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
+    )
+    SQL = prometheus_client.Histogram(
+        "openclinic_request_sql_seconds",
+        "Database time per request.",
+        ["view"],
+        buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+    )
+    UPLOAD_BYTES = prometheus_client.Counter(
+        "openclinic_upload_bytes",
+        "Bytes of test documents uploaded (form: whole documents, chunk: "
+        "chunked uploads).",
+        ["kind"],
+    )
+    CACHE = prometheus_client.Counter(
+        "openclinic_cache_requests",
+        "Cache lookups by result (hit, miss).",
+        ["cache", "result"],
+    )
+    POOL = prometheus_client.Gauge(
+        "openclinic_db_pool_connections",
+        "Connections of the database pools (size, available, waiting requests).",
+        ["database", "state"],
+        multiprocess_mode="livesum",
+    )
+
+_pools_read = 0.0
+
+
+def record_request(request, status, timing, duration):
+    """Records a request timed by RequestTimingMiddleware."""
+    if prometheus_client is None:
+        return
+
+    match = request.resolver_match
+    view = match.view_name if match is not None else "unmatched"
+    method = request.method if request.method in METHODS else "other"
+    REQUESTS.labels(view, method, status).inc()
+    LATENCY.labels(view).observe(duration)
+    QUERIES.labels(view).observe(timing.queries)
+    SQL.labels(view).observe(timing.sql)
+
+    if time.monotonic() - _pools_read >= POOL_INTERVAL:
+        read_pools()
+
+
+def read_pools():
+    """Records the statistics of the connection pools of this process."""
+    global _pools_read
+
+    _pools_read = time.monotonic()
+    for alias in connections:
+        # PostgreSQL with OPTIONS["pool"] (see openclinic.health)
+        pool = getattr(connections[alias], "pool", None)
+        if pool is None:
+            continue
+        stats = pool.get_stats()
+        POOL.labels(alias, "size").set(stats.get("pool_size", 0))
+        POOL.labels(alias, "available").set(stats.get("pool_available", 0))
+        POOL.labels(alias, "waiting").set(stats.get("requests_waiting", 0))
+
+
+def count_upload(size, kind):
+    if prometheus_client is not None:
+        UPLOAD_BYTES.labels(kind).inc(size)
+
+
+def count_cache(cache, hit):
+    if prometheus_client is not None:
+        CACHE.labels(cache, "hit" if hit else "miss").inc()
+
+
+def _allowed(request):
+    token = settings.METRICS_TOKEN
+    if token and hmac.compare_digest(
+        request.headers.get("Authorization", "").encode(),
+        f"Bearer {token}".encode(),
+    ):
+        return True
+
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+
+    return any(
+        address in ipaddress.ip_network(network)
+        for network in settings.METRICS_ALLOWED_IPS
+    )
+
+
+def metrics_view(request):
+    """Metrics in the Prometheus text format."""
+    if not _allowed(request):
+        return HttpResponseForbidden()
+    if prometheus_client is None:
+        raise ImproperlyConfigured(
+            "Metrics require prometheus_client: pip install openclinic[production]"
+        )
+
+    read_pools()
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+
+    return HttpResponse(
+        prometheus_client.generate_latest(registry),
+        content_type=prometheus_client.CONTENT_TYPE_LATEST,
+    )
@@ -0,0 +1,197 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Project middleware."""
+
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.http import FileResponse
+from django.middleware import gzip
+
+from . import metrics, replicas
+
+logger = logging.getLogger(__name__)
+
+
+class GZipMiddleware(gzip.GZipMiddleware):
+    """
+    GZipMiddleware leaving file responses alone: they may be byte ranges,
+    are sent with sendfile() and documents are mostly compressed already.
+    So are ZIP archives.
+    """
+
+    def process_response(self, request, response):
+        if isinstance(response, FileResponse):
+            return response
+        if response.get("Content-Type") == "application/zip":
+            return response
+
+        return super().process_response(request, response)
+
+
+class ReplicaMiddleware:
+    """
+    Pins a browser that wrote to the primary database for
+    DATABASE_REPLICA_PIN_SECONDS (see openclinic.replicas).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reads, token = replicas.start(replicas.PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            replicas.finish(token)
+
+        if reads.wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                replicas.PIN_COOKIE,
+                "1",
+                max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite="Lax",
+            )
+
+        return response
+
+
+class QueryBudgetError(Exception):
+    """A view ran more queries than settings.REQUEST_QUERY_BUDGETS allows."""
+
+
+class RequestTiming:
+    """Queries, SQL time and template render time of a request."""
+
+    __slots__ = (
+        "queries",
+        "slow",
+        "slow_threshold",
+        "sql",
+        "template",
+        "template_start",
+        "view",
+    )
+
+    def __init__(self, slow_threshold=None):
+        self.view = None
+        self.queries = 0
+        self.sql = 0.0
+        self.template = 0.0
+        self.template_start = None
+        # (database alias, sql, params, seconds) of the slow queries
+        self.slow = []
+        self.slow_threshold = float("inf") if slow_threshold is None else slow_threshold
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute wrapper of the database connections
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.sql += duration
+            self.queries += 1
+            if duration >= self.slow_threshold and not many:
+                self.slow.append((context["connection"].alias, sql, params, duration))
+
+    def rendered(self, response):
+        self.template += time.perf_counter() - self.template_start
+
+
+class RequestTimingMiddleware:
+    """
+    Counts the queries of each request and times its SQL, its template
+    rendering (template responses) and the whole request. Sends them in the
+    Server-Timing header (REQUEST_SERVER_TIMING), logs them with the view
+    name, records them in the Prometheus metrics (see openclinic.metrics),
+    records the queries slower than SLOW_QUERY_THRESHOLD_MS (see
+    medical.slow_queries) and checks the view's budget in
+    REQUEST_QUERY_BUDGETS: over it, a warning is logged, or QueryBudgetError
+    is raised with REQUEST_QUERY_BUDGET_STRICT (tests).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        timing = request.timing = RequestTiming(
+            None if threshold is None else threshold / 1000
+        )
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(timing))
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        if settings.REQUEST_SERVER_TIMING:
+            response["Server-Timing"] = (
+                f'sql;dur={timing.sql * 1000:.1f};desc="{timing.queries} queries", '
+                f"template;dur={timing.template * 1000:.1f}, "
+                f"total;dur={total * 1000:.1f}"
+            )
+        logger.info(
+            "view=%s method=%s status=%s queries=%d sql_ms=%.1f template_ms=%.1f "
+            "total_ms=%.1f",
+            timing.view,
+            request.method,
+            response.status_code,
+            timing.queries,
+            timing.sql * 1000,
+            timing.template * 1000,
+            total * 1000,
+            extra={
+                "view": timing.view,
+                "status": response.status_code,
+                "queries": timing.queries,
+                "sql_ms": round(timing.sql * 1000, 1),
+                "template_ms": round(timing.template * 1000, 1),
+                "total_ms": round(total * 1000, 1),
+            },
+        )
+
+        metrics.record_request(request, response.status_code, timing, total)
+        if timing.slow:
+            self.record_slow_queries(timing)
+
+        budget = settings.REQUEST_QUERY_BUDGETS.get(timing.view)
+        if budget is not None and timing.queries > budget:
+            message = (
+                f"{timing.view} ran {timing.queries} queries, "
+                f"over its budget of {budget}"
+            )
+            if settings.REQUEST_QUERY_BUDGET_STRICT:
+                raise QueryBudgetError(message)
+            logger.warning(message)
+
+        return response
+
+    @staticmethod
+    def record_slow_queries(timing):
+        from medical import slow_queries
+
+        try:
+            slow_queries.record(timing.view, timing.slow)
+        except DatabaseError:
+            logger.exception("Slow queries of %s not recorded", timing.view)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.timing.view = getattr(view_func, "view_class", view_func).__name__
+
+    def process_template_response(self, request, response):
+        # the last hook before rendering, this middleware being the first
+        request.timing.template_start = time.perf_counter()
+        response.add_post_render_callback(request.timing.rendered)
+        return response
@@ -0,0 +1,125 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Reads from the read replicas (settings.DATABASE_REPLICAS).
+
+Only the reads made inside ``read_replica()`` (the search, list and report
+views, the ajax_select lookups) go to a replica; everything else, writes
+and background jobs included, uses the primary (``default``) database.
+
+A replica lags behind the primary, so a browser that wrote is pinned to the
+primary for ``DATABASE_REPLICA_PIN_SECONDS`` by ``ReplicaMiddleware``: a
+doctor never misses their own changes. Reads after a write in the same
+request, and reads inside a transaction, use the primary too.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# set by browsers that wrote recently
+PIN_COOKIE = "primary_db"
+
+
+class Reads:
+    """Where the reads of the current request may go."""
+
+    __slots__ = ("pinned", "replica", "wrote")
+
+    def __init__(self, pinned=False):
+        self.replica = False
+        self.pinned = pinned
+        self.wrote = False
+
+    @property
+    def use_replica(self):
+        return self.replica and not (self.pinned or self.wrote)
+
+
+_reads = ContextVar("reads", default=None)
+
+
+def start(pinned=False):
+    """Starts the reads of a request. Returns (Reads, token for finish)."""
+    reads = Reads(pinned)
+    return reads, _reads.set(reads)
+
+
+def finish(token):
+    _reads.reset(token)
+
+
+@contextmanager
+def read_replica():
+    """Sends the reads inside the block to a replica (also a decorator)."""
+    reads = _reads.get()
+    token = None
+    if reads is None:
+        reads, token = start()
+    replica = reads.replica
+    reads.replica = True
+    try:
+        yield reads
+    finally:
+        reads.replica = replica
+        if token is not None:
+            finish(token)
+
+
+class ReadReplicaMixin:
+    """Class based views reading from a replica (see read_replica)."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with read_replica():
+            return super().dispatch(request, *args, **kwargs)
+
+
+def _primary_models():
+    # a new login is seen at once
+    return ("sessions.session", settings.AUTH_USER_MODEL.lower())
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        reads = _reads.get()
+        if reads is None or not reads.use_replica or not settings.DATABASE_REPLICAS:
+            return None
+        if model._meta.label_lower in _primary_models():
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # the transaction may have changed the rows
+            return None
+
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        reads = _reads.get()
+        if reads is not None:
+            reads.wrote = True
+
+        # objects read from a replica are saved to the primary
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db in settings.DATABASE_REPLICAS:
+            return DEFAULT_DB_ALIAS
+
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+
+        return None
@@ -22,6 +22,7 @@ import os
 
 from django.utils.translation import gettext_lazy as _
 
+from .database_conf import *
 from .endless_conf import *
 from .openclinic_conf import *
 
@@ -37,17 +38,6 @@ MANAGERS = ADMINS
 
 DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": "openclinic.db",
-        "USER": "",
-        "PASSWORD": "",
-        "HOST": "",
-        "PORT": "",
-    }
-}
-
 TIME_ZONE = "Europe/Madrid"
 LANGUAGE_CODE = "en-us"
 USE_I18N = True
@@ -67,6 +57,19 @@ LOCALE_PATHS = (os.path.join(BASE_DIR, "locale"),)
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 MEDIA_URL = "/media/"
 
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+    # medical test documents, stored once per content
+    "medical_documents": {
+        "BACKEND": "medical.storage.ContentAddressedStorage",
+    },
+}
+
 STATIC_ROOT = ""
 STATIC_URL = "/static/"
 
@@ -89,13 +92,17 @@ SECRET_KEY = os.environ.get(
 ALLOWED_HOSTS = os.environ.get("ALLOWED_HOSTS", "localhost,127.0.0.1").split(",")
 
 MIDDLEWARE = [
+    # first: times everything else
+    "openclinic.middleware.RequestTimingMiddleware",
     "django.middleware.common.CommonMiddleware",
+    # outside SessionMiddleware: a session saved is a write
+    "openclinic.middleware.ReplicaMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "django.middleware.gzip.GZipMiddleware",
+    "openclinic.middleware.GZipMiddleware",
     "django.middleware.locale.LocaleMiddleware",
 ]
 
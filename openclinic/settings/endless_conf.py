@@ -24,3 +24,9 @@ __license__ = "GPLv3"
 # http://django-endless-pagination.readthedocs.org/en/latest/customization.html
 
 ENDLESS_PAGINATION_PER_PAGE = 2
+
+# Keyset (cursor) pagination for the patient and problem lists: pages seek
+# past the last row shown instead of using OFFSET/LIMIT
+KEYSET_PAGINATION = True
+# Count the results on the first page (disable on very large databases)
+KEYSET_PAGINATION_COUNT = True
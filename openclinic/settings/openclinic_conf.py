@@ -20,6 +20,8 @@ __license__ = "GPLv3"
 
 # Settings for OpenClinic project. OpenClinic Revisited project.
 
+import os
+
 APP_AUTHOR = __author__
 APP_NAME = "OpenClinic"  # OpenClinic Revisited (in Django)
 APP_VERSION = "1.0.20171211"
@@ -29,3 +31,87 @@ CLINIC_HOURS = "L-V 9am-3pm, S 10am-1pm"
 CLINIC_ADDRESS = "Sesame Street"
 CLINIC_PHONE = "999 66 66 66"
 CLINIC_URL = "#"  # 'http://www.example.com'
+
+# Cache holding the rendered patient medical reports. Reports are cached
+# under versions read from the database, so a cache per worker process
+# (the default) works, but a shared one (Redis, Memcached...) renders each
+# report once.
+MEDICAL_REPORT_CACHE = "default"
+MEDICAL_REPORT_CACHE_TIMEOUT = 60 * 60 * 24  # seconds
+
+# Test documents are sent by the front proxy when set: "x-accel-redirect"
+# (nginx, MEDICAL_SENDFILE_URL being an internal location aliasing
+# MEDIA_ROOT) or "x-sendfile" (Apache mod_xsendfile, lighttpd). Otherwise
+# Django streams them.
+MEDICAL_SENDFILE = None
+MEDICAL_SENDFILE_URL = "/protected-media/"
+
+# Test documents larger than a chunk are uploaded in chunks of this size (it
+# must be accepted by the front proxy: client_max_body_size in nginx), into
+# MEDICAL_UPLOAD_DIR (MEDIA_ROOT/uploads when None), up to
+# MEDICAL_UPLOAD_MAX_SIZE bytes. "manage.py expire_uploads" deletes the
+# uploads not touched for MEDICAL_UPLOAD_EXPIRY seconds.
+MEDICAL_UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+MEDICAL_UPLOAD_MAX_SIZE = 4 * 1024 * 1024 * 1024
+MEDICAL_UPLOAD_DIR = None
+MEDICAL_UPLOAD_EXPIRY = 60 * 60 * 24 * 7
+
+# Slow work (previews, file deletions, report batches) is queued in the
+# database and run by "manage.py run_workers" (see medical.jobs). When
+# False, it runs in threads of the web processes, after the response.
+# Failed jobs are tried MEDICAL_JOB_MAX_ATTEMPTS times; running jobs are
+# queued again after MEDICAL_JOB_TIMEOUT seconds (a worker was killed).
+MEDICAL_JOB_QUEUE = False
+MEDICAL_JOB_MAX_ATTEMPTS = 5
+MEDICAL_JOB_TIMEOUT = 60 * 60
+
+# Previews of the test documents (see medical.thumbnails), made by this
+# number of background threads per process (0: during the request).
+MEDICAL_THUMBNAIL_WORKERS = 1
+MEDICAL_THUMBNAIL_SIZE = (256, 256)
+
+# Documents of deleted tests are queued (see medical.deletions) and deleted
+# after commit by this number of background threads per process (0: during
+# the request).
+MEDICAL_DELETION_WORKERS = 1
+
+# Batches of PDF medical reports (see medical.report_batches) are rendered
+# by this number of processes (0: during the request) into
+# MEDICAL_REPORT_SPOOL_DIR (BASE_DIR/spool/reports when None), which must be
+# outside MEDIA_ROOT. "manage.py expire_report_batches" deletes the batches
+# finished MEDICAL_REPORT_BATCH_RETENTION seconds ago.
+MEDICAL_REPORT_WORKERS = 2
+MEDICAL_REPORT_SPOOL_DIR = None
+MEDICAL_REPORT_BATCH_MAX_SIZE = 5000
+MEDICAL_REPORT_BATCH_RETENTION = 60 * 60 * 24 * 7
+
+# Queries, SQL, template and total times of each request are logged (see
+# openclinic.middleware.RequestTimingMiddleware) and sent to the browser in
+# the Server-Timing header. A view running more queries than its budget
+# (by view class or function name) logs a warning, or fails with
+# REQUEST_QUERY_BUDGET_STRICT (tests). The budgets do not depend on the
+# number of rows: going over one is an N+1 regression.
+REQUEST_SERVER_TIMING = True
+REQUEST_QUERY_BUDGET_STRICT = False
+REQUEST_QUERY_BUDGETS = {
+    "PatientDetail": 6,
+    "PatientTests": 7,
+    "HistoryList": 8,
+    "ProblemDetail": 8,
+    "PatientMedicalReport": 10,
+    "PatientMedicalReportPDF": 8,
+    "ReportBatchDetail": 3,
+}
+
+# Queries of a request slower than SLOW_QUERY_THRESHOLD_MS (None: none) are
+# logged and added up by normalized SQL in the admin site (Medical > Slow
+# queries, see medical.slow_queries), with the EXPLAIN plan of a sample of
+# SLOW_QUERY_EXPLAIN_RATE of them.
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_EXPLAIN_RATE = 0.1
+
+# /metrics (Prometheus, see openclinic.metrics) answers these addresses or
+# networks (the front proxy's, when it forwards the scrapes) and requests
+# with the "Authorization: Bearer <METRICS_TOKEN>" header.
+METRICS_ALLOWED_IPS = os.environ.get("METRICS_ALLOWED_IPS", "127.0.0.1 ::1").split()
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
@@ -33,9 +33,14 @@ DATABASES = {
         default="sqlite://:memory:",
         conn_max_age=0,
         conn_health_checks=True,
-    )
+    ),
+    # DATABASE_REPLICA_URLS, mirrors of the test database
+    **{alias: DATABASES[alias] for alias in DATABASE_REPLICAS},
 }
 
+# Views over their query budget fail
+REQUEST_QUERY_BUDGET_STRICT = True
+
 # Use faster password hasher for tests
 PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.MD5PasswordHasher",
@@ -0,0 +1,72 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Tests for the Prometheus metrics."""
+
+import pytest
+from django.urls import reverse
+
+from medical.models import History, Patient
+
+prometheus_client = pytest.importorskip("prometheus_client")
+
+
+def sample(name, **labels):
+    return prometheus_client.REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.django_db
+class TestMetrics:
+    """Tests for openclinic.metrics and the /metrics endpoint."""
+
+    def test_requests(self, client):
+        before = sample(
+            "openclinic_requests_total", view="health_check", method="GET", status="200"
+        )
+        client.get(reverse("health_check"))
+        assert (
+            sample(
+                "openclinic_requests_total",
+                view="health_check",
+                method="GET",
+                status="200",
+            )
+            == before + 1
+        )
+        assert sample("openclinic_request_queries_count", view="health_check") > 0
+
+        resp = client.get(reverse("metrics"))
+        assert resp.status_code == 200
+        assert resp["Content-Type"].startswith("text/plain")
+        content = resp.content.decode()
+        assert 'openclinic_request_duration_seconds_bucket{le="0.005",' in content
+        assert "openclinic_request_sql_seconds" in content
+
+    def test_report_cache(self, client, admin_user):
+        patient = Patient.objects.create(first_name="Ana", last_name="Núñez")
+        History.objects.create(patient=patient)
+        client.force_login(admin_user)
+        url = reverse("patient_medical_report", args=(patient.pk,))
+
+        hits = sample("openclinic_cache_requests_total", cache="report", result="hit")
+        client.get(url)
+        client.get(url)
+        assert (
+            sample("openclinic_cache_requests_total", cache="report", result="hit")
+            == hits + 1
+        )
+
+    def test_forbidden(self, client, settings):
+        settings.METRICS_ALLOWED_IPS = ["10.0.0.0/8"]
+        settings.METRICS_TOKEN = "secret"
+        url = reverse("metrics")
+        assert client.get(url).status_code == 403
+        assert client.get(url, REMOTE_ADDR="10.1.2.3").status_code == 200
+        resp = client.get(url, headers={"Authorization": "Bearer wrong"})
+        assert resp.status_code == 403
+        resp = client.get(url, headers={"Authorization": "Bearer secret"})
+        assert resp.status_code == 200
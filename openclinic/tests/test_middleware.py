@@ -0,0 +1,65 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Tests for the request timing middleware."""
+
+import logging
+
+import pytest
+from django.urls import reverse
+
+from medical.models import Patient
+from openclinic.middleware import QueryBudgetError
+
+
+@pytest.fixture
+def patient(db):
+    return Patient.objects.create(first_name="Ana", last_name="Núñez")
+
+
+@pytest.mark.django_db
+class TestRequestTimingMiddleware:
+    """Tests for RequestTimingMiddleware."""
+
+    def test_server_timing(self, client, admin_user, patient, caplog):
+        client.force_login(admin_user)
+        with caplog.at_level(logging.INFO, logger="openclinic.middleware"):
+            resp = client.get(reverse("patient_detail", args=(patient.pk, "ana")))
+        assert resp.status_code == 200
+
+        sql, template, total = resp["Server-Timing"].split(", ")
+        assert sql.startswith("sql;dur=")
+        assert template.startswith("template;dur=")
+        assert total.startswith("total;dur=")
+
+        [record] = [
+            record for record in caplog.records if getattr(record, "view", None)
+        ]
+        assert record.view == "PatientDetail"
+        assert record.status == 200
+        assert f'desc="{record.queries} queries"' in sql
+        assert record.queries > 0
+        assert record.template_ms > 0
+        assert "view=PatientDetail" in record.getMessage()
+
+    def test_no_header(self, client, settings):
+        settings.REQUEST_SERVER_TIMING = False
+        resp = client.get(reverse("health_check"))
+        assert "Server-Timing" not in resp
+
+    def test_budget(self, client, admin_user, patient, settings, caplog):
+        settings.REQUEST_QUERY_BUDGETS = {"PatientDetail": 1}
+        client.force_login(admin_user)
+        url = reverse("patient_detail", args=(patient.pk, "ana"))
+
+        settings.REQUEST_QUERY_BUDGET_STRICT = False
+        assert client.get(url).status_code == 200
+        assert "PatientDetail ran" in caplog.text
+
+        settings.REQUEST_QUERY_BUDGET_STRICT = True
+        with pytest.raises(QueryBudgetError, match="over its budget of 1"):
+            client.get(url)
@@ -0,0 +1,118 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Tests for the read replica router."""
+
+import pytest
+from django.contrib.sessions.models import Session
+from django.db import router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+
+from medical.models import Patient
+from openclinic import replicas
+from openclinic.middleware import ReplicaMiddleware
+
+
+@pytest.fixture
+def replica(settings, monkeypatch):
+    settings.DATABASE_REPLICAS = ["replica"]
+    # the replica is not configured: record the reads, run them on default
+    reads = []
+    db_for_read = replicas.ReplicaRouter.db_for_read
+
+    def spy(self, model, **hints):
+        database = db_for_read(self, model, **hints)
+        reads.append((model, database))
+
+    monkeypatch.setattr(replicas.ReplicaRouter, "db_for_read", spy)
+    return reads
+
+
+def test_routing(settings):
+    settings.DATABASE_REPLICAS = ["replica"]
+    assert router.db_for_read(Patient) == "default"
+    with replicas.read_replica() as reads:
+        assert router.db_for_read(Patient) == "replica"
+        # sessions and users come from the primary
+        assert router.db_for_read(Session) == "default"
+        assert router.db_for_write(Patient) == "default"
+        assert reads.wrote
+        # the request reads its own writes
+        assert router.db_for_read(Patient) == "default"
+
+
+def test_no_replicas(settings):
+    settings.DATABASE_REPLICAS = []
+    with replicas.read_replica():
+        assert router.db_for_read(Patient) == "default"
+
+
+@pytest.mark.django_db
+def test_transaction(settings):
+    settings.DATABASE_REPLICAS = ["replica"]
+    with replicas.read_replica(), transaction.atomic():
+        assert router.db_for_read(Patient) == "default"
+
+
+def test_save_to_primary(settings):
+    settings.DATABASE_REPLICAS = ["replica"]
+    patient = Patient(first_name="Ana")
+    patient._state.db = "replica"
+    assert router.db_for_write(Patient, instance=patient) == "default"
+    assert not router.allow_migrate("replica", "medical")
+
+
+class TestReplicaMiddleware:
+    """Tests for the primary pinning after a write."""
+
+    def view(self, request):
+        with replicas.read_replica():
+            first = router.db_for_read(Patient)
+            if request.method == "POST":
+                router.db_for_write(Patient)
+            return HttpResponse(f"{first},{router.db_for_read(Patient)}")
+
+    def test_pin(self, settings):
+        settings.DATABASE_REPLICAS = ["replica"]
+        settings.DATABASE_REPLICA_PIN_SECONDS = 5
+        middleware = ReplicaMiddleware(self.view)
+        factory = RequestFactory()
+
+        resp = middleware(factory.get("/"))
+        assert resp.content == b"replica,replica"
+        assert replicas.PIN_COOKIE not in resp.cookies
+
+        resp = middleware(factory.post("/"))
+        assert resp.content == b"replica,default"
+        assert resp.cookies[replicas.PIN_COOKIE]["max-age"] == 5
+
+        request = factory.get("/")
+        request.COOKIES[replicas.PIN_COOKIE] = "1"
+        assert middleware(request).content == b"default,default"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_search_views(client, admin_user, replica):
+    client.force_login(admin_user)
+    resp = client.get(reverse("patient_search"), {"q": "Ana"})
+    assert resp.status_code == 200
+    assert (Patient, "replica") in replica
+
+    replica.clear()
+    client.cookies[replicas.PIN_COOKIE] = "1"
+    client.get(reverse("patient_search"), {"q": "Ana"})
+    assert (Patient, "replica") not in replica
+
+
+@pytest.mark.django_db(transaction=True)
+def test_lookups(client, admin_user, replica):
+    client.force_login(admin_user)
+    resp = client.get(reverse("ajax_lookup", args=("patients",)), {"term": "Ana"})
+    assert resp.status_code == 200
+    assert (Patient, "replica") in replica
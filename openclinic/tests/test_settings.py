@@ -0,0 +1,40 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Tests for the database settings read from the environment."""
+
+import pytest
+
+from openclinic.settings.database_conf import _database
+
+
+def test_sqlite():
+    database = _database("sqlite:///openclinic.db", 600, pool=True, max_size=4)
+    assert database["ENGINE"] == "django.db.backends.sqlite3"
+    assert database["NAME"] == "openclinic.db"
+    assert database["CONN_MAX_AGE"] == 600
+    assert database["CONN_HEALTH_CHECKS"]
+    assert database["OPTIONS"]["transaction_mode"] == "IMMEDIATE"
+    assert "pool" not in database.get("OPTIONS", {})
+
+
+def test_persistent_connections():
+    database = _database("postgres://user:secret@db:5432/openclinic", 600)
+    assert database["ENGINE"] == "django.db.backends.postgresql"
+    assert (database["HOST"], database["NAME"]) == ("db", "openclinic")
+    assert database["CONN_MAX_AGE"] == 600
+    assert "pool" not in database.get("OPTIONS", {})
+
+
+def test_pool():
+    pytest.importorskip("psycopg_pool")
+    database = _database(
+        "postgres://user:secret@db:5432/openclinic", 600, pool=True, max_size=4
+    )
+    assert database["CONN_MAX_AGE"] == 0
+    assert database["OPTIONS"]["pool"]["max_size"] == 4
+    assert callable(database["OPTIONS"]["pool"]["check"])
@@ -0,0 +1,36 @@
+# Copyright (c) 2012-2026 Jose Antonio Chavarría <jachavar@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""Tests for the openclinic project views."""
+
+import pytest
+from django.db import connections
+from django.urls import reverse
+
+
+@pytest.mark.django_db
+class TestHealthCheck:
+    """Tests for the health check endpoints."""
+
+    def test_health(self, client):
+        resp = client.get(reverse("health_check"))
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["status"] == "healthy"
+        assert data["connections"]["default"] == {
+            "conn_max_age": connections["default"].settings_dict["CONN_MAX_AGE"],
+            "health_checks": True,
+        }
+
+    def test_pool_stats(self, client, monkeypatch):
+        class Pool:
+            def get_stats(self):
+                return {"pool_min": 2, "pool_max": 10, "pool_available": 1}
+
+        monkeypatch.setattr(connections["default"], "pool", Pool(), raising=False)
+        data = client.get(reverse("health_check")).json()
+        assert data["connections"]["default"]["pool"]["pool_available"] == 1
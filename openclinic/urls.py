@@ -16,7 +16,7 @@
 __author__ = "Jose Antonio Chavarría"
 __license__ = "GPLv3"
 
-from ajax_select import urls as ajax_select_urls
+from ajax_select import views as ajax_select_views
 from django.conf import settings
 from django.conf.urls import include
 from django.conf.urls.static import static
@@ -25,7 +25,8 @@ from django.contrib.auth import views as auth_views
 from django.urls import re_path, reverse_lazy
 from django.views.generic import RedirectView, TemplateView
 
-from . import health
+from . import health, metrics
+from .replicas import read_replica
 
 admin.autodiscover()
 
@@ -34,7 +35,11 @@ urlpatterns = [
     # url(r'^admin/doc/', include('django.contrib.admindocs.urls')),
     re_path(r"^grappelli/", include("grappelli.urls")),
     re_path(r"^admin/", admin.site.urls),
-    re_path(r"^ajax_select/", include(ajax_select_urls)),
+    re_path(
+        r"^ajax_select/ajax_lookup/(?P<channel>[-\w]+)$",
+        read_replica()(ajax_select_views.ajax_lookup),
+        name="ajax_lookup",
+    ),
     re_path(
         r"^$",
         RedirectView.as_view(url=reverse_lazy("welcome"), permanent=True),
@@ -78,6 +83,7 @@ urlpatterns = [
     re_path(r"^medical_records/", include("medical.urls")),
     # Health check endpoints for container orchestration
     re_path(r"^health/$", health.health_check, name="health_check"),
+    re_path(r"^metrics$", metrics.metrics_view, name="metrics"),
     re_path(r"^health/ready/$", health.readiness_check, name="readiness_check"),
     re_path(r"^health/live/$", health.liveness_check, name="liveness_check"),
 ]
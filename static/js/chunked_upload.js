@@ -0,0 +1,108 @@
+/*
+ * Resumable chunked upload of medical test documents (see medical/uploads.py).
+ *
+ * Documents larger than one chunk are sent in chunks, resuming from the
+ * offset confirmed by the server after a network or server error (with an
+ * increasing delay). Smaller documents are posted with the form.
+ */
+(function ($) {
+    'use strict';
+
+    var MAX_RETRIES = 5;
+
+    function retryable(xhr) {
+        // network errors, proxy timeouts (502, 504), server errors and
+        // chunks sent from a stale offset
+        return xhr.status === 0 || xhr.status === 409 || xhr.status >= 500;
+    }
+
+    function wait(delay) {
+        return $.Deferred(function (deferred) {
+            setTimeout(deferred.resolve, delay);
+        }).promise();
+    }
+
+    function resume(form, file, upload, retries, xhr) {
+        if (retries <= 0 || !retryable(xhr)) {
+            return $.Deferred().reject(xhr);
+        }
+
+        var delay = Math.pow(2, MAX_RETRIES - retries) * 1000;
+        return wait(delay).then(function () {
+            // resume from the offset confirmed by the server
+            return $.getJSON(upload.url).then(function (status) {
+                return uploadChunks(form, file, status, retries - 1);
+            }, function (statusXhr) {
+                return resume(form, file, upload, retries - 1, statusXhr);
+            });
+        });
+    }
+
+    function uploadChunks(form, file, upload, retries) {
+        if (upload.offset >= upload.size) {
+            // committing again returns the same test
+            return $.ajax({
+                type: 'POST',
+                url: upload.url,
+                headers: {'X-CSRFToken': form.csrf}
+            }).then(null, function (xhr) {
+                return resume(form, file, upload, retries, xhr);
+            });
+        }
+
+        var end = Math.min(upload.offset + upload.chunk_size, upload.size);
+        return $.ajax({
+            type: 'PATCH',
+            url: upload.url,
+            data: file.slice(upload.offset, end),
+            processData: false,
+            contentType: 'application/offset+octet-stream',
+            headers: {'Upload-Offset': upload.offset, 'X-CSRFToken': form.csrf}
+        }).then(function (status) {
+            form.progress(status.offset, status.size);
+            return uploadChunks(form, file, status, MAX_RETRIES);
+        }, function (xhr) {
+            return resume(form, file, upload, retries, xhr);
+        });
+    }
+
+    $(document).on('submit', 'form[data-upload-url]', function (event) {
+        var $form = $(this);
+        var input = $form.find('input[type=file]')[0];
+        var file = input && input.files && input.files[0];
+        if (!file || !file.slice || file.size <= $form.data('chunk-size')) {
+            return;
+        }
+
+        event.preventDefault();
+        var $progress = $form.find('.upload-progress').removeClass('hidden');
+        var form = {
+            csrf: $form.find('input[name=csrfmiddlewaretoken]').val(),
+            progress: function (offset, size) {
+                var percent = Math.floor(offset * 100 / size) + '%';
+                $progress.find('.progress-bar').css('width', percent).text(percent);
+            }
+        };
+        $form.find('button[type=submit]').prop('disabled', true);
+
+        $.ajax({
+            type: 'POST',
+            url: $form.data('upload-url'),
+            data: {
+                filename: file.name,
+                size: file.size,
+                document_type: $form.find('[name=document_type]').val(),
+                csrfmiddlewaretoken: form.csrf
+            }
+        }).then(function (upload) {
+            return uploadChunks(form, file, upload, MAX_RETRIES);
+        }).then(function (result) {
+            window.location.href = result.redirect;
+        }, function (xhr) {
+            var response = xhr.responseJSON || {};
+            $progress.addClass('hidden');
+            $form.find('button[type=submit]').prop('disabled', false);
+            window.alert(response.error || JSON.stringify(response.errors || xhr.statusText));
+        });
+    });
+}(jQuery));